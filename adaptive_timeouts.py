@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+ADAPTIVE TIMEOUTS MODULE
+Connect/TTFB/read timeouts learned from observed latency, per destination class
+"""
+
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+PHASES = ('connect', 'ttfb', 'read')
+
+class LatencyWindow:
+    """Rolling window of latency samples with cached percentiles"""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+        self.timeouts = deque(maxlen=size)
+        self._sorted = None
+
+    def add(self, seconds: float, timed_out: bool = False) -> None:
+        self.samples.append(seconds)
+        self.timeouts.append(timed_out)
+        self._sorted = None
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self.timeouts.clear()
+        self._sorted = None
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile, q in [0, 1]"""
+        if not self.samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        index = min(len(self._sorted) - 1, max(0, int(round(q * (len(self._sorted) - 1)))))
+        return self._sorted[index]
+
+    def recent_timeout_ratio(self, count: int) -> float:
+        recent = list(self.timeouts)[-count:]
+        if not recent:
+            return 0.0
+        return sum(recent) / len(recent)
+
+class AdaptiveTimeoutManager:
+    """
+    Per destination class timeouts derived from rolling latency percentiles,
+    in the spirit of Tor's CircuitBuildTimeout learning: a timeout is the
+    configured percentile of recent samples times a multiplier, clamped to
+    floors/ceilings. Timeouts are recorded as censored samples, and a burst
+    of them resets the window (network changed) so stale data is not trusted.
+
+    Over a SOCKS proxy the CONNECT handshake is part of the time to first
+    byte, so the connect timeout is learned from the TTFB window with its
+    own floor/ceiling.
+    """
+
+    DEFAULT_CONFIG = {
+        "enabled": True,
+        "percentile": 0.8,
+        "multiplier": 1.5,
+        "min_samples": 20,
+        "window": 200,
+        "reset_window": 20,
+        "reset_timeout_ratio": 0.6,
+        "floors": {"connect": 2.0, "ttfb": 3.0, "read": 5.0},
+        "ceilings": {"connect": 30.0, "ttfb": 60.0, "read": 120.0}
+    }
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 defaults: Optional[Dict[str, float]] = None):
+        self.config = dict(self.DEFAULT_CONFIG)
+        for key, value in (config or {}).items():
+            if isinstance(value, dict) and isinstance(self.config.get(key), dict):
+                self.config[key] = {**self.config[key], **value}
+            else:
+                self.config[key] = value
+        self.defaults = dict(defaults or {})
+        self.windows: Dict[Tuple[str, str], LatencyWindow] = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('adaptive_timeouts')
+
+    def _window(self, dest_class: str, phase: str) -> LatencyWindow:
+        key = (dest_class, phase)
+        if key not in self.windows:
+            self.windows[key] = LatencyWindow(self.config['window'])
+        return self.windows[key]
+
+    def _clamp(self, phase: str, value: float) -> float:
+        floor = self.config['floors'].get(phase, 0.0)
+        ceiling = self.config['ceilings'].get(phase, value)
+        return min(max(value, floor), ceiling)
+
+    def observe(self, dest_class: str, phase: str, seconds: float) -> None:
+        """Record a successful latency sample"""
+        with self.lock:
+            self._window(dest_class, phase).add(seconds)
+
+    def observe_timeout(self, dest_class: str, timeout) -> None:
+        """Record a timed out request as a censored sample at the timeout used"""
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        with self.lock:
+            window = self._window(dest_class, 'ttfb')
+            window.add(max(connect or 0, read or 0), timed_out=True)
+            reset_window = self.config['reset_window']
+            if (len(window) >= reset_window and
+                    window.recent_timeout_ratio(reset_window) >= self.config['reset_timeout_ratio']):
+                self.logger.warning(f"⚠️ Too many timeouts for '{dest_class}', resetting learned timeouts")
+                for phase in PHASES:
+                    self._window(dest_class, phase).clear()
+
+    def observe_response(self, dest_class: str, response, total_elapsed: float) -> None:
+        """Record TTFB (response.elapsed) and body read time of a completed request"""
+        ttfb = response.elapsed.total_seconds() if getattr(response, 'elapsed', None) else total_elapsed
+        with self.lock:
+            self._window(dest_class, 'ttfb').add(ttfb)
+            self._window(dest_class, 'read').add(max(0.0, total_elapsed - ttfb))
+
+    def get_timeout(self, dest_class: str, phase: str) -> float:
+        """Learned timeout for one phase, falling back to the class default"""
+        default = self.defaults.get(dest_class, self.defaults.get('default', 10.0))
+        if not self.config.get('enabled', True):
+            return default
+        source_phase = 'ttfb' if phase == 'connect' else phase
+        with self.lock:
+            window = self._window(dest_class, source_phase)
+            if len(window) < self.config['min_samples']:
+                return default
+            value = window.percentile(self.config['percentile']) * self.config['multiplier']
+        return self._clamp(phase, value)
+
+    def get_request_timeout(self, dest_class: str) -> Tuple[float, float]:
+        """(connect, read) tuple for requests; read covers both TTFB and inter-chunk gaps"""
+        connect = self.get_timeout(dest_class, 'connect')
+        read = max(self.get_timeout(dest_class, 'ttfb'), self.get_timeout(dest_class, 'read'))
+        return (connect, read)
+
+    def get_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current learned timeouts and sample counts per destination class"""
+        classes = sorted({dest_class for dest_class, _ in self.windows} | set(self.defaults))
+        snapshot = {}
+        for dest_class in classes:
+            window = self.windows.get((dest_class, 'ttfb'))
+            snapshot[dest_class] = {
+                'timeout': self.get_request_timeout(dest_class),
+                'samples': len(window) if window else 0
+            }
+        return snapshot
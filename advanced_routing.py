@@ -4,15 +4,21 @@ ADVANCED CIRCUIT ROUTING MODULE - CORRETTO
 Multi-hop custom circuits and advanced Tor routing
 """
 
+import re
 import random
 import time
 import json
 import logging
 from typing import Dict, Any, List, Optional
 from pathlib import Path
+import stem
+import stem.connection
 import stem.control
 from stem.control import Controller
 
+_INTERVAL = re.compile(r'^(\d+)\s*(second|minute|hour|day|week)s?$')
+_INTERVAL_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800}
+
 class Colors:
     """ANSI color codes"""
     GREEN = '\033[92m'
@@ -21,6 +27,29 @@ class Colors:
     BLUE = '\033[94m'
     END = '\033[0m'
 
+def parse_torrc_options(text: str) -> Dict[str, List[str]]:
+    """torrc text to {option: [values]}; repeated options (Bridge, ClientTransportPlugin) keep every value"""
+    options: Dict[str, List[str]] = {}
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line:
+            key, _, value = line.partition(' ')
+            options.setdefault(key, []).append(value.strip())
+    return options
+
+def _normalize_value(value: str) -> str:
+    # GETCONF reports intervals in seconds ("30 days" -> "2592000")
+    value = ' '.join(value.split()).lower()
+    match = _INTERVAL.match(value)
+    return str(int(match.group(1)) * _INTERVAL_SECONDS[match.group(2)]) if match else value
+
+def diff_tor_options(desired: Dict[str, List[str]], live: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Options of `desired` whose values differ from the `live` ones"""
+    return {
+        key: values for key, values in desired.items()
+        if [_normalize_value(v) for v in values] != [_normalize_value(v) for v in live.get(key, [])]
+    }
+
 class AdvancedCircuitRouting:
     """
     Advanced Tor circuit routing with multi-hop support
@@ -29,9 +58,10 @@ class AdvancedCircuitRouting:
     
     def __init__(self, config_path: str = "settings.json"):
         self.config_path = config_path
-        self.config = self.load_config()
         self.logger = self.setup_logging()
+        self.config = self.load_config()
         self.controller = None
+        self.last_reconcile = None
         
     def setup_logging(self):
         """Setup advanced routing logging"""
@@ -39,6 +69,7 @@ class AdvancedCircuitRouting:
         logger.setLevel(logging.INFO)
         
         if not logger.handlers:
+            Path('logs').mkdir(exist_ok=True)
             handler = logging.FileHandler('logs/advanced_routing.log', encoding='utf-8')
             formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
             handler.setFormatter(formatter)
@@ -67,20 +98,21 @@ class AdvancedCircuitRouting:
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 user_config = json.load(f)
-                # Merge configurations
-                if 'advanced_circuit_routing' in user_config:
-                    default_config['advanced_circuit_routing'].update(
-                        user_config['advanced_circuit_routing']
-                    )
+                # Merge configurations: nested sections key by key, top-level keys as is
+                for key, value in user_config.items():
+                    if isinstance(value, dict) and isinstance(default_config.get(key), dict):
+                        default_config[key].update(value)
+                    else:
+                        default_config[key] = value
                 return default_config
         except Exception as e:
             self.logger.warning(f"Config load failed: {e}, using defaults")
             return default_config
     
-    def connect_controller(self) -> bool:
-        """Connect to Tor controller"""
+    def connect_controller(self, port: Optional[int] = None) -> bool:
+        """Connect to Tor controller (`port`, else the configured control_port)"""
         try:
-            self.controller = Controller.from_port(port=9051)
+            self.controller = Controller.from_port(port=port or self.config.get('control_port', 9051))
             self.controller.authenticate()
             self.logger.info("✅ Advanced routing controller connected")
             return True
@@ -146,6 +178,74 @@ class AdvancedCircuitRouting:
         self.logger.info("📄 Generated advanced Tor configuration")
         return config_text
     
+    def reconcile_tor_config(self, desired: Optional[Dict[str, List[str]]] = None,
+                             controller=None) -> Dict[str, Any]:
+        """
+        Apply the advanced torrc options to the running Tor without a
+        restart: GETCONF the live values, then one SETCONF with only the
+        keys that differ. Tor applies a SETCONF all or nothing; if it fails
+        anyway (e.g. the connection drops mid-way) the previous values are
+        written back. The outcome and time spent are kept in last_reconcile.
+        `controller` targets another Tor than this router's own connection.
+        """
+        started = time.perf_counter()
+        desired = desired if desired is not None else parse_torrc_options(self.get_torrc_advanced_config())
+        result = {'changed': [], 'applied': False, 'rolled_back': False, 'error': None}
+        try:
+            if controller is None:
+                if not self.controller and not self.connect_controller():
+                    raise ConnectionError("Tor controller unavailable")
+                controller = self.controller
+            live = controller.get_conf_map(list(desired), multiple=True)
+            changes = diff_tor_options(desired, live)
+            result['changed'] = sorted(changes)
+            if changes:
+                try:
+                    controller.set_options([(key, value) for key, values in changes.items() for value in values])
+                except stem.ControllerError as e:
+                    result['error'] = str(e)
+                    # Empty previous values reset the option to its default
+                    previous = [(key, value) for key in changes for value in (live.get(key) or [None])]
+                    try:
+                        controller.set_options(previous)
+                        result['rolled_back'] = True
+                    except stem.ControllerError as rollback_error:
+                        self.logger.error(f"❌ Tor config rollback failed: {rollback_error}")
+                    self.logger.error(f"❌ Tor config apply failed ({', '.join(changes)}): {e}")
+                else:
+                    result['applied'] = True
+        except (stem.ControllerError, ConnectionError) as e:
+            result['error'] = str(e)
+            self.logger.error(f"❌ Tor config reconcile failed: {e}")
+        result['seconds'] = round(time.perf_counter() - started, 4)
+        result['timestamp'] = time.time()
+        self.last_reconcile = result
+        if not result['error']:
+            self.logger.info(f"⚙️ Tor config reconciled: {len(result['changed'])}/{len(desired)} options changed "
+                             f"in {result['seconds'] * 1000:.1f} ms")
+        return result
+
+    def reconcile_instances(self, control_ports: List[int],
+                            desired: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Reconcile several Tor instances (e.g. tor_launcher's) to the same
+        options: the torrc is generated once, since every call draws new
+        entry/exit countries. Each result carries its `control_port`.
+        """
+        desired = desired if desired is not None else parse_torrc_options(self.get_torrc_advanced_config())
+        results = []
+        for port in control_ports:
+            try:
+                with Controller.from_port(port=port) as controller:
+                    controller.authenticate()
+                    result = self.reconcile_tor_config(desired, controller=controller)
+            except (stem.SocketError, stem.connection.AuthenticationFailure) as e:
+                self.logger.error(f"❌ Controller on port {port} unavailable: {e}")
+                result = {'changed': [], 'applied': False, 'rolled_back': False, 'error': str(e)}
+            result['control_port'] = port
+            results.append(result)
+        return results
+    
     def calculate_optimal_rotation_timing(self) -> int:
         """Calculate optimal rotation timing to avoid patterns - CORRETTO"""
         base_interval = self.config.get('identity_rotation_interval', 60)
@@ -264,6 +364,12 @@ class AdvancedCircuitRouting:
 
 def main():
     """Test advanced routing - CORRETTO"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Advanced circuit routing')
+    parser.add_argument('--apply', action='store_true', help='Apply the routing torrc options to the running Tor (SETCONF)')
+    parser.add_argument('--control-port', type=int, action='append',
+                        help='Control port to apply to (repeat for several instances; default: control_port from settings)')
+    args = parser.parse_args()
     print(f"{Colors.BLUE}🔧 Testing Advanced Circuit Routing...{Colors.END}")
     
     try:
@@ -276,6 +382,23 @@ def main():
         print(f"   • Pattern: {strategy['traffic_pattern']['name']}")
         print(f"   • Health: {'✅' if strategy['circuit_health'] else '❌'}")
         
+        if args.apply:
+            desired = parse_torrc_options(strategy['torrc_config'])
+            ports = args.control_port or [router.config.get('control_port', 9051)]
+            failed = False
+            for result in router.reconcile_instances(ports, desired):
+                if result['error']:
+                    rollback = ' (rolled back)' if result['rolled_back'] else ''
+                    print(f"{Colors.RED}❌ Tor config not applied on port {result['control_port']}{rollback}: "
+                          f"{result['error']}{Colors.END}")
+                    failed = True
+                else:
+                    print(f"   • Tor config (port {result['control_port']}): {len(result['changed'])} options changed "
+                          f"in {result['seconds'] * 1000:.1f} ms {', '.join(result['changed'])}")
+            if failed:
+                router.close()
+                return False
+        
         router.close()
         return True
         
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+BOOTSTRAP MONITOR
+Tor readiness from the controller's bootstrap status instead of HTTP polling
+"""
+
+import re
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+_STATUS_FIELD = re.compile(r'(\w+)=("(?:[^"\\]|\\.)*"|\S+)')
+
+def parse_bootstrap_phase(line: str) -> Dict[str, Any]:
+    """
+    Parse a `status/bootstrap-phase` reply, e.g.
+    'NOTICE BOOTSTRAP PROGRESS=100 TAG=done SUMMARY="Done"'
+    """
+    fields = {key.upper(): value.strip('"') for key, value in _STATUS_FIELD.findall(line or '')}
+    severity = (line or '').split(' ', 1)[0] or 'NOTICE'
+    return {
+        'severity': severity,
+        'progress': int(fields.get('PROGRESS', 0)),
+        'tag': fields.get('TAG', ''),
+        'summary': fields.get('SUMMARY', ''),
+        'warning': fields.get('WARNING'),
+        'recommendation': fields.get('RECOMMENDATION')
+    }
+
+class BootstrapMonitor:
+    """
+    Follows Tor's bootstrap through GETINFO status/bootstrap-phase and
+    STATUS_CLIENT BOOTSTRAP events. wait() returns as soon as Tor reports
+    100%, without any network request; `phases` keeps how long each
+    bootstrap phase (TAG) took, measured from when it was first seen.
+    """
+
+    def __init__(self, controller, logger: Optional[logging.Logger] = None):
+        self.controller = controller
+        self.logger = logger or logging.getLogger('bootstrap_monitor')
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.started = time.monotonic()
+        self.progress = 0
+        self.current = None  # (tag, summary, progress, first seen)
+        self.phases: List[Dict[str, Any]] = []
+        self.problems: List[str] = []
+
+    def _update(self, status: Dict[str, Any]) -> None:
+        with self.lock:
+            if status['warning']:
+                problem = f"{status['warning']} ({status['recommendation'] or 'no recommendation'})"
+                if problem not in self.problems:
+                    self.problems.append(problem)
+                    self.logger.warning(f"⚠️ Bootstrap problem at {status['progress']}%: {problem}")
+            if status['progress'] < self.progress or not status['tag']:
+                return
+            now = time.monotonic()
+            self.progress = status['progress']
+            if self.progress >= 100:
+                self._close_phase(now)
+                self.done.set()
+            elif self.current is None or status['tag'] != self.current[0]:
+                self._close_phase(now)
+                self.current = (status['tag'], status['summary'], status['progress'], now)
+                self.logger.info(f"⏳ Bootstrap {status['progress']}%: {status['summary']}")
+
+    def _close_phase(self, now: float) -> None:
+        if self.current is not None:
+            tag, summary, progress, seen = self.current
+            self.phases.append({'tag': tag, 'summary': summary, 'progress': progress,
+                                'seconds': round(now - seen, 3)})
+            self.current = None
+
+    def _on_event(self, event) -> None:
+        if getattr(event, 'action', None) != 'BOOTSTRAP':
+            return
+        arguments = {key.upper(): value for key, value in (event.keyword_args or {}).items()}
+        self._update({
+            'severity': getattr(event, 'runlevel', None) or 'NOTICE',
+            'progress': int(arguments.get('PROGRESS', 0)),
+            'tag': arguments.get('TAG', ''),
+            'summary': arguments.get('SUMMARY', ''),
+            'warning': arguments.get('WARNING'),
+            'recommendation': arguments.get('RECOMMENDATION')
+        })
+
+    def poll(self) -> Dict[str, Any]:
+        """Current phase via GETINFO"""
+        status = parse_bootstrap_phase(self.controller.get_info('status/bootstrap-phase'))
+        self._update(status)
+        return status
+
+    def wait(self, timeout: float) -> bool:
+        """Block until bootstrap reaches 100% or `timeout` seconds pass"""
+        from stem.control import EventType
+        if self.poll()['progress'] >= 100:
+            return True
+        self.controller.add_event_listener(self._on_event, EventType.STATUS_CLIENT)
+        try:
+            # Events only report changes: poll once more in case 100% arrived before subscribing
+            self.poll()
+            deadline = time.monotonic() + timeout
+            while not self.done.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                # Events drive readiness; the slow poll only covers a lost event
+                if not self.done.wait(min(remaining, 5.0)):
+                    self.poll()
+            return True
+        finally:
+            try:
+                self.controller.remove_event_listener(self._on_event)
+            except Exception:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'progress': self.progress,
+                'elapsed': round(time.monotonic() - self.started, 3),
+                'phases': list(self.phases),
+                'problems': list(self.problems)
+            }
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+BULK URL RUNNER
+Streams URLs from a file or stdin through pooled circuits, one JSONL record per result
+"""
+
+import sys
+import time
+import heapq
+import logging
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterator, List
+
+from request_deadline import RequestDeadline
+
+class _NullSink:
+    """Discards bodies; only size and hash are kept"""
+
+    def write(self, data) -> int:
+        return len(data)
+
+def record_succeeded(record: Dict[str, Any]) -> bool:
+    """A complete 2xx/3xx response; anything else (errors, 4xx, 429, 5xx) is worth retrying later"""
+    status = record.get('status')
+    return status is not None and 200 <= status < 400 and record.get('complete', True)
+
+class _BulkJob:
+    """One URL on its way through pacing and fetching; keeps its circuit across deferrals"""
+
+    __slots__ = ('url', 'deadline', 'circuit', 'throttle_retries', 'retries', 'started', 'delay_reserved',
+                 'shaping_slot')
+
+    def __init__(self, url: str, deadline: RequestDeadline, throttle_retries: int, retries: int = 0):
+        self.url = url
+        self.deadline = deadline
+        self.circuit = None
+        self.throttle_retries = throttle_retries
+        self.retries = retries
+        self.started = False
+        self.delay_reserved = False
+        self.shaping_slot = False
+
+def iter_urls(source: str) -> Iterator[str]:
+    """Lazily yield URLs from a file path or '-' for stdin, skipping blanks and comments"""
+    handle = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        for line in handle:
+            url = line.strip()
+            if url and not url.startswith('#'):
+                yield url
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+class BulkFetcher:
+    """
+    Fetches a lazily consumed URL stream with bounded concurrency.
+
+    At most `concurrency * 2` URLs are in flight or queued at any time, so
+    memory stays flat no matter how long the input is. Bodies are streamed
+    and hashed, never kept.
+
+    Records go to a result_sinks.BackgroundResultWriter, whose bounded queue
+    pushes back on the workers when storage falls behind. With a
+    `content_store` bodies are kept once per distinct content.
+
+    With a `seen_filter` (url_filter.BloomFilter) duplicate URLs are
+    skipped. URLs enter the filter only once they succeed, so neither a
+    crash nor a failed fetch marks a URL as seen, and a small in-flight set
+    catches duplicates that arrive while the first copy is still running.
+
+    Pacing never parks a worker: a URL waiting for its session's artificial
+    delay (DelayScheduler) or for the RateLimiter (or that came back 429)
+    goes onto a timer heap and is handed to the pool again when due,
+    keeping its circuit, so one throttled host cannot starve the others. A
+    URL whose session is at its traffic pattern's concurrency limit waits
+    on the TrafficShaper and is re-dispatched when a slot frees up. A URL
+    that got no response is retried the same way, on the next pooled
+    circuit, `retries` times (max_retries attempts in total by default).
+    The per-URL `deadline` starts when the URL is dispatched and includes
+    those waits.
+    """
+
+    def __init__(self, anonymizer, concurrency: int = 8, deadline: Optional[float] = None,
+                 hash_algorithm: str = 'sha256', journal=None, seen_filter=None,
+                 content_store=None, throttle_retries: int = 2, retries: Optional[int] = None):
+        self.anonymizer = anonymizer
+        self.journal = journal
+        self.seen_filter = seen_filter
+        self.content_store = content_store
+        self.in_flight = set()
+        self.concurrency = max(1, concurrency)
+        self.deadline = deadline
+        self.hash_algorithm = hash_algorithm
+        self.throttle_retries = throttle_retries
+        if retries is None:
+            retries = max(0, anonymizer.config.get('max_retries', 3) - 1)
+        self.retries = retries
+        self.logger = logging.getLogger('bulk_runner')
+        self.write_lock = threading.Lock()
+        self.stats = {'total': 0, 'ok': 0, 'failed': 0, 'bytes': 0, 'skipped': 0, 'duplicates': 0,
+                      'deferred': 0}
+        self.pool = None
+        self.sequence = itertools.count()
+        self.deferred = []
+        self.deferred_ready = threading.Condition()
+        self.outstanding = 0
+        self.idle = threading.Condition()
+
+    def fetch_one(self, url: str, circuit=None, deadline=None) -> Dict[str, Any]:
+        """
+        Fetch one URL and build its result record. `circuit` is a
+        (key, session) pair already paced by run(); without one the next
+        pooled circuit is used and the anonymizer paces the request itself.
+        """
+        paced = circuit is not None
+        circuit_key, session = circuit or self.anonymizer.get_circuit_pool().acquire()
+        start = time.monotonic()
+        record = {'url': url, 'circuit': circuit_key, 'started_at': time.time()}
+        sink = self.content_store.open_writer() if self.content_store else _NullSink()
+        try:
+            result = self.anonymizer.get_download_manager().stream_to_sink(
+                url, sink, hash_algorithm=self.hash_algorithm,
+                deadline=self.deadline if deadline is None else deadline, session=session,
+                rate_limit=not paced, apply_delay=not paced
+            )
+        except Exception as e:
+            result = None
+            record['error'] = str(e)
+        if self.content_store:
+            if result is not None and result['complete']:
+                record['body_ref'] = sink.commit()
+            else:
+                sink.discard()
+
+        record['elapsed'] = round(time.monotonic() - start, 4)
+        if result is None:
+            record.setdefault('error', 'request failed')
+            record['status'] = None
+        else:
+            record.update({
+                'status': result['status_code'],
+                'bytes': result['bytes'],
+                'hash': result['hash'],
+                'complete': result['complete']
+            })
+            if result.get('error'):
+                record['error'] = result['error']
+        return record
+
+    def _mark_journal(self, records: List[Dict[str, Any]]) -> None:
+        """Writer callback: journal entries follow their stored results"""
+        for record in records:
+            if record_succeeded(record):
+                self.journal.mark_done(record['url'], record.get('status'))
+            else:
+                self.journal.mark_failed(record['url'], record.get('error'), record.get('status'))
+
+    def _emit(self, writer, record: Dict[str, Any]) -> None:
+        succeeded = record_succeeded(record)
+        with self.write_lock:
+            self.stats['total'] += 1
+            if succeeded:
+                self.stats['ok'] += 1
+                self.stats['bytes'] += record.get('bytes', 0)
+            else:
+                self.stats['failed'] += 1
+            # Only successes become "seen": a failed URL is fetched again on the next run
+            if self.seen_filter is not None and succeeded:
+                self.seen_filter.add(record['url'])
+            self.in_flight.discard(record['url'])
+        # Outside the lock: a full queue blocks only this worker
+        writer.submit(record)
+
+    def _defer(self, job: _BulkJob, delay: float) -> None:
+        with self.deferred_ready:
+            heapq.heappush(self.deferred, (time.monotonic() + delay, next(self.sequence), job))
+            self.stats['deferred'] += 1
+            self.deferred_ready.notify()
+
+    def _release_deferred(self) -> None:
+        """Hand deferred jobs back to the pool once they are due; ends when the run is drained"""
+        while True:
+            with self.deferred_ready:
+                while self.pool is not None and (not self.deferred or self.deferred[0][0] > time.monotonic()):
+                    timeout = self.deferred[0][0] - time.monotonic() if self.deferred else None
+                    self.deferred_ready.wait(timeout)
+                if self.pool is None:
+                    return
+                _, _, job = heapq.heappop(self.deferred)
+                pool = self.pool
+            pool.submit(self._task, job)
+
+    def _release_shaping_slot(self, job: _BulkJob) -> None:
+        if job.shaping_slot:
+            self.anonymizer.traffic_shaper.release(self.anonymizer.get_circuit_key(job.circuit[1]))
+            job.shaping_slot = False
+
+    def _pace(self, job: _BulkJob) -> bool:
+        """
+        Non-blocking admission: True when the job may be fetched now,
+        otherwise it has been deferred or parked on the shaper. Raises
+        TimeoutError when the rate limit wait would overrun its deadline.
+        """
+        if job.circuit is None:
+            job.circuit = self.anonymizer.get_circuit_pool().acquire()
+        circuit_key = self.anonymizer.get_circuit_key(job.circuit[1])
+        if not job.delay_reserved:
+            job.delay_reserved = True
+            delay = self.anonymizer.reserve_artificial_delay(circuit_key, job.deadline)
+            if delay > 0:
+                self._defer(job, delay)
+                return False
+
+        shaper = self.anonymizer.traffic_shaper
+        if shaper is not None and not job.shaping_slot:
+            if not shaper.admit(circuit_key, on_free=lambda: self._defer(job, 0)):
+                return False
+            job.shaping_slot = True
+
+        wait = self.anonymizer.rate_limiter.acquire(job.url, circuit_key)
+        if wait <= 0:
+            return True
+        self._release_shaping_slot(job)
+        if not job.deadline.allows(wait):
+            self.anonymizer.record_request_metric('deadline_misses')
+            raise TimeoutError(f"Rate limit wait of {wait:.1f}s would exceed the deadline")
+        self.anonymizer.rate_limiter.record_wait(wait)
+        self._defer(job, wait)
+        return False
+
+    def _finish(self, job: _BulkJob, record: Dict[str, Any]) -> None:
+        try:
+            self._emit(self.writer, record)
+        finally:
+            self.slots.release()
+            with self.idle:
+                self.outstanding -= 1
+                self.idle.notify_all()
+
+    def _task(self, job: _BulkJob) -> None:
+        if self.journal and not job.started:
+            self.journal.mark_started(job.url)
+        job.started = True
+        try:
+            if not self._pace(job):
+                return
+            try:
+                record = self.fetch_one(job.url, circuit=job.circuit, deadline=job.deadline)
+            finally:
+                self._release_shaping_slot(job)
+            if (record.get('status') == 429 and job.throttle_retries > 0 and not job.deadline.expired()):
+                # The limiter already slowed the host down: the next _pace waits for its token
+                job.throttle_retries -= 1
+                job.delay_reserved = False
+                self._defer(job, 0)
+                return
+            if record.get('status') is None and job.retries > 0 and job.deadline.allows(1.0):
+                # No response at all: back off, then try the next pooled circuit
+                job.retries -= 1
+                job.circuit = None
+                job.delay_reserved = False
+                self._defer(job, 1.0)
+                return
+        except Exception as e:
+            self.logger.error(f"❌ Bulk task failed for {job.url}: {e}")
+            record = {'url': job.url, 'status': None, 'error': str(e)}
+        self._finish(job, record)
+
+    def run(self, urls: Iterator[str], writer) -> Dict[str, Any]:
+        """Consume `urls` lazily and hand results to `writer` as they complete"""
+        start = time.monotonic()
+        if self.journal:
+            writer.on_written = self._mark_journal
+        self.writer = writer
+        self.slots = threading.BoundedSemaphore(self.concurrency * 2)
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="BulkWorker")
+        deferrer = threading.Thread(target=self._release_deferred, daemon=True, name="BulkDeferrer")
+        deferrer.start()
+
+        try:
+            for url in urls:
+                if not self.anonymizer.is_running:
+                    self.logger.warning("⚠️ Anonymizer stopped, ending bulk run")
+                    break
+                # Before the dedup check: a skipped URL must not be left in in_flight
+                if self.journal and self.journal.is_done(url):
+                    self.stats['skipped'] += 1
+                    continue
+                if self.seen_filter is not None:
+                    with self.write_lock:
+                        duplicate = url in self.in_flight or url in self.seen_filter
+                        if not duplicate:
+                            self.in_flight.add(url)
+                    if duplicate:
+                        self.stats['duplicates'] += 1
+                        continue
+                self.slots.acquire()
+                with self.idle:
+                    self.outstanding += 1
+                job = _BulkJob(url, RequestDeadline(self.deadline), self.throttle_retries, self.retries)
+                self.pool.submit(self._task, job)
+            with self.idle:
+                while self.outstanding:
+                    self.idle.wait()
+        finally:
+            with self.deferred_ready:
+                pool, self.pool = self.pool, None
+                self.deferred_ready.notify()
+            deferrer.join()
+            pool.shutdown(wait=True)
+
+        writer.close()
+        elapsed = time.monotonic() - start
+        summary = dict(self.stats)
+        summary['writer'] = dict(writer.stats)
+        if self.content_store:
+            summary['content_store'] = dict(self.content_store.stats)
+        summary['elapsed'] = round(elapsed, 2)
+        summary['rate_per_min'] = round(summary['total'] / elapsed * 60, 1) if elapsed > 0 else 0
+        if self.journal:
+            self.journal.flush()
+            summary['journal'] = self.journal.get_summary()
+        return summary
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+CIRCUIT SESSION POOL
+Fixed set of sessions, each isolated on its own Tor circuit
+"""
+
+import random
+import threading
+import logging
+from typing import List, Tuple
+
+class CircuitSessionPool:
+    """
+    Round-robin pool of isolated sessions. Every slot uses distinct SOCKS
+    credentials, so Tor keeps its streams on a separate circuit
+    (IsolateSOCKSAuth); rotating a slot replaces its circuit without a
+    global NEWNYM.
+    """
+
+    def __init__(self, anonymizer, size: int = 4):
+        self.anonymizer = anonymizer
+        self.size = max(1, size)
+        self.slots: List[Tuple[str, object]] = []
+        self.next_slot = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('circuit_pool')
+
+    @staticmethod
+    def _new_key(index: int) -> str:
+        return f"pool{index}-{random.getrandbits(48):012x}"
+
+    def _ensure_slots(self) -> None:
+        while len(self.slots) < self.size:
+            key = self._new_key(len(self.slots))
+            self.slots.append((key, self.anonymizer.create_isolated_session(key)))
+
+    def acquire(self) -> Tuple[str, object]:
+        """Next (circuit_key, session) in round-robin order"""
+        with self.lock:
+            self._ensure_slots()
+            key, session = self.slots[self.next_slot % self.size]
+            self.next_slot += 1
+            return key, session
+
+    def rotate(self, key: str) -> None:
+        """Move one slot to a fresh circuit"""
+        with self.lock:
+            for index, (slot_key, session) in enumerate(self.slots):
+                if slot_key == key:
+                    new_key = self._new_key(index)
+                    # Not closed here: another worker may still be reading from it
+                    self.slots[index] = (new_key, self.anonymizer.create_isolated_session(new_key))
+                    self.anonymizer.release_identity(slot_key)
+                    self.logger.info(f"🔄 Pool slot {index} moved to a fresh circuit")
+                    return
+
+    def close(self) -> None:
+        with self.lock:
+            for _, session in self.slots:
+                try:
+                    session.close()
+                except Exception:
+                    pass
+            self.slots = []
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+COOKIE JARS
+Per-identity cookie jars with bounded, evicting storage and optional persistence
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from http.cookiejar import CookieJar
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable
+
+from requests.cookies import RequestsCookieJar, create_cookie
+
+COOKIE_FORMAT_VERSION = 1
+
+class BoundedCookieJar(RequestsCookieJar):
+    """
+    RequestsCookieJar holding at most `max_cookies` cookies. On overflow,
+    expired cookies are dropped first, then the least recently set ones.
+    Cookies larger than `max_cookie_bytes` (name + value) are refused, as
+    browsers do.
+    """
+
+    def __init__(self, policy=None, max_cookies: int = 300, max_cookie_bytes: int = 4096):
+        super().__init__(policy)
+        self.max_cookies = max_cookies
+        self.max_cookie_bytes = max_cookie_bytes
+        # (domain, path, name), least recently set first
+        self.recency: 'OrderedDict[tuple, None]' = OrderedDict()
+        self.evicted = 0
+        self.refused = 0
+
+    def set_cookie(self, cookie, *args, **kwargs):
+        if len(cookie.name) + len(cookie.value or '') > self.max_cookie_bytes:
+            self.refused += 1
+            return
+        with self._cookies_lock:
+            super().set_cookie(cookie, *args, **kwargs)
+            key = (cookie.domain, cookie.path, cookie.name)
+            self.recency[key] = None
+            self.recency.move_to_end(key)
+            if len(self.recency) > self.max_cookies:
+                self._evict()
+
+    def _present(self, key: tuple) -> bool:
+        domain, path, name = key
+        return name in self._cookies.get(domain, {}).get(path, {})
+
+    def _evict(self) -> None:
+        now = time.time()
+        for cookie in list(self):
+            if cookie.is_expired(now):
+                CookieJar.clear(self, cookie.domain, cookie.path, cookie.name)
+        # Cookies removed by the server or clear() leave stale recency entries
+        self.recency = OrderedDict((key, None) for key in self.recency if self._present(key))
+        while len(self.recency) > self.max_cookies:
+            domain, path, name = self.recency.popitem(last=False)[0]
+            CookieJar.clear(self, domain, path, name)
+            self.evicted += 1
+
+    def clear(self, domain=None, path=None, name=None):
+        with self._cookies_lock:
+            super().clear(domain, path, name)
+            if domain is None:
+                self.recency.clear()
+            else:
+                self.recency = OrderedDict((key, None) for key in self.recency if self._present(key))
+
+class CookieJarRegistry:
+    """
+    One BoundedCookieJar per isolation key (identity / circuit), so
+    sessions on different circuits never share cookies. At most `max_jars`
+    jars are tracked (least recently used dropped first); clear() empties a
+    jar in place so live sessions holding it are reset too.
+
+    With `path`, persistent cookies (those with an expiry) are saved as
+    compact tuples on save() and restored on creation; session cookies are
+    never written, as in a browser. Only jars of `persist_keys` are kept:
+    the other isolation keys are random per run, so no session would ever
+    use their jars again.
+    """
+
+    def __init__(self, max_jars: int = 1024, max_cookies: int = 300, max_cookie_bytes: int = 4096,
+                 path: Optional[str] = None, persist_keys: Iterable[str] = ('shared',)):
+        self.max_jars = max_jars
+        self.max_cookies = max_cookies
+        self.max_cookie_bytes = max_cookie_bytes
+        self.path = path
+        self.persist_keys = frozenset(persist_keys)
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('cookie_jars')
+        self.jars: 'OrderedDict[str, BoundedCookieJar]' = OrderedDict()
+        self.stats = {'created': 0, 'dropped': 0, 'cleared': 0, 'restored': 0}
+        if path and Path(path).exists():
+            try:
+                self.load(path)
+            except (ValueError, KeyError, IOError, json.JSONDecodeError) as e:
+                self.logger.warning(f"⚠️ Cookie jar load failed: {e}, starting empty")
+
+    def jar(self, key: str) -> BoundedCookieJar:
+        """Jar of one isolation key, created on first use"""
+        with self.lock:
+            jar = self.jars.get(key)
+            if jar is None:
+                jar = BoundedCookieJar(max_cookies=self.max_cookies, max_cookie_bytes=self.max_cookie_bytes)
+                self.jars[key] = jar
+                self.stats['created'] += 1
+                if len(self.jars) > self.max_jars:
+                    # A session may still hold the dropped jar; it goes when the session does
+                    self.jars.popitem(last=False)
+                    self.stats['dropped'] += 1
+            else:
+                self.jars.move_to_end(key)
+            return jar
+
+    def clear(self, key: Optional[str] = None) -> None:
+        """Empty one jar, or every jar (identity rotation)"""
+        with self.lock:
+            jars = list(self.jars.values()) if key is None else [self.jars.get(key)]
+        for jar in jars:
+            if jar is not None:
+                jar.clear()
+                self.stats['cleared'] += 1
+
+    def forget(self, key: str) -> None:
+        """Empty and stop tracking a jar whose circuit is retired"""
+        with self.lock:
+            jar = self.jars.pop(key, None)
+        if jar is not None:
+            jar.clear()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write persistent, unexpired cookies of the `persist_keys` jars"""
+        path = path or self.path
+        if not path:
+            return
+        now = time.time()
+        with self.lock:
+            jars = [(key, jar) for key, jar in self.jars.items() if key in self.persist_keys]
+        data = {}
+        for key, jar in jars:
+            with jar._cookies_lock:
+                cookies = [
+                    [c.domain, c.path, c.name, c.value, c.expires, c.secure, c.has_nonstandard_attr('HttpOnly')]
+                    for c in jar if c.expires is not None and c.expires > now
+                ]
+            if cookies:
+                data[key] = cookies
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': COOKIE_FORMAT_VERSION, 'jars': data}, f, separators=(',', ':'))
+        Path(tmp).replace(path)
+        self.logger.info(f"💾 Saved cookies of {len(data)} identities to {path}")
+
+    def load(self, path: str) -> None:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != COOKIE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported cookie jar version in {path}: {data.get('version')}")
+        now = time.time()
+        for key, cookies in data['jars'].items():
+            if key not in self.persist_keys:
+                continue  # Written by an older version; no session will ask for it
+            jar = self.jar(key)
+            for domain, path_, name, value, expires, secure, http_only in cookies:
+                if expires > now:
+                    jar.set_cookie(create_cookie(name, value, domain=domain, path=path_, expires=expires,
+                                                 secure=secure, rest={'HttpOnly': None} if http_only else {}))
+                    self.stats['restored'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            jars = list(self.jars.values())
+            stats = dict(self.stats)
+        stats['jars'] = len(jars)
+        stats['cookies'] = sum(len(jar) for jar in jars)
+        stats['evicted'] = sum(jar.evicted for jar in jars)
+        stats['refused'] = sum(jar.refused for jar in jars)
+        return stats
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+COVER TRAFFIC ENGINE
+Budgeted, low-cost cover requests on dedicated circuits that yield to real traffic
+"""
+
+import time
+import random
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+from rate_limiter import TokenBucket
+
+DEFAULT_SITES = [
+    "https://www.wikipedia.org",
+    "https://github.com",
+    "https://stackoverflow.com",
+    "https://news.ycombinator.com",
+    "https://www.reddit.com",
+    "https://www.nytimes.com",
+    "https://www.bbc.com",
+    "https://www.cnn.com"
+]
+
+# Rough cost of request + response headers, charged for every cover request
+HEADER_OVERHEAD = 1024
+
+class CoverTrafficEngine:
+    """
+    Cover traffic under an explicit budget.
+
+    Requests are spaced by a Poisson process at `requests_per_min` and
+    must also fit a `bytes_per_sec` token bucket. Each one is a HEAD or a
+    Range request for the first `range_bytes` (the body is cut off there
+    even if the server ignores Range), so a cover fetch costs kilobytes,
+    not a whole homepage. Fetches run on the engine's own isolated
+    circuits, never on the user session.
+
+    The engine yields: a slot is skipped while real requests are recent or
+    queued. set_budget() retunes it at runtime, and a zero budget stops all
+    cover traffic.
+    """
+
+    DEFAULT_CONFIG = {
+        "requests_per_min": 1.0,
+        "bytes_per_sec": 1024,
+        "mode": "range",  # "range" or "head"
+        "range_bytes": 16384,
+        "circuits": 2,
+        "yield_window": 2.0,  # Seconds after a real request during which cover traffic holds off
+        "yield_queue_depth": 1,  # Executor backlog at which cover traffic holds off
+        "sites": DEFAULT_SITES
+    }
+
+    def __init__(self, anonymizer, config: Optional[Dict[str, Any]] = None):
+        self.anonymizer = anonymizer
+        self.config = {**self.DEFAULT_CONFIG, **(config or {})}
+        self.logger = logging.getLogger('cover_traffic')
+        self.lock = threading.Lock()
+        self.sessions: List = []
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.started = None
+        self.stats = {'requests': 0, 'bytes': 0, 'errors': 0, 'yielded': 0, 'over_budget': 0}
+        self.set_budget(self.config['requests_per_min'], self.config['bytes_per_sec'])
+
+    def set_budget(self, requests_per_min: float, bytes_per_sec: float) -> None:
+        """Retune the budget; either value at 0 disables cover traffic"""
+        with self.lock:
+            self.requests_per_min = max(0.0, requests_per_min)
+            self.bytes_per_sec = max(0.0, bytes_per_sec)
+            self.byte_bucket = None
+            if self.bytes_per_sec > 0:
+                # Burst of one full cover fetch so a single request is always affordable
+                self.byte_bucket = TokenBucket(self.bytes_per_sec, self._request_cost())
+        self.logger.info(f"🌫️ Cover traffic budget: {self.requests_per_min}/min, {self.bytes_per_sec} B/s")
+
+    def _request_cost(self) -> int:
+        if self.config['mode'] == 'head':
+            return HEADER_OVERHEAD
+        return HEADER_OVERHEAD + self.config['range_bytes']
+
+    def _session(self):
+        if not self.sessions:
+            for index in range(max(1, self.config['circuits'])):
+                key = f"cover{index}-{random.getrandbits(48):012x}"
+                self.sessions.append(self.anonymizer.create_isolated_session(key))
+        return random.choice(self.sessions)
+
+    def _should_yield(self) -> bool:
+        """True while real traffic is active or waiting"""
+        last_real = self.anonymizer.last_real_request
+        if last_real and time.monotonic() - last_real < self.config['yield_window']:
+            return True
+        executor = self.anonymizer.request_executor
+        return executor is not None and executor.queue.qsize() >= self.config['yield_queue_depth']
+
+    def _take_budget(self) -> bool:
+        with self.lock:
+            if self.requests_per_min <= 0 or self.byte_bucket is None:
+                return False
+            now = time.monotonic()
+            cost = self._request_cost()
+            if self.byte_bucket.wait_time(now, cost) > 0:
+                return False
+            self.byte_bucket.take(cost)
+            return True
+
+    def fetch_once(self) -> int:
+        """One cover request; returns the bytes it cost"""
+        site = random.choice(self.config['sites'])
+        session = self._session()
+        # Same per-session pacing / traffic pattern as real requests
+        delay = self.anonymizer.reserve_artificial_delay(self.anonymizer.get_circuit_key(session))
+        if delay > 0 and self.stop_event.wait(delay):
+            return 0
+        used = HEADER_OVERHEAD
+        if self.config['mode'] == 'head':
+            response = self.anonymizer.adaptive_request('dummy', site, session=session, method='HEAD',
+                                                        allow_redirects=False)
+            response.close()
+        else:
+            limit = self.config['range_bytes']
+            response = self.anonymizer.adaptive_request(
+                'dummy', site, session=session, stream=True,
+                headers={'Range': f"bytes=0-{limit - 1}"}
+            )
+            try:
+                for chunk in response.iter_content(chunk_size=min(limit, 16384)):
+                    used += len(chunk)
+                    if used - HEADER_OVERHEAD >= limit:
+                        break
+            finally:
+                response.close()
+        self.logger.debug(f"🌫️ Cover request to {site.split('//')[1]} ({response.status_code}, {used} B)")
+        return used
+
+    def _run(self) -> None:
+        self.logger.info("🚀 Cover traffic engine started")
+        while not self.stop_event.is_set() and self.anonymizer.is_running:
+            rate = self.requests_per_min
+            # Idle budget: poll for retuning instead of spinning
+            pause = random.expovariate(rate / 60.0) if rate > 0 else 5.0
+            if self.stop_event.wait(pause):
+                break
+            if rate <= 0:
+                continue
+            if self._should_yield():
+                self.stats['yielded'] += 1
+                continue
+            if not self._take_budget():
+                self.stats['over_budget'] += 1
+                continue
+            try:
+                used = self.fetch_once()
+                with self.lock:
+                    self.stats['requests'] += 1
+                    self.stats['bytes'] += used
+            except Exception as e:
+                with self.lock:
+                    self.stats['errors'] += 1
+                    self.stats['bytes'] += HEADER_OVERHEAD
+                self.logger.debug(f"⚠️ Cover request failed: {e}")
+
+    def start(self) -> None:
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="CoverTraffic")
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+        for session in self.sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+        self.sessions = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Actual overhead since start"""
+        with self.lock:
+            stats = dict(self.stats)
+        elapsed = time.monotonic() - self.started if self.started else 0
+        stats['bytes_per_sec'] = round(stats['bytes'] / elapsed, 1) if elapsed > 0 else 0.0
+        stats['requests_per_min'] = round(stats['requests'] / elapsed * 60, 2) if elapsed > 0 else 0.0
+        stats['budget'] = {'requests_per_min': self.requests_per_min, 'bytes_per_sec': self.bytes_per_sec}
+        return stats
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+DELAY SCHEDULER
+Per-session artificial inter-request delays, reserved ahead instead of slept in place
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional
+
+class _SessionClock:
+    __slots__ = ('next_at', 'requests')
+
+    def __init__(self, now: float):
+        self.next_at = now
+        self.requests = 0
+
+class DelayScheduler:
+    """
+    Spaces the requests of each logical session (one circuit identity) by
+    a delay drawn from `sampler`, normally
+    AdvancedCircuitRouting.generate_artificial_delays.
+
+    reserve() never sleeps. It books the session's next send slot and
+    returns how long the caller must wait for it, so concurrent requests of
+    one session get consecutive slots while other sessions are not affected
+    at all. The sync request path sleeps for the returned time; the
+    executor parks the job on its timer heap and keeps its worker busy.
+
+    With a `shaper` (traffic_shaper.TrafficShaper) the gaps come from the
+    session's traffic pattern instead, and real and cover traffic share
+    the same per-session schedule.
+    """
+
+    def __init__(self, sampler: Callable[[], float], enabled: bool = True, max_sessions: int = 10000,
+                 shaper=None):
+        self.sampler = sampler
+        self.shaper = shaper
+        self.enabled = enabled or shaper is not None
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('delay_scheduler')
+        self.sessions: 'OrderedDict[str, _SessionClock]' = OrderedDict()
+        self.stats = {'reserved': 0, 'delayed': 0, 'delay_seconds': 0.0, 'max_delay': 0.0, 'truncated': 0}
+
+    def reserve(self, session_key: str, max_wait: Optional[float] = None) -> float:
+        """
+        Book the next slot for `session_key` and return the seconds until it.
+        With `max_wait` (e.g. the time left before a deadline) the slot is
+        pulled in to fit, and the truncation is counted.
+        """
+        if not self.enabled:
+            return 0.0
+        gap = self.shaper.next_gap(session_key) if self.shaper else self.sampler()
+        with self.lock:
+            now = time.monotonic()
+            clock = self.sessions.get(session_key)
+            if clock is None:
+                clock = _SessionClock(now)
+                self.sessions[session_key] = clock
+                if len(self.sessions) > self.max_sessions:
+                    self.sessions.popitem(last=False)
+            else:
+                self.sessions.move_to_end(session_key)
+            slot = max(now, clock.next_at)
+            if max_wait is not None and slot - now > max_wait:
+                slot = now + max(0.0, max_wait)
+                self.stats['truncated'] += 1
+            # The gap applies between this request and the session's next one;
+            # a truncated slot never pulls in slots already handed out
+            clock.next_at = max(clock.next_at, slot + gap)
+            clock.requests += 1
+            wait = slot - now
+            self.stats['reserved'] += 1
+            if wait > 0:
+                self.stats['delayed'] += 1
+                self.stats['delay_seconds'] += wait
+                self.stats['max_delay'] = max(self.stats['max_delay'], wait)
+        return wait
+
+    def forget(self, session_key: str) -> None:
+        """Drop a session's clock, e.g. after its circuit is rotated"""
+        with self.lock:
+            self.sessions.pop(session_key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats['sessions'] = len(self.sessions)
+        stats['avg_delay'] = round(stats['delay_seconds'] / stats['delayed'], 3) if stats['delayed'] else 0.0
+        return stats
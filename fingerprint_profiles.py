@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+FINGERPRINT PROFILES
+Precomputed, internally consistent browser profiles with O(1) weighted selection
+"""
+
+import re
+import json
+import importlib.util
+import random
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence
+
+# Vectorized bulk generation is optional
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# urllib3 decodes Brotli only when one of these is installed; never advertise
+# an encoding the client would hand back undecoded
+BROTLI_AVAILABLE = any(importlib.util.find_spec(name) for name in ('brotli', 'brotlicffi'))
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate'
+
+PROFILE_FORMAT_VERSION = 1
+
+# Browser / OS combinations and their approximate desktop share
+BROWSERS = [
+    {'name': 'chrome_windows', 'family': 'chrome', 'os': 'windows', 'weight': 0.40},
+    {'name': 'edge_windows', 'family': 'edge', 'os': 'windows', 'weight': 0.10},
+    {'name': 'firefox_windows', 'family': 'firefox', 'os': 'windows', 'weight': 0.12},
+    {'name': 'chrome_macos', 'family': 'chrome', 'os': 'macos', 'weight': 0.12},
+    {'name': 'safari_macos', 'family': 'safari', 'os': 'macos', 'weight': 0.08},
+    {'name': 'firefox_macos', 'family': 'firefox', 'os': 'macos', 'weight': 0.04},
+    {'name': 'chrome_linux', 'family': 'chrome', 'os': 'linux', 'weight': 0.06},
+    {'name': 'firefox_linux', 'family': 'firefox', 'os': 'linux', 'weight': 0.08}
+]
+
+BROWSERS_BY_NAME = {b['name']: b for b in BROWSERS}
+
+# Major versions per family with their share inside the family
+VERSIONS = {
+    'chrome': [('130', 0.35), ('129', 0.30), ('128', 0.20), ('127', 0.15)],
+    'edge': [('130', 0.45), ('129', 0.35), ('128', 0.20)],
+    'firefox': [('131', 0.40), ('130', 0.30), ('128', 0.30)],
+    'safari': [('18.0', 0.50), ('17.6', 0.50)]
+}
+
+OS_TRAITS = {
+    'windows': {
+        'ua_os': 'Windows NT 10.0; Win64; x64',
+        'firefox_ua_os': 'Windows NT 10.0; Win64; x64',
+        'ch_platform': '"Windows"',
+        'navigator_platform': 'Win32',
+        'screens': [((1920, 1080, 24), 0.45), ((1366, 768, 24), 0.15), ((1536, 864, 24), 0.15),
+                    ((2560, 1440, 24), 0.15), ((1440, 900, 24), 0.10)],
+        'cores': [(4, 0.25), (8, 0.40), (12, 0.15), (16, 0.20)],
+        'gpus': [
+            ('Intel', 'ANGLE (Intel, Intel(R) UHD Graphics 630 (0x00003E9B) Direct3D11 vs_5_0 ps_5_0, D3D11)', 0.45),
+            ('NVIDIA', 'ANGLE (NVIDIA, NVIDIA GeForce RTX 3060 (0x00002504) Direct3D11 vs_5_0 ps_5_0, D3D11)', 0.35),
+            ('AMD', 'ANGLE (AMD, AMD Radeon RX 6600 (0x000073FF) Direct3D11 vs_5_0 ps_5_0, D3D11)', 0.20)
+        ]
+    },
+    'macos': {
+        'ua_os': 'Macintosh; Intel Mac OS X 10_15_7',
+        'firefox_ua_os': 'Macintosh; Intel Mac OS X 10.15',
+        'ch_platform': '"macOS"',
+        'navigator_platform': 'MacIntel',
+        'screens': [((1440, 900, 30), 0.30), ((1512, 982, 30), 0.30), ((1728, 1117, 30), 0.20),
+                    ((2560, 1440, 30), 0.20)],
+        'cores': [(8, 0.60), (10, 0.25), (12, 0.15)],
+        'gpus': [
+            ('Apple', 'ANGLE (Apple, ANGLE Metal Renderer: Apple M1, Unspecified Version)', 0.50),
+            ('Apple', 'ANGLE (Apple, ANGLE Metal Renderer: Apple M2, Unspecified Version)', 0.50)
+        ]
+    },
+    'linux': {
+        'ua_os': 'X11; Linux x86_64',
+        'firefox_ua_os': 'X11; Linux x86_64',
+        'ch_platform': '"Linux"',
+        'navigator_platform': 'Linux x86_64',
+        'screens': [((1920, 1080, 24), 0.60), ((2560, 1440, 24), 0.25), ((1366, 768, 24), 0.15)],
+        'cores': [(4, 0.30), (8, 0.45), (16, 0.25)],
+        'gpus': [
+            ('Intel', 'ANGLE (Intel, Mesa Intel(R) UHD Graphics 620 (KBL GT2), OpenGL 4.6)', 0.60),
+            ('AMD', 'ANGLE (AMD, AMD Radeon RX 580 (radeonsi, polaris10, LLVM 15.0.7), OpenGL 4.6)', 0.40)
+        ]
+    }
+}
+
+# Locale, timezones consistent with it, share
+LOCALES = [
+    ('en-US', ['America/New_York', 'America/Chicago', 'America/Denver', 'America/Los_Angeles'], 0.45),
+    ('en-GB', ['Europe/London'], 0.10),
+    ('de-DE', ['Europe/Berlin'], 0.10),
+    ('fr-FR', ['Europe/Paris'], 0.08),
+    ('es-ES', ['Europe/Madrid'], 0.06),
+    ('ja-JP', ['Asia/Tokyo'], 0.05),
+    ('en-CA', ['America/Toronto'], 0.05),
+    ('it-IT', ['Europe/Rome'], 0.04),
+    ('nl-NL', ['Europe/Amsterdam'], 0.04),
+    ('en-AU', ['Australia/Sydney'], 0.03)
+]
+
+ACCEPT = {
+    'chrome': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'edge': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'firefox': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'safari': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+}
+
+class AliasSampler:
+    """Vose's alias method: O(n) setup, O(1) weighted draws"""
+
+    def __init__(self, weights: Sequence[float]):
+        count = len(weights)
+        if count == 0:
+            raise ValueError("AliasSampler needs at least one weight")
+        total = float(sum(weights))
+        scaled = [w * count / total for w in weights]
+        self.prob = [0.0] * count
+        self.alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        for index in small + large:
+            self.prob[index] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(self, rng: random.Random = random) -> int:
+        index = int(rng.random() * len(self.prob))
+        return index if rng.random() < self.prob[index] else self.alias[index]
+
+def _weighted(rng: random.Random, options: List[tuple]):
+    """Pick the value from a list of (value, weight) pairs"""
+    return rng.choices(options, weights=[o[1] for o in options])[0][0]
+
+def accept_language(family: str, locale: str) -> str:
+    """Accept-Language exactly as each browser family formats it"""
+    language = locale.split('-')[0]
+    if family == 'firefox':
+        if language == 'en':
+            return f"{locale},en;q=0.5"
+        return f"{locale},{language};q=0.8,en-US;q=0.5,en;q=0.3"
+    if language == 'en':
+        return f"{locale},en;q=0.9"
+    return f"{locale},{language};q=0.9,en-US;q=0.8,en;q=0.7"
+
+def build_user_agent(family: str, os_name: str, version: str) -> str:
+    traits = OS_TRAITS[os_name]
+    if family == 'firefox':
+        return f"Mozilla/5.0 ({traits['firefox_ua_os']}; rv:{version}.0) Gecko/20100101 Firefox/{version}.0"
+    if family == 'safari':
+        return (f"Mozilla/5.0 ({traits['ua_os']}) AppleWebKit/605.1.15 "
+                f"(KHTML, like Gecko) Version/{version} Safari/605.1.15")
+    user_agent = f"Mozilla/5.0 ({traits['ua_os']}) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version}.0.0.0 Safari/537.36"
+    if family == 'edge':
+        user_agent += f" Edg/{version}.0.0.0"
+    return user_agent
+
+def build_sec_ch_ua(family: str, version: str) -> Optional[str]:
+    """Client hints exist only on Chromium browsers"""
+    if family == 'chrome':
+        return f'"Chromium";v="{version}", "Google Chrome";v="{version}", "Not?A_Brand";v="99"'
+    if family == 'edge':
+        return f'"Chromium";v="{version}", "Microsoft Edge";v="{version}", "Not?A_Brand";v="99"'
+    return None
+
+# Navigation request header order of each browser over HTTP/1.1. Host is
+# always sent first by the HTTP client; Cookie is appended when present.
+HEADER_ORDER = {
+    'chrome': ['Connection', 'sec-ch-ua', 'sec-ch-ua-mobile', 'sec-ch-ua-platform', 'Upgrade-Insecure-Requests',
+               'User-Agent', 'Accept', 'Sec-Fetch-Site', 'Sec-Fetch-Mode', 'Sec-Fetch-User', 'Sec-Fetch-Dest',
+               'Accept-Encoding', 'Accept-Language'],
+    'firefox': ['User-Agent', 'Accept', 'Accept-Language', 'Accept-Encoding', 'Connection',
+                'Upgrade-Insecure-Requests', 'Sec-Fetch-Dest', 'Sec-Fetch-Mode', 'Sec-Fetch-Site', 'Sec-Fetch-User',
+                'Priority'],
+    'safari': ['Accept', 'Sec-Fetch-Site', 'Sec-Fetch-Dest', 'Accept-Language', 'Sec-Fetch-Mode', 'User-Agent',
+               'Accept-Encoding', 'Connection', 'Upgrade-Insecure-Requests']
+}
+HEADER_ORDER['edge'] = HEADER_ORDER['chrome']
+
+_HEADER_NAME = re.compile(r"^[!#$%&'*+\-.^_`|~0-9A-Za-z]+$")
+
+class HeaderTemplate(Mapping):
+    """
+    Immutable, ordered header set. Names and values are validated once
+    here, so a template can be installed as a session's headers as is and
+    shared by every session pinned to the same profile. Lookups are
+    case-insensitive.
+    """
+
+    __slots__ = ('pairs', '_index')
+
+    def __init__(self, pairs):
+        pairs = tuple((str(name), str(value)) for name, value in pairs)
+        for name, value in pairs:
+            if not _HEADER_NAME.match(name) or '\r' in value or '\n' in value or value != value.strip():
+                raise ValueError(f"Invalid header {name!r}: {value!r}")
+        self.pairs = pairs
+        self._index = {name.lower(): value for name, value in pairs}
+
+    def __getitem__(self, name: str) -> str:
+        return self._index[name.lower()]
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and name.lower() in self._index
+
+    def __iter__(self):
+        return (name for name, _ in self.pairs)
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def __repr__(self) -> str:
+        return f"HeaderTemplate({dict(self.pairs)!r})"
+
+def build_headers(profile: Dict[str, Any]) -> HeaderTemplate:
+    """Navigation request headers implied by a profile, in its browser's order"""
+    family = profile['family']
+    values = {
+        'User-Agent': profile['user_agent'],
+        'Accept': ACCEPT[family],
+        'Accept-Language': profile['accept_language'],
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Priority': 'u=0, i'
+    }
+    if profile.get('sec_ch_ua'):
+        values['sec-ch-ua'] = profile['sec_ch_ua']
+        values['sec-ch-ua-mobile'] = '?0'
+        values['sec-ch-ua-platform'] = profile['sec_ch_ua_platform']
+    return HeaderTemplate((name, values[name]) for name in HEADER_ORDER[family] if name in values)
+
+def assemble_profile(browser: Dict[str, Any], version: str, locale: str, timezone: str,
+                     screen: Sequence[int], cores: int, gpu: Sequence[str], device_memory: Optional[int]) -> Dict[str, Any]:
+    """Profile dict from already drawn attributes; everything else is derived from them"""
+    family, os_name = browser['family'], browser['os']
+    traits = OS_TRAITS[os_name]
+    if family == 'firefox':
+        webgl_vendor = 'Mozilla'
+    elif family == 'safari':
+        webgl_vendor = 'Apple Inc.'
+    else:
+        webgl_vendor = f"Google Inc. ({gpu[0]})"
+    chromium = family in ('chrome', 'edge')
+    width, height, depth = screen
+    return {
+        'browser': browser['name'],
+        'family': family,
+        'os': os_name,
+        'version': version,
+        'user_agent': build_user_agent(family, os_name, version),
+        'sec_ch_ua': build_sec_ch_ua(family, version),
+        'sec_ch_ua_platform': traits['ch_platform'] if chromium else None,
+        'navigator_platform': traits['navigator_platform'],
+        'language': locale,
+        'accept_language': accept_language(family, locale),
+        'timezone': timezone,
+        'screen': {'width': width, 'height': height, 'depth': depth},
+        'hardware_concurrency': cores,
+        'device_memory': device_memory,
+        'webgl_vendor': webgl_vendor,
+        'webgl_renderer': gpu[1],
+        'weight': 1.0
+    }
+
+def generate_profile(rng: random.Random, browser: Dict[str, Any]) -> Dict[str, Any]:
+    """One coherent profile for `browser`: every attribute is drawn from tables consistent with it"""
+    traits = OS_TRAITS[browser['os']]
+    locale, timezones, _ = rng.choices(LOCALES, weights=[l[2] for l in LOCALES])[0]
+    gpu = rng.choices(traits['gpus'], weights=[g[2] for g in traits['gpus']])[0]
+    # navigator.deviceMemory exists only in Chromium, capped at 8
+    chromium = browser['family'] in ('chrome', 'edge')
+    return assemble_profile(
+        browser,
+        version=_weighted(rng, VERSIONS[browser['family']]),
+        locale=locale,
+        timezone=rng.choice(timezones),
+        screen=_weighted(rng, traits['screens']),
+        cores=_weighted(rng, traits['cores']),
+        gpu=gpu[:2],
+        device_memory=rng.choice([4, 8]) if chromium else None
+    )
+
+def _column_specs() -> List[tuple]:
+    """
+    Columns in draw order as (name, parent column, {parent value: [(value, weight)]}).
+    Conditioning on the parent is what keeps rows coherent: versions, screens,
+    cores, GPUs and device memory depend on the browser, timezones on the locale.
+    """
+    per_browser = lambda table: {b['name']: table(b) for b in BROWSERS}
+    return [
+        ('browser', None, {None: [(b['name'], b['weight']) for b in BROWSERS]}),
+        ('locale', None, {None: [(locale, weight) for locale, _, weight in LOCALES]}),
+        ('version', 'browser', per_browser(lambda b: VERSIONS[b['family']])),
+        ('timezone', 'locale', {locale: [(tz, 1.0) for tz in timezones] for locale, timezones, _ in LOCALES}),
+        ('screen', 'browser', per_browser(lambda b: OS_TRAITS[b['os']]['screens'])),
+        ('cores', 'browser', per_browser(lambda b: OS_TRAITS[b['os']]['cores'])),
+        ('gpu', 'browser', per_browser(lambda b: [((v, r), w) for v, r, w in OS_TRAITS[b['os']]['gpus']])),
+        ('device_memory', 'browser', per_browser(
+            lambda b: [(4, 0.5), (8, 0.5)] if b['family'] in ('chrome', 'edge') else [(None, 1.0)]))
+    ]
+
+def _compile_specs():
+    """
+    Replace values with integer codes: one vocabulary per column, and per
+    parent code the candidate codes with their cumulative weights.
+    """
+    vocab, tables = {}, {}
+    for name, parent, groups in _column_specs():
+        values, index = [], {}
+        compiled = {}
+        for parent_value, options in groups.items():
+            codes = []
+            for value, _ in options:
+                if value not in index:
+                    index[value] = len(values)
+                    values.append(value)
+                codes.append(index[value])
+            total, cumulative = 0.0, []
+            for _, weight in options:
+                total += weight
+                cumulative.append(total)
+            parent_code = None if parent is None else vocab[parent].index(parent_value)
+            compiled[parent_code] = (codes, cumulative)
+        vocab[name] = values
+        tables[name] = (parent, compiled)
+    return vocab, tables
+
+def _numpy_column(rng, parent_codes, compiled, size):
+    dtype = numpy.uint8 if max(max(codes) for codes, _ in compiled.values()) < 256 else numpy.uint16
+    column = numpy.zeros(size, dtype=dtype)
+    for parent_code, (codes, cumulative) in compiled.items():
+        rows = slice(None) if parent_code is None else numpy.flatnonzero(parent_codes == parent_code)
+        count = size if parent_code is None else len(rows)
+        if count:
+            thresholds = numpy.asarray(cumulative) / cumulative[-1]
+            # Inverse CDF on uniforms; clip guards the last bucket against rounding
+            picks = numpy.minimum(numpy.searchsorted(thresholds, rng.random(count), side='right'), len(codes) - 1)
+            column[rows] = numpy.asarray(codes, dtype=dtype)[picks]
+    return column
+
+def _python_column(rng, parent_codes, compiled, size):
+    typecode = 'B' if max(max(codes) for codes, _ in compiled.values()) < 256 else 'H'
+    if None in compiled:
+        codes, cumulative = compiled[None]
+        return array(typecode, rng.choices(codes, cum_weights=cumulative, k=size))
+    column = array(typecode, [0]) * size
+    rows_by_parent: Dict[int, List[int]] = {}
+    for row, parent_code in enumerate(parent_codes):
+        rows_by_parent.setdefault(parent_code, []).append(row)
+    for parent_code, rows in rows_by_parent.items():
+        codes, cumulative = compiled[parent_code]
+        for row, code in zip(rows, rng.choices(codes, cum_weights=cumulative, k=len(rows))):
+            column[row] = code
+    return column
+
+class ProfileColumns:
+    """
+    Profiles in columnar form: one small-integer code column per drawn
+    attribute (one byte per attribute per profile) plus the vocabularies
+    the codes index. Derived fields (UA, client hints, Accept-Language,
+    WebGL vendor) are rebuilt only when a row is materialized.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence[int]], vocab: Dict[str, List[Any]]):
+        self.columns = columns
+        self.vocab = vocab
+        self.size = len(columns['browser'])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def profile(self, row: int) -> Dict[str, Any]:
+        """Materialize one row as a regular profile dict"""
+        value = lambda name: self.vocab[name][int(self.columns[name][row])]
+        profile = assemble_profile(
+            BROWSERS_BY_NAME[value('browser')], version=value('version'), locale=value('locale'),
+            timezone=value('timezone'), screen=value('screen'), cores=value('cores'),
+            gpu=value('gpu'), device_memory=value('device_memory')
+        )
+        profile['id'] = row
+        return profile
+
+    def to_pool(self, limit: Optional[int] = None) -> 'ProfilePool':
+        return ProfilePool([self.profile(row) for row in range(min(self.size, limit or self.size))])
+
+    def counts(self, name: str) -> Dict[Any, int]:
+        """Value frequencies of one column"""
+        if NUMPY_AVAILABLE and isinstance(self.columns[name], numpy.ndarray):
+            tally = numpy.bincount(self.columns[name], minlength=len(self.vocab[name]))
+        else:
+            tally = [0] * len(self.vocab[name])
+            for code in self.columns[name]:
+                tally[code] += 1
+        return {str(self.vocab[name][code]): int(n) for code, n in enumerate(tally)}
+
+    def save(self, path: str) -> None:
+        """`.npz` (requires numpy) or JSON columns, chosen by extension"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        meta = {'version': PROFILE_FORMAT_VERSION, 'format': 'columns', 'size': self.size, 'vocab': self.vocab}
+        if str(path).endswith('.npz'):
+            if not NUMPY_AVAILABLE:
+                raise ImportError(".npz output requires numpy: pip install numpy")
+            arrays = {name: numpy.asarray(column) for name, column in self.columns.items()}
+            numpy.savez_compressed(path, meta=numpy.array(json.dumps(meta)), **arrays)
+            return
+        meta['columns'] = {name: [int(code) for code in column] for name, column in self.columns.items()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> 'ProfileColumns':
+        if str(path).endswith('.npz'):
+            if not NUMPY_AVAILABLE:
+                raise ImportError(".npz input requires numpy: pip install numpy")
+            with numpy.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                columns = {name: data[name] for name in data.files if name != 'meta'}
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            columns = {name: array('H', column) for name, column in meta['columns'].items()}
+        if meta.get('version') != PROFILE_FORMAT_VERSION or meta.get('format') != 'columns':
+            raise ValueError(f"Unsupported profile columns in {path}: {meta.get('version')}")
+        return cls(columns, meta['vocab'])
+
+def generate_columns(size: int, seed: Optional[int] = None, use_numpy: Optional[bool] = None) -> ProfileColumns:
+    """
+    Draw `size` coherent profiles in one pass per column, each conditional
+    column sampled group by group over its parent's codes. Uses numpy when
+    available (or `use_numpy=True`), else random.choices with cumulative
+    weights.
+    """
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    if use_numpy and not NUMPY_AVAILABLE:
+        raise ImportError("Vectorized generation requires numpy: pip install numpy")
+    vocab, tables = _compile_specs()
+    rng = numpy.random.default_rng(seed) if use_numpy else random.Random(seed)
+    sample = _numpy_column if use_numpy else _python_column
+    columns = {}
+    for name, (parent, compiled) in tables.items():
+        columns[name] = sample(rng, columns.get(parent), compiled, size)
+    return ProfileColumns(columns, vocab)
+
+class ProfilePool:
+    """
+    Fixed set of profiles, drawn by weight through an alias table. Profiles
+    are plain dicts; their header templates are built once when the pool is
+    created or loaded.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]]):
+        if not profiles:
+            raise ValueError("Profile pool is empty")
+        self.profiles = profiles
+        for index, profile in enumerate(profiles):
+            profile.setdefault('id', index)
+            profile.setdefault('weight', 1.0)
+            profile['headers'] = build_headers(profile)
+        self.sampler = AliasSampler([p['weight'] for p in profiles])
+
+    @classmethod
+    def generate(cls, size: int = 256, seed: Optional[int] = None) -> 'ProfilePool':
+        """Sample `size` profiles following the browser share table"""
+        rng = random.Random(seed)
+        browsers = AliasSampler([b['weight'] for b in BROWSERS])
+        return cls([generate_profile(rng, BROWSERS[browsers.sample(rng)]) for _ in range(size)])
+
+    @classmethod
+    def load(cls, path: str) -> 'ProfilePool':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != PROFILE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported profile pool version in {path}: {data.get('version')}")
+        return cls(data['profiles'])
+
+    def save(self, path: str) -> None:
+        """Write the pool as JSON (headers are derived, so not stored)"""
+        profiles = [{k: v for k, v in p.items() if k != 'headers'} for p in self.profiles]
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PROFILE_FORMAT_VERSION, 'profiles': profiles}, f, ensure_ascii=False)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def pick(self, rng: random.Random = random) -> Dict[str, Any]:
+        return self.profiles[self.sampler.sample(rng)]
+
+def benchmark_headers(iterations: int = 100000) -> None:
+    """Per-request header cost in the requests hot path: frozen session template vs per-request merging"""
+    import time
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    profile = ProfilePool.generate(16, seed=0).profiles[0]
+    template = profile['headers']
+    request = requests.Request('GET', 'https://example.com/')
+
+    def timed(label, call):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            result = call()
+        print(f"📨 {label:34} {(time.perf_counter() - start) / iterations * 1e6:7.2f}µs")
+        return result
+
+    # Header steps of Session.prepare_request in isolation, then the whole call for scale
+    prepared = requests.PreparedRequest()
+    defaults = requests.utils.default_headers()
+    timed('session setup, dict merged', lambda: CaseInsensitiveDict(defaults).update(dict(build_headers(profile))))
+    timed('session setup, template', lambda: CaseInsensitiveDict(template))
+    merged = requests.Session()
+    extra = dict(template)
+    timed('headers, merged per request', lambda: prepared.prepare_headers(
+        requests.sessions.merge_setting(extra, merged.headers, dict_class=CaseInsensitiveDict)))
+    session = requests.Session()
+    session.headers = CaseInsensitiveDict(template)
+    timed('headers, session template', lambda: prepared.prepare_headers(
+        requests.sessions.merge_setting(None, session.headers, dict_class=CaseInsensitiveDict)))
+    prepared = timed('whole prepare_request, template', lambda: session.prepare_request(request))
+    print(f"🧾 {profile['browser']} order: {', '.join(prepared.headers)}")
+
+def main():
+    """Benchmark bulk generation against the per-profile path"""
+    import time
+    import argparse
+    parser = argparse.ArgumentParser(description='Fingerprint profile generation benchmark')
+    parser.add_argument('--count', type=int, nargs='+', default=[100000, 1000000], help='Profiles per run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pure-python', action='store_true', help='Skip numpy even if installed')
+    parser.add_argument('--output', help='Save the last run (.npz or .json columns)')
+    parser.add_argument('--headers', action='store_true', help='Benchmark per-request header overhead instead')
+    args = parser.parse_args()
+
+    if args.headers:
+        benchmark_headers()
+        return
+
+    use_numpy = NUMPY_AVAILABLE and not args.pure_python
+    rng = random.Random(args.seed)
+    browsers = AliasSampler([b['weight'] for b in BROWSERS])
+    baseline = 10000
+    start = time.perf_counter()
+    for _ in range(baseline):
+        generate_profile(rng, BROWSERS[browsers.sample(rng)])
+    per_profile = baseline / (time.perf_counter() - start)
+    print(f"🧬 per-profile {baseline:>9,} profiles {per_profile:>12,.0f} profiles/s")
+
+    for count in args.count:
+        start = time.perf_counter()
+        columns = generate_columns(count, seed=args.seed, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - start
+        print(f"🧬 {'numpy' if use_numpy else 'python':11} {count:>9,} profiles {count / elapsed:>12,.0f} profiles/s "
+              f"({count / elapsed / per_profile:.0f}x, {len(columns.columns)} B/profile)")
+    if args.output:
+        columns.save(args.output)
+        print(f"💾 Saved {len(columns):,} profiles to {args.output}")
+
+if __name__ == "__main__":
+    main()
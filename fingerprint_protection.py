@@ -9,10 +9,15 @@ import random
 import time
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Mapping
 from pathlib import Path
 import platform
 import sys
+import threading
+from collections import OrderedDict
+
+from fingerprint_profiles import ProfilePool, ProfileColumns, generate_columns
+from user_agents import random_user_agent
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -36,9 +41,12 @@ class AdvancedFingerprintingProtection:
         self.logger = self.setup_enterprise_logging()
         self.config = self.load_config()
         self.initialized = False
+        self.pinned_profiles = OrderedDict()
+        self.pin_lock = threading.Lock()
         
         try:
             self.validate_environment()
+            self.profile_pool = self.load_profile_pool()
             self.initialized = True
             self.logger.info("Enterprise fingerprint protection initialized")
         except Exception as e:
@@ -92,7 +100,10 @@ class AdvancedFingerprintingProtection:
             "audio_context_spoofing": True,
             "hardware_concurrency_spoofing": True,
             "language_spoofing": True,
-            "platform_spoofing": True
+            "platform_spoofing": True,
+            "profile_pool_size": 256,
+            "profile_pool_path": None,  # JSON pool to load instead of generating at startup
+            "max_pinned_sessions": 10000
         }
         
         config_path = Path(self.config_path)
@@ -117,43 +128,77 @@ class AdvancedFingerprintingProtection:
             
         return default_config
     
-    def get_stealth_headers(self) -> Dict[str, str]:
-        """Generate stealth headers with advanced fingerprint protection"""
+    def load_profile_pool(self) -> ProfilePool:
+        """Load the configured profile pool from disk, or generate one"""
+        pool_path = self.config.get('profile_pool_path')
+        if pool_path and Path(pool_path).exists():
+            try:
+                pool = ProfilePool.load(pool_path)
+                self.logger.info(f"Loaded {len(pool)} fingerprint profiles from {pool_path}")
+                return pool
+            except (ValueError, KeyError, IOError, json.JSONDecodeError) as e:
+                self.logger.warning(f"Profile pool load failed: {e}, generating a new one")
+        pool = ProfilePool.generate(self.config.get('profile_pool_size', 256))
+        self.logger.info(f"Generated {len(pool)} fingerprint profiles")
+        if pool_path:
+            try:
+                pool.save(pool_path)
+            except IOError as e:
+                self.logger.warning(f"Could not save profile pool: {e}")
+        return pool
+
+    def generate_bulk_profiles(self, count: int, seed: Optional[int] = None,
+                               path: Optional[str] = None) -> ProfileColumns:
+        """
+        Coherent profiles for a whole fleet of identities in one pass, as
+        columns; materialize rows with .profile(i). Optionally saved to
+        `path` (.npz or .json).
+        """
+        start = time.perf_counter()
+        columns = generate_columns(count, seed=seed)
+        if path:
+            columns.save(path)
+        self.logger.info(f"Generated {count} bulk fingerprint profiles in {time.perf_counter() - start:.2f}s")
+        return columns
+
+    def get_session_profile(self, session_key: str) -> Dict[str, Any]:
+        """Profile pinned to `session_key`; drawn by weight on first use"""
+        with self.pin_lock:
+            profile = self.pinned_profiles.get(session_key)
+            if profile is None:
+                profile = self.profile_pool.pick()
+                self.pinned_profiles[session_key] = profile
+                if len(self.pinned_profiles) > self.config.get('max_pinned_sessions', 10000):
+                    self.pinned_profiles.popitem(last=False)
+            else:
+                self.pinned_profiles.move_to_end(session_key)
+            return profile
+
+    def release_session(self, session_key: str) -> None:
+        """Unpin a session so its next use draws a fresh profile (identity rotation)"""
+        with self.pin_lock:
+            self.pinned_profiles.pop(session_key, None)
+
+    def get_stealth_headers(self, session_key: Optional[str] = None) -> Dict[str, str]:
+        """
+        Headers of a coherent profile: the one pinned to `session_key`, or a
+        weighted random one, as a dict the caller may modify (ordered as its
+        browser sends them)
+        """
+        return dict(self.get_header_template(session_key))
+
+    def get_header_template(self, session_key: Optional[str] = None) -> Mapping[str, str]:
+        """
+        Same as get_stealth_headers() but returns the profile's frozen,
+        read-only HeaderTemplate: a lookup, not a copy, for callers that
+        copy it anyway (e.g. into a session's CaseInsensitiveDict)
+        """
         if not self.initialized:
             self.logger.warning("Fingerprint protection not initialized, using basic headers")
             return self.get_fallback_headers()
-        
-        try:
-            base_headers = {
-                'User-Agent': self.get_advanced_user_agent(),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': self.get_random_accept_language(),
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'DNT': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Cache-Control': 'max-age=0',
-                'TE': 'trailers'
-            }
-            
-            # Add additional fingerprint-resistant headers (with error handling)
-            if random.random() > 0.5:
-                try:
-                    base_headers['Sec-CH-UA'] = self.get_sec_ch_ua()
-                    base_headers['Sec-CH-UA-Mobile'] = '?0'
-                    base_headers['Sec-CH-UA-Platform'] = self.get_random_platform_header()
-                except Exception as e:
-                    self.logger.debug(f"Sec-CH-UA headers failed: {e}")
-            
-            self.logger.debug("Stealth headers generated successfully")
-            return base_headers
-            
-        except Exception as e:
-            self.logger.error(f"Stealth headers generation failed: {e}")
-            return self.get_fallback_headers()
+        if session_key is None:
+            return self.profile_pool.pick()['headers']
+        return self.get_session_profile(session_key)['headers']
     
     def get_fallback_headers(self) -> Dict[str, str]:
         """Get fallback headers in case of errors"""
@@ -166,63 +211,8 @@ class AdvancedFingerprintingProtection:
         }
     
     def get_advanced_user_agent(self) -> str:
-        """Generate advanced user agent with randomization and error handling"""
-        try:
-            platforms = [
-                # Windows
-                {
-                    "template": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version} Safari/537.36",
-                    "type": "chrome"
-                },
-                {
-                    "template": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:{version}) Gecko/20100101 Firefox/{version}",
-                    "type": "firefox"
-                },
-                {
-                    "template": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/{version} Safari/537.36",
-                    "type": "edge"
-                },
-                
-                # macOS
-                {
-                    "template": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version} Safari/537.36",
-                    "type": "chrome"
-                },
-                {
-                    "template": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:{version}) Gecko/20100101 Firefox/{version}",
-                    "type": "firefox"
-                },
-                
-                # Linux
-                {
-                    "template": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version} Safari/537.36",
-                    "type": "chrome"
-                },
-                {
-                    "template": "Mozilla/5.0 (X11; Linux x86_64; rv:{version}) Gecko/20100101 Firefox/{version}",
-                    "type": "firefox"
-                }
-            ]
-            
-            platform_info = random.choice(platforms)
-            template = platform_info["template"]
-            browser_type = platform_info["type"]
-            
-            # Version randomization based on browser type
-            if browser_type == "chrome":
-                version = f"{random.randint(120, 130)}.0.{random.randint(1000, 9999)}.{random.randint(100, 999)}"
-            elif browser_type == "firefox":
-                version = f"{random.randint(120, 130)}.0"
-            else:  # edge
-                version = f"{random.randint(120, 130)}.0.{random.randint(1000, 9999)}.0"
-            
-            user_agent = template.format(version=version)
-            self.logger.debug(f"Generated User-Agent: {user_agent[:50]}...")
-            return user_agent
-            
-        except Exception as e:
-            self.logger.error(f"User-Agent generation failed: {e}")
-            return "Mozilla/5.0 (Windows NT 10.0; rv:120.0) Gecko/20100101 Firefox/120.0"
+        """Weighted random user agent from the shared table"""
+        return random_user_agent()
     
     def get_random_accept_language(self) -> str:
         """Generate random accept language header"""
@@ -348,7 +338,7 @@ class AdvancedFingerprintingProtection:
             self.logger.error(f"Screen resolution spoofing failed: {e}")
             return {'width': 1920, 'height': 1080, 'depth': 24}
     
-    def get_comprehensive_protection(self) -> Dict[str, Any]:
+    def get_comprehensive_protection(self, session_key: Optional[str] = None) -> Dict[str, Any]:
         """Get comprehensive fingerprint protection settings with error handling"""
         if not self.initialized:
             self.logger.error("Cannot generate protection: module not initialized")
@@ -357,19 +347,31 @@ class AdvancedFingerprintingProtection:
         self.logger.info("Generating comprehensive fingerprint protection...")
         
         try:
+            # Every attribute below comes from one coherent profile
+            profile = self.get_session_profile(session_key) if session_key else self.profile_pool.pick()
             protections = {
-                'headers': self.get_stealth_headers(),
+                'profile_id': profile['id'],
+                'headers': dict(profile['headers']),
                 'canvas_protection': self.generate_canvas_fingerprint_noise(),
-                'webgl_protection': self.spoof_webgl_parameters(),
+                'webgl_protection': {
+                    'webgl_vendor': profile['webgl_vendor'],
+                    'webgl_renderer': profile['webgl_renderer']
+                } if self.config.get('webgl_spoofing', True) else {},
                 'font_protection': self.mask_fonts(),
-                'timezone_protection': self.spoof_timezone(),
-                'screen_protection': self.spoof_screen_resolution(),
+                'timezone_protection': {
+                    'timezone': profile['timezone'],
+                    'language': profile['language']
+                } if self.config.get('timezone_spoofing', True) else {},
+                'screen_protection': dict(profile['screen']) if self.config.get('screen_resolution_spoofing', True) else {},
+                'platform_protection': {
+                    'navigator_platform': profile['navigator_platform']
+                } if self.config.get('platform_spoofing', True) else {},
                 'audio_protection': {
                     'audio_context_spoofing': self.config.get('audio_context_spoofing', True)
                 },
                 'hardware_protection': {
-                    'hardware_concurrency': random.randint(4, 16) if self.config.get('hardware_concurrency_spoofing', True) else None,
-                    'device_memory': random.choice([4, 8, 16])
+                    'hardware_concurrency': profile['hardware_concurrency'] if self.config.get('hardware_concurrency_spoofing', True) else None,
+                    'device_memory': profile['device_memory']
                 },
                 'metadata': {
                     'generated_at': time.time(),
@@ -207,7 +207,6 @@ enterprise_setup_python_env() {
         "requests>=2.28.0"
         "stem>=1.8.0" 
         "psutil>=5.9.0"
-        "fake-useragent>=1.1.0"
         "PySocks>=1.7.1"
         "urllib3>=1.26.0"
     )
@@ -360,7 +359,6 @@ FINGERPRINT_CONFIG
 requests>=2.28.0
 stem>=1.8.0
 psutil>=5.9.0
-fake-useragent>=1.1.0
 PySocks>=1.7.1
 urllib3>=1.26.0
 REQUIREMENTS
@@ -410,14 +408,10 @@ enterprise_test_installation() {
 import sys
 try:
     import requests, stem, psutil, urllib3
-    # Try to import fake-useragent but don't fail if missing
-    try:
-        import fake_useragent
-        fake_useragent_available = True
-    except ImportError:
-        fake_useragent_available = False
+    from user_agents import get_user_agent_table
+    table = get_user_agent_table()
     print('✅ Enterprise dependencies verified')
-    print(f'   - fake-useragent: {fake_useragent_available}')
+    print(f'   - user agent table: {len(table) if table else \"missing\"} entries')
     sys.exit(0)
 except ImportError as e:
     print(f'❌ Missing dependency: {e}')
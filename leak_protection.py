@@ -13,6 +13,9 @@ from pathlib import Path
 import platform
 import sys
 
+from fingerprint_profiles import ACCEPT_ENCODING
+from user_agents import random_user_agent
+
 class Colors:
     """ANSI color codes for terminal output"""
     RED = '\033[91m'
@@ -127,7 +130,7 @@ class AdvancedFingerprintingProtection:
                 'User-Agent': self.get_advanced_user_agent(),
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': self.get_random_accept_language(),
-                'Accept-Encoding': 'gzip, deflate, br',
+                'Accept-Encoding': ACCEPT_ENCODING,
                 'Connection': 'keep-alive',
                 'Upgrade-Insecure-Requests': '1',
                 'DNT': '1',
@@ -165,63 +168,8 @@ class AdvancedFingerprintingProtection:
         }
     
     def get_advanced_user_agent(self) -> str:
-        """Generate advanced user agent with randomization and error handling"""
-        try:
-            platforms = [
-                # Windows
-                {
-                    "template": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version} Safari/537.36",
-                    "type": "chrome"
-                },
-                {
-                    "template": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:{version}) Gecko/20100101 Firefox/{version}",
-                    "type": "firefox"
-                },
-                {
-                    "template": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/{version} Safari/537.36",
-                    "type": "edge"
-                },
-                
-                # macOS
-                {
-                    "template": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version} Safari/537.36",
-                    "type": "chrome"
-                },
-                {
-                    "template": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:{version}) Gecko/20100101 Firefox/{version}",
-                    "type": "firefox"
-                },
-                
-                # Linux
-                {
-                    "template": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version} Safari/537.36",
-                    "type": "chrome"
-                },
-                {
-                    "template": "Mozilla/5.0 (X11; Linux x86_64; rv:{version}) Gecko/20100101 Firefox/{version}",
-                    "type": "firefox"
-                }
-            ]
-            
-            platform_info = random.choice(platforms)
-            template = platform_info["template"]
-            browser_type = platform_info["type"]
-            
-            # Version randomization based on browser type
-            if browser_type == "chrome":
-                version = f"{random.randint(120, 130)}.0.{random.randint(1000, 9999)}.{random.randint(100, 999)}"
-            elif browser_type == "firefox":
-                version = f"{random.randint(120, 130)}.0"
-            else:  # edge
-                version = f"{random.randint(120, 130)}.0.{random.randint(1000, 9999)}.0"
-            
-            user_agent = template.format(version=version)
-            self.logger.debug(f"Generated User-Agent: {user_agent[:50]}...")
-            return user_agent
-            
-        except Exception as e:
-            self.logger.error(f"User-Agent generation failed: {e}")
-            return "Mozilla/5.0 (Windows NT 10.0; rv:120.0) Gecko/20100101 Firefox/120.0"
+        """Weighted random user agent from the shared table"""
+        return random_user_agent()
     
     def get_random_accept_language(self) -> str:
         """Generate random accept language header"""
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+RATE LIMITER
+Token buckets per destination host and per circuit, with 429 / Retry-After feedback
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+
+THROTTLE_STATUS = (429, 503)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second up to `burst`. The
+    current rate backs off multiplicatively on throttling and recovers
+    additively on success (AIMD), never above the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float, amount: float = 1) -> float:
+        """Seconds until `amount` tokens are available (0 if they are available now)"""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        # Amounts above the burst size are allowed once the bucket is full
+        amount = min(amount, self.burst)
+        if self.tokens < amount:
+            wait = max(wait, (amount - self.tokens) / self.rate)
+        return wait
+
+    def take(self, amount: float = 1) -> None:
+        self.tokens -= amount
+
+    def throttle(self, now: float, retry_after: Optional[float], min_rate: float) -> None:
+        self.rate = max(min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def recover(self) -> None:
+        self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+class RateLimiter:
+    """
+    Non-blocking limiter: acquire() either takes a token from both the
+    host and the circuit bucket and returns 0, or takes nothing and returns
+    how long to wait. Callers decide how to wait. The sync request path
+    sleeps within its deadline, while the executor parks the job and frees
+    the worker. Buckets are kept for the most recently used keys only.
+    """
+
+    DEFAULT_CONFIG = {
+        "enabled": True,
+        "host_rate": 2.0,
+        "host_burst": 5,
+        "circuit_rate": 10.0,
+        "circuit_burst": 20,
+        "min_rate": 0.05,
+        "max_retry_after": 300,
+        "max_buckets": 10000
+    }
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**self.DEFAULT_CONFIG, **(config or {})}
+        self.enabled = self.config['enabled']
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('rate_limiter')
+        self.buckets: 'OrderedDict[tuple, TokenBucket]' = OrderedDict()
+        self.stats = {'acquired': 0, 'deferred': 0, 'throttled': 0, 'wait_seconds': 0.0}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlsplit(url).hostname or '').lower()
+
+    def _bucket(self, kind: str, key: str) -> TokenBucket:
+        bucket = self.buckets.get((kind, key))
+        if bucket is None:
+            bucket = TokenBucket(self.config[f"{kind}_rate"], self.config[f"{kind}_burst"])
+            self.buckets[(kind, key)] = bucket
+            if len(self.buckets) > self.config['max_buckets']:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end((kind, key))
+        return bucket
+
+    def acquire(self, url: str, circuit: Optional[str] = None) -> float:
+        """Take a token for `url` on `circuit`, or return the seconds to wait first"""
+        if not self.enabled:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            buckets = [self._bucket('host', self.host_of(url))]
+            if circuit:
+                buckets.append(self._bucket('circuit', circuit))
+            wait = max(bucket.wait_time(now) for bucket in buckets)
+            if wait > 0:
+                self.stats['deferred'] += 1
+                return wait
+            for bucket in buckets:
+                bucket.take()
+            self.stats['acquired'] += 1
+            return 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self.lock:
+            self.stats['wait_seconds'] += seconds
+
+    def feedback(self, url: str, response) -> Optional[float]:
+        """
+        Adjust the host bucket from a response. Returns the Retry-After delay
+        (capped) when the origin throttled us, otherwise None.
+        """
+        if not self.enabled or response is None:
+            return None
+        with self.lock:
+            bucket = self._bucket('host', self.host_of(url))
+            if response.status_code not in THROTTLE_STATUS:
+                bucket.recover()
+                return None
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is None and response.status_code == 503:
+                return None  # Plain outage, not a throttling signal
+            if retry_after is not None:
+                retry_after = min(retry_after, self.config['max_retry_after'])
+            bucket.throttle(time.monotonic(), retry_after, self.config['min_rate'])
+            self.stats['throttled'] += 1
+        self.logger.warning(f"🐢 {self.host_of(url)} throttled ({response.status_code}), "
+                            f"rate now {bucket.rate:.2f}/s")
+        return retry_after if retry_after is not None else 1 / bucket.rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats['buckets'] = len(self.buckets)
+        return stats
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+REQUEST DEADLINE
+End-to-end time budget shared by the anonymizer, download manager and request executor
+"""
+
+import time
+from typing import Optional
+
+class RequestDeadline:
+    """
+    End-to-end deadline shared by every phase of a single request
+    (connect/read timeouts, retries, rotation waits)
+    """
+
+    def __init__(self, budget: Optional[float] = None):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget if budget is not None else None
+
+    @classmethod
+    def coerce(cls, value) -> 'RequestDeadline':
+        """Accept seconds, None or an existing deadline"""
+        if isinstance(value, cls):
+            return value
+        return cls(value)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None when unbounded"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """True if a phase lasting `seconds` still fits in the budget"""
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def clamp_timeout(self, timeout):
+        """Clamp a requests timeout (scalar or connect/read tuple) to the remaining budget"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if isinstance(timeout, tuple):
+            return tuple(min(t, remaining) if t is not None else remaining for t in timeout)
+        return min(timeout, remaining) if timeout is not None else remaining
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+REQUEST EXECUTOR
+Priority-ordered, deadline-aware request queue dispatched over pooled circuits
+"""
+
+import time
+import heapq
+import queue
+import logging
+import threading
+import itertools
+from concurrent.futures import Future
+from typing import Optional, Dict, Any
+
+from adaptive_timeouts import LatencyWindow
+from request_deadline import RequestDeadline
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 10
+PRIORITY_BACKGROUND = 20
+
+class _Job:
+    __slots__ = ('url', 'method', 'kwargs', 'deadline', 'future', 'enqueued', 'priority', 'throttle_retries',
+                 'retries', 'circuit', 'delay_reserved', 'shaping_slot')
+
+    def __init__(self, url: str, method: str, kwargs: Dict[str, Any], deadline: RequestDeadline,
+                 priority: int, throttle_retries: int, retries: int = 0):
+        self.url = url
+        self.priority = priority
+        self.throttle_retries = throttle_retries
+        self.retries = retries
+        self.method = method
+        self.kwargs = kwargs
+        self.deadline = deadline
+        self.future = Future()
+        self.enqueued = time.monotonic()
+        self.circuit = None
+        self.delay_reserved = False
+        self.shaping_slot = False
+
+class PriorityRequestExecutor:
+    """
+    Worker threads pulling jobs from one bounded PriorityQueue.
+
+    Lower priority numbers run first, FIFO within a priority. submit()
+    blocks while the queue is full (backpressure) unless `block=False`,
+    in which case queue.Full is raised. The deadline starts at submit
+    time, so time spent queued counts against it, and a job whose deadline
+    has already passed when it reaches a worker is failed with
+    TimeoutError without touching the network. Each job runs on the next
+    circuit of the anonymizer's CircuitSessionPool. Queue wait and network
+    time are recorded separately.
+
+    Pacing never parks a worker: a job held back by its session's
+    artificial delay or by the RateLimiter (or that comes back 429) goes
+    onto a timer heap and re-enters the queue when due, keeping its
+    circuit, while the worker moves on to other sessions and hosts. A
+    request that fails outright is retried the same way, on the next
+    pooled circuit, up to max_retries attempts in total.
+    """
+
+    _STOP_PRIORITY = float('inf')
+
+    def __init__(self, anonymizer, workers: int = 4, max_queue: int = 1000, throttle_retries: int = 2):
+        self.anonymizer = anonymizer
+        self.workers = max(1, workers)
+        self.queue = queue.PriorityQueue(maxsize=max_queue)
+        self.sequence = itertools.count()
+        self.logger = logging.getLogger('request_executor')
+        self.lock = threading.Lock()
+        self.queue_wait = LatencyWindow(1000)
+        self.network_time = LatencyWindow(1000)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'expired': 0, 'cancelled': 0, 'deferred': 0}
+        self.throttle_retries = throttle_retries
+        self.retries = max(0, anonymizer.config.get('max_retries', 3) - 1)
+        self.deferred = []
+        self.deferred_ready = threading.Condition()
+        self.closed = False
+        self.deferrer = threading.Thread(target=self._release_deferred, daemon=True, name="RequestDeferrer")
+        self.deferrer.start()
+        self.threads = []
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, daemon=True, name=f"RequestWorker-{index}")
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, url: str, priority: int = PRIORITY_NORMAL, deadline=None, method: str = "GET",
+               block: bool = True, timeout: Optional[float] = None, **kwargs) -> Future:
+        """Queue a request; the future resolves to the response (None if every attempt failed)"""
+        if self.closed:
+            raise RuntimeError("Request executor is shut down")
+        job = _Job(url, method, kwargs, RequestDeadline.coerce(deadline), priority, self.throttle_retries,
+                   self.retries)
+        self.queue.put((priority, next(self.sequence), job), block=block, timeout=timeout)
+        with self.lock:
+            self.stats['submitted'] += 1
+        return job.future
+
+    def _worker(self) -> None:
+        while True:
+            priority, _, job = self.queue.get()
+            if priority == self._STOP_PRIORITY:
+                return
+            # Deferred jobs come back already running
+            if not job.future.running() and not job.future.set_running_or_notify_cancel():
+                with self.lock:
+                    self.stats['cancelled'] += 1
+                continue
+            self._run(job)
+
+    def _defer(self, job: _Job, delay: float) -> None:
+        with self.deferred_ready:
+            if self.closed:
+                job.future.set_exception(RuntimeError(f"Request executor shut down while deferring {job.url}"))
+                return
+            heapq.heappush(self.deferred, (time.monotonic() + delay, next(self.sequence), job))
+            self.deferred_ready.notify()
+        with self.lock:
+            self.stats['deferred'] += 1
+
+    def _release_deferred(self) -> None:
+        """Move deferred jobs back into the priority queue once they are due"""
+        while True:
+            with self.deferred_ready:
+                while not self.deferred or self.deferred[0][0] > time.monotonic():
+                    if self.closed and not self.deferred:
+                        return
+                    timeout = self.deferred[0][0] - time.monotonic() if self.deferred else None
+                    self.deferred_ready.wait(timeout)
+                _, sequence, job = heapq.heappop(self.deferred)
+            self.queue.put((job.priority, sequence, job))
+
+    def _expire(self, job: _Job) -> None:
+        with self.lock:
+            self.stats['expired'] += 1
+        self.anonymizer.record_request_metric('deadline_misses')
+        waited = time.monotonic() - job.enqueued
+        job.future.set_exception(TimeoutError(f"Deadline passed after {waited:.2f}s in queue: {job.url}"))
+
+    def _release_shaping_slot(self, job: _Job, circuit_key: str) -> None:
+        if job.shaping_slot:
+            self.anonymizer.traffic_shaper.release(circuit_key)
+            job.shaping_slot = False
+
+    def _run(self, job: _Job) -> None:
+        if job.deadline.expired():
+            self._expire(job)
+            return
+
+        if job.circuit is None:
+            job.circuit = self.anonymizer.get_circuit_pool().acquire()
+        _, session = job.circuit
+        circuit_key = self.anonymizer.get_circuit_key(session)
+        if not job.delay_reserved:
+            job.delay_reserved = True
+            delay = self.anonymizer.reserve_artificial_delay(circuit_key, job.deadline)
+            if delay > 0:
+                self._defer(job, delay)
+                return
+
+        shaper = self.anonymizer.traffic_shaper
+        if shaper is not None and not job.shaping_slot:
+            if not shaper.admit(circuit_key, on_free=lambda: self._defer(job, 0)):
+                # Session at its pattern's concurrency limit: parked until one of its requests finishes
+                return
+            job.shaping_slot = True
+
+        wait = self.anonymizer.rate_limiter.acquire(job.url, circuit_key)
+        if wait > 0:
+            self._release_shaping_slot(job, circuit_key)
+            if job.deadline.allows(wait):
+                self._defer(job, wait)
+            else:
+                self._expire(job)
+            return
+
+        with self.lock:
+            self.queue_wait.add(time.monotonic() - job.enqueued)
+        start = time.monotonic()
+        try:
+            response = self.anonymizer.make_enterprise_stealth_request(
+                job.url, job.method, deadline=job.deadline, session=session,
+                rate_limit=False, apply_delay=False, **job.kwargs
+            )
+        except Exception as e:
+            self._release_shaping_slot(job, circuit_key)
+            self.logger.error(f"❌ Queued request failed for {job.url}: {e}")
+            with self.lock:
+                self.network_time.add(time.monotonic() - start)
+                self.stats['failed'] += 1
+            job.future.set_exception(e)
+            return
+        self._release_shaping_slot(job, circuit_key)
+        with self.lock:
+            self.network_time.add(time.monotonic() - start)
+        if (response is not None and response.status_code == 429 and job.throttle_retries > 0
+                and not job.deadline.expired()):
+            # Host bucket was already penalized; re-dispatch waits for its next token
+            response.close()
+            job.throttle_retries -= 1
+            job.enqueued = time.monotonic()
+            job.delay_reserved = False
+            self._defer(job, 0)
+            return
+        if response is None and job.retries > 0 and job.deadline.allows(1.0):
+            # Failed outright: back off, then try the next pooled circuit
+            job.retries -= 1
+            job.circuit = None
+            job.delay_reserved = False
+            self._defer(job, 1.0)
+            return
+        with self.lock:
+            self.stats['completed' if response is not None else 'failed'] += 1
+        job.future.set_result(response)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+            for name, window in (('queue_wait', self.queue_wait), ('network', self.network_time)):
+                for label, q in (('p50', 0.5), ('p95', 0.95)):
+                    value = window.percentile(q)
+                    stats[f"{name}_{label}"] = round(value, 4) if value is not None else None
+        stats['queued'] = self.queue.qsize()
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers once the jobs already queued have been dispatched"""
+        if self.closed:
+            return
+        with self.deferred_ready:
+            self.closed = True
+            parked, self.deferred = self.deferred, []
+            self.deferred_ready.notify()
+        for _, _, job in parked:
+            job.future.set_exception(RuntimeError(f"Request executor shut down while {job.url} was deferred"))
+        for _ in self.threads:
+            # Stop markers sort after every real priority, so queued work drains first
+            self.queue.put((self._STOP_PRIORITY, next(self.sequence), None))
+        if wait:
+            for thread in self.threads:
+                thread.join()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+RESPONSE CACHE
+Disk-backed HTTP cache with conditional revalidation, isolated per identity
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.response import HTTPResponse
+
+CACHEABLE_STATUS = {200, 203, 300, 301, 308, 404, 410}
+
+# Content codings urllib3 undoes while requests reads a body (br/zstd only
+# when their optional decoder is installed)
+DECODED_ENCODINGS = set(getattr(HTTPResponse, 'CONTENT_DECODERS', ['gzip', 'x-gzip', 'deflate'])) | {'identity'}
+
+# Request headers asking for something other than the stored representation:
+# a byte range, credential-bound content, or the caller's own revalidation
+BYPASS_REQUEST_HEADERS = ('Range', 'If-Range', 'Authorization', 'If-None-Match', 'If-Modified-Since')
+
+def body_was_decoded(headers) -> bool:
+    """Whether requests handed back the body with its Content-Encoding already removed"""
+    codings = [coding.strip().lower() for coding in headers.get('Content-Encoding', '').split(',')]
+    return all(coding in DECODED_ENCODINGS for coding in codings if coding)
+
+def cacheable_request(headers) -> bool:
+    """Whether a GET with these request headers may be answered from the cache"""
+    headers = CaseInsensitiveDict(headers or {})
+    return not any(headers.get(name) is not None for name in BYPASS_REQUEST_HEADERS)
+
+def vary_values(vary: Optional[str], request_headers) -> Dict[str, Optional[str]]:
+    """The request header values a response selected on, by lowercased name"""
+    request_headers = CaseInsensitiveDict(request_headers or {})
+    names = [name.strip().lower() for name in (vary or '').split(',') if name.strip()]
+    return {name: request_headers.get(name) for name in names}
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+class EnterpriseResponseCache:
+    """
+    Opt-in response cache for repeated GETs.
+
+    Freshness follows Cache-Control max-age / Expires (no-store is never
+    stored, no-cache is always revalidated). Stale entries with an ETag or
+    Last-Modified are revalidated with a conditional request, and a 304
+    refreshes them without transferring the body again. Every key includes
+    the identity (fingerprint profile + circuit isolation), so one identity
+    can never be served, or leak timing about, another's cached pages.
+    A response with Vary remembers the request header values it was
+    selected on and is only served to requests that send the same ones;
+    requests for a range or with their own credentials or validators
+    bypass the cache (see `cacheable_request`).
+    That is deliberate: a rotated identity (NEWNYM re-pins the shared
+    session to a fresh profile, pool circuits get new credentials) starts
+    from a cold cache, since a warm one would link it to its predecessor.
+    The old identity's entries are never looked up again and age out
+    through the LRU. Entries are evicted LRU once the stored bytes exceed
+    `max_bytes`.
+    """
+
+    def __init__(self, directory: str = "cache/responses", max_bytes: int = 256 * 1024 * 1024,
+                 max_entry_bytes: int = 16 * 1024 * 1024, default_ttl: int = 0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.default_ttl = default_ttl
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('response_cache')
+        self.index: 'OrderedDict[str, int]' = OrderedDict()
+        self.total_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0}
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from disk, least recently used first"""
+        entries = []
+        for meta_path in self.directory.glob('*.meta.json'):
+            key = meta_path.name[:-len('.meta.json')]
+            body_path = self.directory / f"{key}.body"
+            if body_path.exists():
+                stat = body_path.stat()
+                entries.append((stat.st_atime, key, stat.st_size))
+            else:
+                meta_path.unlink()
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def make_key(identity: str, method: str, url: str) -> str:
+        return hashlib.sha256(f"{identity}\n{method.upper()}\n{url}".encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        return self.directory / f"{key}.meta.json", self.directory / f"{key}.body"
+
+    def lookup(self, identity: str, method: str, url: str,
+               request_headers=None) -> Optional[Dict[str, Any]]:
+        """Entry for this request, or None if absent or stored for another Vary variant"""
+        key = self.make_key(identity, method, url)
+        meta_path, _ = self._paths(key)
+        with self.lock:
+            if key not in self.index:
+                self.stats['misses'] += 1
+                return None
+            self.index.move_to_end(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            self._remove(key)
+            with self.lock:
+                self.stats['misses'] += 1
+            return None
+        vary = entry.get('vary', {})
+        if vary and vary_values(', '.join(vary), request_headers) != vary:
+            with self.lock:
+                self.stats['misses'] += 1
+            return None
+        entry['key'] = key
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any]) -> bool:
+        return entry.get('expires_at', 0) > time.time()
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def _expiry(self, headers) -> Optional[float]:
+        """Absolute expiry time, or None if the response must not be stored"""
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if 'no-store' in directives or headers.get('Vary', '').strip() == '*':
+            return None
+        now = time.time()
+        if 'no-cache' in directives:
+            return now
+        max_age = directives.get('max-age')
+        if max_age is not None and max_age.isdigit():
+            age = headers.get('Age')
+            return now + int(max_age) - (int(age) if age and age.isdigit() else 0)
+        expires = _http_date(headers.get('Expires'))
+        if expires is not None:
+            date = _http_date(headers.get('Date')) or now
+            return now + (expires - date)
+        return now + self.default_ttl
+
+    def store(self, identity: str, method: str, url: str, response: requests.Response) -> None:
+        """Store a fully read response if its status and headers allow it"""
+        if response.status_code not in CACHEABLE_STATUS:
+            return
+        expires_at = self._expiry(response.headers)
+        body = response.content
+        if expires_at is None or len(body) > self.max_entry_bytes:
+            return
+        has_validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        if expires_at <= time.time() and not has_validator:
+            return  # Could never be served nor revalidated
+
+        key = self.make_key(identity, method, url)
+        meta_path, body_path = self._paths(key)
+        entry = {
+            'url': url,
+            'status_code': response.status_code,
+            'headers': dict(response.headers),
+            # An encoding urllib3 cannot decode (e.g. br without brotli) stays in the body
+            'decoded': body_was_decoded(response.headers),
+            # Headers actually sent, session defaults and cookies included
+            'vary': vary_values(response.headers.get('Vary'),
+                                response.request.headers if response.request is not None else None),
+            'stored_at': time.time(),
+            'expires_at': expires_at
+        }
+        # Drop the stale copy (and its size) before writing the new one
+        self._remove(key)
+        with open(body_path, 'wb') as f:
+            f.write(body)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        with self.lock:
+            self.index[key] = len(body)
+            self.total_bytes += len(body)
+            self.stats['stores'] += 1
+        self._evict()
+
+    def refresh(self, entry: Dict[str, Any], not_modified: requests.Response) -> None:
+        """Apply a 304: merge updated headers and recompute freshness"""
+        entry['headers'].update({k: v for k, v in not_modified.headers.items()
+                                 if k.lower() not in ('content-length', 'content-encoding', 'transfer-encoding')})
+        entry['expires_at'] = self._expiry(CaseInsensitiveDict(entry['headers'])) or time.time()
+        meta_path, _ = self._paths(entry['key'])
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({k: v for k, v in entry.items() if k != 'key'}, f)
+        with self.lock:
+            self.stats['revalidated'] += 1
+
+    def build_response(self, entry: Dict[str, Any], hit: bool = True) -> requests.Response:
+        """Rebuild a requests.Response from a cache entry"""
+        _, body_path = self._paths(entry['key'])
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        # Entries from before 'decoded' was recorded assumed decoding
+        if entry.get('decoded', True):
+            response.headers.pop('Content-Encoding', None)
+        response.url = entry['url']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        with open(body_path, 'rb') as f:
+            response._content = f.read()
+        response.from_cache = True
+        if hit:
+            with self.lock:
+                self.stats['hits'] += 1
+        return response
+
+    def _remove(self, key: str) -> None:
+        with self.lock:
+            size = self.index.pop(key, None)
+            if size is not None:
+                self.total_bytes -= size
+        for path in self._paths(key):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        while True:
+            with self.lock:
+                if self.total_bytes <= self.max_bytes or not self.index:
+                    return
+                key = next(iter(self.index))
+                self.stats['evictions'] += 1
+            self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.index)
+            stats['bytes'] = self.total_bytes
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        # Revalidated responses avoid the body transfer, so they count as hits here
+        stats['hit_ratio'] = round((stats['hits'] + stats['revalidated']) / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+RESULT SINKS
+Pluggable batched result storage (JSONL, SQLite, Parquet) fed by a bounded background writer
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+# Parquet output is optional
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+RESULT_COLUMNS = ['url', 'status', 'elapsed', 'circuit', 'bytes', 'hash', 'body_ref', 'error', 'started_at']
+
+class ResultSink:
+    """Base class: receives whole batches of result records"""
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class JsonlResultSink(ResultSink):
+    """One JSON object per line; '-' writes to stdout"""
+
+    def __init__(self, target, append: bool = True):
+        if hasattr(target, 'write'):
+            self.stream, self.owns_stream = target, False
+        elif target == '-':
+            self.stream, self.owns_stream = sys.stdout, False
+        else:
+            self.stream, self.owns_stream = open(target, 'a' if append else 'w', encoding='utf-8'), True
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        self.stream.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.owns_stream:
+            self.stream.close()
+
+class SqliteResultSink(ResultSink):
+    """Results table in SQLite, one transaction per batch"""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                url TEXT, status INTEGER, elapsed REAL, circuit TEXT, bytes INTEGER,
+                hash TEXT, body_ref TEXT, error TEXT, started_at REAL, extra TEXT
+            )
+        """)
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        rows = []
+        for record in records:
+            extra = {k: v for k, v in record.items() if k not in RESULT_COLUMNS}
+            rows.append(tuple(record.get(c) for c in RESULT_COLUMNS) + (json.dumps(extra) if extra else None,))
+        self.db.execute("BEGIN")
+        self.db.executemany(f"INSERT INTO results VALUES ({', '.join('?' * (len(RESULT_COLUMNS) + 1))})", rows)
+        self.db.execute("COMMIT")
+
+    def close(self) -> None:
+        self.db.close()
+
+class ParquetResultSink(ResultSink):
+    """Columnar output, one Parquet row group per batch (requires pyarrow)"""
+
+    def __init__(self, path: str):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow")
+        self.schema = pyarrow.schema([
+            ('url', pyarrow.string()), ('status', pyarrow.int32()), ('elapsed', pyarrow.float64()),
+            ('circuit', pyarrow.string()), ('bytes', pyarrow.int64()), ('hash', pyarrow.string()),
+            ('body_ref', pyarrow.string()), ('error', pyarrow.string()), ('started_at', pyarrow.float64())
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        columns = {c: [r.get(c) for r in records] for c in RESULT_COLUMNS}
+        self.writer.write_table(pyarrow.table(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+def open_result_sink(target: str) -> ResultSink:
+    """Pick a sink from the target name: .db/.sqlite, .parquet, otherwise JSONL"""
+    suffix = Path(target).suffix.lower() if target != '-' else ''
+    if suffix in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteResultSink(target)
+    if suffix == '.parquet':
+        return ParquetResultSink(target)
+    return JsonlResultSink(target)
+
+class _PendingBlob:
+    """Temp file being filled by a stream; committed under its content hash"""
+
+    def __init__(self, store: 'ContentStore'):
+        self.store = store
+        fd, self.tmp_path = tempfile.mkstemp(dir=store.root, prefix='.incoming-')
+        self.handle = os.fdopen(fd, 'wb')
+        self.digest = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        return self.handle.write(data)
+
+    def commit(self) -> str:
+        self.handle.close()
+        return self.store._adopt(self.tmp_path, self.digest.hexdigest())
+
+    def discard(self) -> None:
+        self.handle.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+class ContentStore:
+    """
+    Content-addressed body storage: <root>/<ab>/<cd>/<sha256>. Identical
+    bodies are stored once, whichever URL or run produced them.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stats = {'stored': 0, 'deduplicated': 0}
+        self.lock = threading.Lock()
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def open_writer(self) -> _PendingBlob:
+        return _PendingBlob(self)
+
+    def _adopt(self, tmp_path: str, digest: str) -> str:
+        target = self.path_for(digest)
+        with self.lock:
+            if target.exists():
+                os.unlink(tmp_path)
+                self.stats['deduplicated'] += 1
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, target)
+                self.stats['stored'] += 1
+        return digest
+
+class BackgroundResultWriter:
+    """
+    Bounded queue in front of a ResultSink, drained by one writer thread
+    that flushes by batch size or age. submit() blocks while the queue is
+    full, so a slow disk pushes back on the fetchers instead of growing
+    memory. `on_written` is called with each batch after the sink accepted
+    it, e.g. to mark journal entries done only once their result is stored.
+    """
+
+    _STOP = object()
+
+    def __init__(self, sink: ResultSink, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 on_written: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+        self.logger = logging.getLogger('result_sinks')
+        self.stats = {'submitted': 0, 'written': 0, 'batches': 0, 'blocked_seconds': 0.0, 'write_seconds': 0.0}
+        self.stats_lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self._drain, daemon=True, name="ResultWriter")
+        self.thread.start()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """Queue a record, blocking (backpressure) while the writer is behind"""
+        if self.closed:
+            # Late result after shutdown: not journaled as done, so it is refetched next run
+            self.logger.warning(f"⚠️ Result writer closed, dropping result for {record.get('url')}")
+            return
+        blocked = 0.0
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            start = time.monotonic()
+            self.queue.put(record)
+            blocked = time.monotonic() - start
+        with self.stats_lock:
+            self.stats['submitted'] += 1
+            self.stats['blocked_seconds'] += blocked
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            self.sink.write_batch(batch)
+        except Exception as e:
+            self.logger.error(f"❌ Result sink write failed ({len(batch)} records): {e}")
+            return
+        self.stats['write_seconds'] += time.perf_counter() - start
+        self.stats['written'] += len(batch)
+        self.stats['batches'] += 1
+        if self.on_written:
+            try:
+                self.on_written(batch)
+            except Exception as e:
+                self.logger.error(f"❌ Result writer callback failed: {e}")
+
+    def _drain(self) -> None:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is self._STOP:
+                if batch:
+                    self._write(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def close(self) -> None:
+        """Flush everything still queued, then close the sink"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(self._STOP)
+        self.thread.join()
+        self.sink.close()
@@ -0,0 +1,152 @@
+"""
+Shared fixtures: a local HTTP origin and a SOCKS5 proxy standing in for Tor,
+so the CLI can be exercised end to end without network access.
+"""
+
+import json
+import socket
+import struct
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+BODY = bytes(range(256)) * 512  # 128 KiB
+
+class _OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body, status = BODY, 200
+        byte_range = self.headers.get('Range')
+        if byte_range:
+            start, _, end = byte_range.split('=', 1)[1].partition('-')
+            end = int(end) if end else len(BODY) - 1
+            body, status = BODY[int(start):end + 1], 206
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(BODY)}')
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def origin():
+    """Base URL of a local HTTP server serving BODY (with Range support) and 404 under /missing"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OriginHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+def _relay(source, target):
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            target.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, target):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def _recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise OSError('client went away')
+        data += chunk
+    return data
+
+class Socks5Proxy:
+    """SOCKS5 CONNECT proxy accepting any username/password, as Tor does with IsolateSOCKSAuth"""
+
+    def __init__(self):
+        self.server = socket.socket()
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(64)
+        self.port = self.server.getsockname()[1]
+        self.usernames = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(client,), daemon=True).start()
+
+    def _handle(self, client):
+        try:
+            _, count = _recv_exact(client, 2)
+            methods = _recv_exact(client, count)
+            if 2 in methods:
+                client.sendall(b'\x05\x02')
+                _recv_exact(client, 1)
+                username = _recv_exact(client, _recv_exact(client, 1)[0])
+                _recv_exact(client, _recv_exact(client, 1)[0])
+                self.usernames.append(username.decode())
+                client.sendall(b'\x01\x00')
+            else:
+                client.sendall(b'\x05\x00')
+            _, _, _, address_type = _recv_exact(client, 4)
+            if address_type == 1:
+                host = socket.inet_ntoa(_recv_exact(client, 4))
+            else:
+                host = _recv_exact(client, _recv_exact(client, 1)[0]).decode()
+            port = struct.unpack('!H', _recv_exact(client, 2))[0]
+            upstream = socket.create_connection((host, port), timeout=10)
+            client.sendall(b'\x05\x00\x00\x01' + socket.inet_aton('127.0.0.1') + struct.pack('!H', 0))
+        except OSError:
+            client.close()
+            return
+        threading.Thread(target=_relay, args=(upstream, client), daemon=True).start()
+        _relay(client, upstream)
+
+    def close(self):
+        self.server.close()
+
+@pytest.fixture
+def socks_proxy():
+    proxy = Socks5Proxy()
+    yield proxy
+    proxy.close()
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def settings(tmp_path, socks_proxy):
+    """settings.json pointing the anonymizer at the local proxy, with no controller listening"""
+    path = tmp_path / 'settings.json'
+    path.write_text(json.dumps({
+        'tor_port': socks_proxy.port,
+        'control_port': _closed_port(),
+        'random_delay_enabled': False,
+        'readiness_probe': False
+    }), encoding='utf-8')
+    return path
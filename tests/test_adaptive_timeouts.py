@@ -0,0 +1,38 @@
+"""Censored timeout samples: only the learned timeout, never a deadline cut, is recorded"""
+
+import types
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from adaptive_timeouts import AdaptiveTimeoutManager
+from request_deadline import RequestDeadline
+from tor_anonymizer import UltimateTorAnonymizer
+
+class _TimingOutSession:
+    def __init__(self):
+        self.timeouts = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        raise requests.exceptions.Timeout()
+
+def _request(manager, session, deadline=None):
+    anonymizer = types.SimpleNamespace(session=session, timeouts=manager)
+    with pytest.raises(requests.exceptions.Timeout):
+        UltimateTorAnonymizer.adaptive_request(anonymizer, 'user', 'http://example.com/', timeout=(10.0, 10.0),
+                                               deadline=deadline)
+
+def test_timeout_at_learned_value_is_censored_sample():
+    manager, session = AdaptiveTimeoutManager(), _TimingOutSession()
+    _request(manager, session, RequestDeadline(60))
+    window = manager.windows[('user', 'ttfb')]
+    assert list(window.samples) == [10.0] and list(window.timeouts) == [True]
+    assert session.timeouts == [(10.0, 10.0)]
+
+def test_timeout_clamped_by_deadline_is_not_recorded():
+    manager, session = AdaptiveTimeoutManager(), _TimingOutSession()
+    _request(manager, session, RequestDeadline(0.5))
+    assert ('user', 'ttfb') not in manager.windows or not manager.windows[('user', 'ttfb')].samples
+    assert all(t <= 0.5 for t in session.timeouts[0])
@@ -0,0 +1,103 @@
+"""Routing policy reconcile against fake controllers, one per control port"""
+
+import types
+
+import pytest
+
+stem = pytest.importorskip('stem')
+
+import advanced_routing
+from advanced_routing import AdvancedCircuitRouting, parse_torrc_options
+from tor_anonymizer import UltimateTorAnonymizer
+
+class _FakeController:
+    def __init__(self, port, live=None, reject=False):
+        self.port = port
+        self.live = dict(live or {})
+        self.reject = reject
+        self.set_calls = []
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    def authenticate(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def get_conf_map(self, keys, multiple=True):
+        return {key: self.live.get(key, []) for key in keys}
+
+    def set_options(self, options):
+        self.set_calls.append(list(options))
+        if self.reject and len(self.set_calls) == 1:
+            raise stem.InvalidArguments('552', 'Unrecognized option')
+        for key, value in options:
+            self.live[key] = [value] if value is not None else []
+
+@pytest.fixture
+def controllers(monkeypatch, tmp_path):
+    """Fake Tor controllers by port; an unknown port refuses the connection"""
+    monkeypatch.chdir(tmp_path)
+    ports = {}
+
+    def from_port(address='127.0.0.1', port=9051):
+        if port not in ports:
+            raise stem.SocketError(f'connection refused on {port}')
+        return ports[port]
+
+    monkeypatch.setattr(advanced_routing.Controller, 'from_port', from_port)
+    return ports
+
+DESIRED = parse_torrc_options('StrictNodes 1\nGuardLifetime 30 days\nNumEntryGuards 3\n')
+
+def test_connect_controller_uses_configured_port(controllers, tmp_path):
+    controllers[9999] = _FakeController(9999)
+    (tmp_path / 'settings.json').write_text('{"control_port": 9999}', encoding='utf-8')
+    router = AdvancedCircuitRouting(str(tmp_path / 'settings.json'))
+    assert router.connect_controller()
+    assert router.controller is controllers[9999]
+
+def test_reconcile_sets_only_differences(controllers):
+    controllers[9051] = _FakeController(9051, {'StrictNodes': ['1'], 'GuardLifetime': ['2592000']})
+    result = AdvancedCircuitRouting().reconcile_tor_config(DESIRED)
+    assert result['applied'] and result['changed'] == ['NumEntryGuards']
+    assert controllers[9051].set_calls == [[('NumEntryGuards', '3')]]
+
+def test_rejected_options_are_rolled_back(controllers):
+    controllers[9051] = _FakeController(9051, {'NumEntryGuards': ['1']}, reject=True)
+    result = AdvancedCircuitRouting().reconcile_tor_config(DESIRED)
+    assert result['error'] and result['rolled_back'] and not result['applied']
+    rollback = dict(controllers[9051].set_calls[1])
+    assert rollback['NumEntryGuards'] == '1' and rollback['StrictNodes'] is None
+
+def test_reconcile_instances_applies_same_options_to_every_port(controllers):
+    controllers[9350] = _FakeController(9350)
+    controllers[9351] = _FakeController(9351)
+    results = AdvancedCircuitRouting().reconcile_instances([9350, 9351, 9352])
+
+    assert [result['control_port'] for result in results] == [9350, 9351, 9352]
+    assert results[0]['applied'] and results[1]['applied'] and 'refused' in results[2]['error']
+    assert controllers[9350].live == controllers[9351].live
+    assert controllers[9350].closed and controllers[9351].closed
+
+def test_anonymizer_reconciles_each_launched_instance(controllers):
+    controllers[9350] = _FakeController(9350)
+    controllers[9351] = _FakeController(9351)
+    launcher = types.SimpleNamespace(instances=[types.SimpleNamespace(control_port=9350),
+                                                types.SimpleNamespace(control_port=9351)],
+                                     extra_options={})
+    router = AdvancedCircuitRouting()
+    anonymizer = types.SimpleNamespace(tor_launcher=launcher, config={'control_port': 9051},
+                                       get_advanced_routing=lambda: router, logger=router.logger)
+
+    results = UltimateTorAnonymizer.apply_routing_policy(anonymizer, DESIRED)
+
+    assert [result['applied'] for result in results] == [True, True]
+    # Restarted instances come back with the same policy
+    assert launcher.extra_options == DESIRED
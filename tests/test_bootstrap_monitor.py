@@ -0,0 +1,103 @@
+"""Readiness from the controller's bootstrap status, driven by a fake controller"""
+
+import logging
+import threading
+import types
+
+import pytest
+
+pytest.importorskip('stem')
+
+from bootstrap_monitor import BootstrapMonitor, parse_bootstrap_phase
+from tor_anonymizer import UltimateTorAnonymizer
+
+def _phase(progress, tag, summary, extra=''):
+    return f'NOTICE BOOTSTRAP PROGRESS={progress} TAG={tag} SUMMARY="{summary}"{extra}'
+
+def _event(progress, tag, summary):
+    return types.SimpleNamespace(action='BOOTSTRAP', runlevel='NOTICE',
+                                 keyword_args={'PROGRESS': str(progress), 'TAG': tag, 'SUMMARY': summary})
+
+class _FakeController:
+    """Answers GETINFO with a fixed phase and replays `events` once a listener subscribes"""
+
+    def __init__(self, phase, events=()):
+        self.phase = phase
+        self.events = list(events)
+        self.listeners = []
+        self.polls = 0
+
+    def get_info(self, key):
+        assert key == 'status/bootstrap-phase'
+        self.polls += 1
+        return self.phase
+
+    def add_event_listener(self, listener, *event_types):
+        self.listeners.append(listener)
+        threading.Timer(0.05, lambda: [listener(event) for event in self.events]).start()
+
+    def remove_event_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def is_authenticated(self):
+        return True
+
+def test_parse_bootstrap_phase():
+    status = parse_bootstrap_phase(
+        'WARN BOOTSTRAP PROGRESS=10 TAG=conn_done SUMMARY="Connected to a relay" '
+        'WARNING="Connection refused" RECOMMENDATION=warn')
+    assert status == {'severity': 'WARN', 'progress': 10, 'tag': 'conn_done',
+                      'summary': 'Connected to a relay', 'warning': 'Connection refused',
+                      'recommendation': 'warn'}
+    assert parse_bootstrap_phase(None)['progress'] == 0
+
+def test_already_bootstrapped_needs_no_events():
+    controller = _FakeController(_phase(100, 'done', 'Done'))
+    assert BootstrapMonitor(controller).wait(5)
+    assert controller.listeners == [] and controller.polls == 1
+
+def test_events_drive_readiness_and_phase_timings():
+    controller = _FakeController(_phase(50, 'loading_descriptors', 'Loading relay descriptors'),
+                                 [_event(75, 'enough_dirinfo', 'Loaded enough directory info'),
+                                  _event(60, 'loading_descriptors', 'Stale event'),
+                                  _event(100, 'done', 'Done')])
+    monitor = BootstrapMonitor(controller)
+    assert monitor.wait(5)
+    stats = monitor.get_stats()
+    assert stats['progress'] == 100 and stats['elapsed'] < 5
+    assert [phase['tag'] for phase in stats['phases']] == ['loading_descriptors', 'enough_dirinfo']
+    assert controller.listeners == []
+
+def test_stuck_bootstrap_times_out_and_reports_problems():
+    controller = _FakeController(_phase(5, 'conn', 'Connecting to a relay',
+                                        ' WARNING="No route to host" RECOMMENDATION=warn'))
+    monitor = BootstrapMonitor(controller)
+    assert not monitor.wait(0.2)
+    assert monitor.get_stats()['problems'] == ['No route to host (warn)']
+    assert controller.listeners == []
+
+def _anonymizer(controller):
+    return types.SimpleNamespace(
+        controller=controller, config={'readiness_probe': False}, logger=logging.getLogger('test'),
+        tor_ready=False, bootstrap_status=None,
+        controller_authenticated=lambda: True,
+        wait_for_tor_http=lambda deadline, probe: 'socks fallback'
+    )
+
+def test_wait_for_tor_ready_uses_the_bootstrap_status():
+    anonymizer = _anonymizer(_FakeController(_phase(100, 'done', 'Done')))
+    assert UltimateTorAnonymizer.wait_for_tor_ready(anonymizer, timeout=5) is True
+    assert anonymizer.tor_ready and anonymizer.bootstrap_status['progress'] == 100
+
+def test_wait_for_tor_ready_fails_on_stuck_bootstrap():
+    anonymizer = _anonymizer(_FakeController(_phase(5, 'conn', 'Connecting to a relay')))
+    assert UltimateTorAnonymizer.wait_for_tor_ready(anonymizer, timeout=0.3) is False
+    assert not anonymizer.tor_ready and anonymizer.bootstrap_status['progress'] == 5
+
+class _RefusingController(_FakeController):
+    def get_info(self, key):
+        raise OSError('GETINFO refused')
+
+def test_wait_for_tor_ready_falls_back_without_bootstrap_status():
+    anonymizer = _anonymizer(_RefusingController(None))
+    assert UltimateTorAnonymizer.wait_for_tor_ready(anonymizer, timeout=5) == 'socks fallback'
@@ -0,0 +1,201 @@
+"""BulkFetcher bookkeeping with a stubbed fetch (no network)"""
+
+import threading
+import time
+
+from bulk_runner import BulkFetcher
+from crawl_journal import CrawlJournal
+from rate_limiter import RateLimiter
+from traffic_shaper import TrafficShaper
+from url_filter import BloomFilter
+
+class _Pool:
+    def __init__(self, shared=False):
+        self.count = 0
+        self.shared = shared
+
+    def acquire(self):
+        if not self.shared:
+            self.count += 1
+        return f'circuit-{self.count}', f'socks5h://u{self.count}:p@127.0.0.1:9050'
+
+class _Anonymizer:
+    is_running = True
+    config = {'max_retries': 3}
+
+    def __init__(self, rate_limits=None, delays=(), traffic_shaper=None, shared_circuit=False):
+        self.rate_limiter = RateLimiter({'enabled': False, **(rate_limits or {})})
+        self.pool = _Pool(shared_circuit)
+        self.delays = list(delays)
+        self.traffic_shaper = traffic_shaper
+        self.metrics = []
+
+    def reserve_artificial_delay(self, circuit, deadline=None, min_attempt=0.0):
+        return self.delays.pop(0) if self.delays else 0.0
+
+    def get_circuit_pool(self):
+        return self.pool
+
+    def get_circuit_key(self, session):
+        return session
+
+    def record_request_metric(self, name, amount=1):
+        self.metrics.append(name)
+
+class _Writer:
+    def __init__(self):
+        self.records = []
+        self.stats = {}
+        self.on_written = None
+
+    def submit(self, record):
+        self.records.append(record)
+        if self.on_written:
+            self.on_written([record])
+
+    def close(self):
+        pass
+
+class _StubFetcher(BulkFetcher):
+    def __init__(self, *args, statuses=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statuses = statuses or {}
+        self.calls = []
+        self.calls_lock = threading.Lock()
+        self.service_time = 0.0
+        self.active = self.peak = 0
+
+    def fetch_one(self, url, circuit=None, deadline=None):
+        with self.calls_lock:
+            self.calls.append((url, circuit, time.monotonic()))
+            queued = self.statuses.get(url)
+            status = queued.pop(0) if queued else 200
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.service_time)
+        with self.calls_lock:
+            self.active -= 1
+        return {'url': url, 'status': status, 'bytes': 1, 'complete': True}
+
+def test_journal_skips_do_not_stay_in_flight(tmp_path):
+    journal = CrawlJournal(str(tmp_path / 'job.db'))
+    journal.mark_done('http://example.com/done', 200)
+    journal.flush()
+    fetcher = _StubFetcher(_Anonymizer(), concurrency=2, journal=journal, seen_filter=BloomFilter(1000))
+    writer = _Writer()
+
+    summary = fetcher.run(iter(['http://example.com/done', 'http://example.com/new',
+                                'http://example.com/new']), writer)
+
+    assert summary['skipped'] == 1
+    assert summary['duplicates'] == 1
+    assert [record['url'] for record in writer.records] == ['http://example.com/new']
+    assert fetcher.in_flight == set()
+    journal.close()
+
+def test_throttled_host_is_deferred_not_slept():
+    # 2 requests/s for slow.example: its 2nd and 3rd URLs wait on the timer heap
+    fetcher = _StubFetcher(_Anonymizer({'enabled': True, 'host_rate': 2.0, 'host_burst': 1}), concurrency=2)
+    writer = _Writer()
+    start = time.monotonic()
+
+    summary = fetcher.run(iter(['http://slow.example/1', 'http://slow.example/2',
+                                'http://slow.example/3', 'http://fast.example/1']), writer)
+
+    order = [record['url'] for record in writer.records]
+    assert summary['ok'] == 4 and summary['deferred'] >= 2
+    # The fast host is not stuck behind workers sleeping on the slow one
+    assert order.index('http://fast.example/1') < order.index('http://slow.example/2')
+    slow = sorted(at for url, _, at in fetcher.calls if 'slow' in url)
+    assert slow[2] - start >= 0.9
+    assert fetcher.anonymizer.rate_limiter.stats['wait_seconds'] > 0
+
+def test_throttled_response_is_retried_on_the_same_circuit():
+    fetcher = _StubFetcher(_Anonymizer(), concurrency=1, statuses={'http://example.com/a': [429, 200]})
+    writer = _Writer()
+
+    summary = fetcher.run(iter(['http://example.com/a']), writer)
+
+    assert [record['status'] for record in writer.records] == [200]
+    assert summary['deferred'] == 1
+    assert len({circuit for _, circuit, _ in fetcher.calls}) == 1
+
+def test_rate_limit_wait_beyond_deadline_fails_the_url():
+    fetcher = _StubFetcher(_Anonymizer({'enabled': True, 'host_rate': 0.1, 'host_burst': 1}),
+                           concurrency=1, deadline=1.0)
+    writer = _Writer()
+
+    summary = fetcher.run(iter(['http://example.com/1', 'http://example.com/2']), writer)
+
+    assert summary['ok'] == 1 and summary['failed'] == 1
+    assert 'deadline' in writer.records[1]['error']
+    assert fetcher.anonymizer.metrics == ['deadline_misses']
+
+def test_artificial_delay_is_scheduled_not_slept():
+    fetcher = _StubFetcher(_Anonymizer(delays=[0.5]), concurrency=1)
+    writer = _Writer()
+    start = time.monotonic()
+
+    summary = fetcher.run(iter(['http://example.com/delayed', 'http://example.com/next']), writer)
+
+    # The one worker fetched the second URL while the first waited out its delay
+    assert [record['url'] for record in writer.records] == ['http://example.com/next', 'http://example.com/delayed']
+    assert summary['deferred'] == 1
+    assert fetcher.calls[1][2] - start >= 0.5
+
+def test_shaping_slot_parks_jobs_until_released():
+    # continuous_scrolling allows 2 requests in flight per session
+    shaper = TrafficShaper(lambda: 'continuous_scrolling')
+    fetcher = _StubFetcher(_Anonymizer(traffic_shaper=shaper, shared_circuit=True), concurrency=4)
+    fetcher.service_time = 0.1
+    writer = _Writer()
+
+    summary = fetcher.run(iter(f'http://example.com/{index}' for index in range(6)), writer)
+
+    assert summary['ok'] == 6
+    assert fetcher.peak == 2
+    assert shaper.get_stats()['waiting'] == 0
+    assert shaper.sessions[fetcher.anonymizer.get_circuit_key(fetcher.calls[0][1][1])].in_flight == 0
+
+def test_throttled_and_error_urls_are_retried_after_restart(tmp_path):
+    path = str(tmp_path / 'job.db')
+    urls = ['http://example.com/ok', 'http://example.com/throttled', 'http://example.com/broken']
+    journal = CrawlJournal(path)
+    fetcher = _StubFetcher(_Anonymizer(), concurrency=1, journal=journal, throttle_retries=0,
+                           statuses={urls[1]: [429], urls[2]: [503]})
+    summary = fetcher.run(iter(urls), _Writer())
+    journal.close()
+    assert summary['ok'] == 1 and summary['failed'] == 2
+
+    journal = CrawlJournal(path)
+    rerun = _StubFetcher(_Anonymizer(), concurrency=1, journal=journal)
+    summary = rerun.run(iter(urls), _Writer())
+    journal.close()
+
+    assert summary['skipped'] == 1
+    assert sorted(url for url, _, _ in rerun.calls) == sorted(urls[1:])
+
+def test_failed_urls_are_not_marked_seen():
+    seen = BloomFilter(1000)
+    urls = ['http://example.com/ok', 'http://example.com/flaky']
+    first = _StubFetcher(_Anonymizer(), concurrency=1, seen_filter=seen, throttle_retries=0,
+                         statuses={urls[1]: [500]})
+    first.run(iter(urls), _Writer())
+    assert first.in_flight == set()
+
+    second = _StubFetcher(_Anonymizer(), concurrency=1, seen_filter=seen)
+    summary = second.run(iter(urls), _Writer())
+
+    assert summary['duplicates'] == 1
+    assert [url for url, _, _ in second.calls] == [urls[1]]
+
+def test_url_without_response_is_retried_on_another_circuit():
+    fetcher = _StubFetcher(_Anonymizer(), concurrency=1, statuses={'http://example.com/a': [None, 200]})
+    writer = _Writer()
+
+    summary = fetcher.run(iter(['http://example.com/a']), writer)
+
+    assert [record['status'] for record in writer.records] == [200]
+    (_, first, at_first), (_, second, at_second) = fetcher.calls
+    assert first != second and at_second - at_first >= 1.0
+    assert summary['ok'] == 1 and summary['deferred'] == 1
@@ -0,0 +1,61 @@
+"""Bounded per-identity cookie jars and their persistence"""
+
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+from requests.cookies import create_cookie
+
+from cookie_jars import BoundedCookieJar, CookieJarRegistry
+
+def _cookie(name, value='v', domain='example.com', expires=None):
+    return create_cookie(name, value, domain=domain, path='/', expires=expires)
+
+def test_jar_evicts_expired_then_least_recently_set():
+    jar = BoundedCookieJar(max_cookies=3)
+    jar.set_cookie(_cookie('stale', expires=int(time.time()) - 10))
+    for name in ('a', 'b', 'c'):
+        jar.set_cookie(_cookie(name))
+    assert sorted(c.name for c in jar) == ['a', 'b', 'c']
+
+    jar.set_cookie(_cookie('a', 'again'))
+    jar.set_cookie(_cookie('d'))
+    assert sorted(c.name for c in jar) == ['a', 'c', 'd']
+    assert jar.evicted == 1
+
+def test_jar_refuses_oversized_cookies():
+    jar = BoundedCookieJar(max_cookie_bytes=16)
+    jar.set_cookie(_cookie('big', 'x' * 32))
+    assert len(jar) == 0 and jar.refused == 1
+
+def test_registry_drops_least_recently_used_jar_and_clears_in_place():
+    registry = CookieJarRegistry(max_jars=2)
+    first = registry.jar('one')
+    first.set_cookie(_cookie('a'))
+    registry.jar('two')
+    registry.jar('one')
+    registry.jar('three')
+    assert list(registry.jars) == ['one', 'three']
+
+    registry.clear('one')
+    assert len(first) == 0 and registry.jar('one') is first
+
+def test_save_load_round_trip_keeps_only_the_shared_identity(tmp_path):
+    path = str(tmp_path / 'cookies.json')
+    expires = int(time.time()) + 3600
+    registry = CookieJarRegistry(path=path)
+    shared = registry.jar('shared')
+    shared.set_cookie(_cookie('persistent', 'kept', expires=expires))
+    shared.set_cookie(_cookie('session_only'))
+    registry.jar('iso0123456789abcdef').set_cookie(_cookie('per_run', expires=expires))
+    registry.save()
+
+    restored = CookieJarRegistry(path=path)
+
+    assert list(restored.jars) == ['shared']
+    cookies = {c.name: c for c in restored.jar('shared')}
+    assert set(cookies) == {'persistent'}
+    assert cookies['persistent'].value == 'kept' and cookies['persistent'].expires == expires
+    assert restored.get_stats()['restored'] == 1
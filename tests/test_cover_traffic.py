@@ -0,0 +1,86 @@
+"""CoverTrafficEngine stays inside its byte/request budget and yields to real traffic"""
+
+import queue
+import time
+import types
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from cover_traffic import HEADER_OVERHEAD, CoverTrafficEngine
+
+def _anonymizer(honour_range=True):
+    requested = []
+
+    def adaptive_request(dest_class, url, session=None, method='GET', headers=None, **kwargs):
+        requested.append((method, dict(headers or {})))
+        return session.request(method, url, headers=headers if honour_range else None, timeout=10, **kwargs)
+
+    return types.SimpleNamespace(
+        is_running=True, last_real_request=None, request_executor=None,
+        create_isolated_session=lambda key: requests.Session(),
+        get_circuit_key=lambda session: 'cover',
+        reserve_artificial_delay=lambda circuit: 0.0,
+        adaptive_request=adaptive_request, requested=requested
+    )
+
+def test_range_fetch_costs_headers_plus_range(origin):
+    anonymizer = _anonymizer()
+    engine = CoverTrafficEngine(anonymizer, {'sites': [f'{origin}/page'], 'range_bytes': 4096})
+    assert engine.fetch_once() == HEADER_OVERHEAD + 4096
+    assert anonymizer.requested == [('GET', {'Range': 'bytes=0-4095'})]
+    engine.stop()
+
+def test_body_is_cut_off_when_range_is_ignored(origin):
+    engine = CoverTrafficEngine(_anonymizer(honour_range=False),
+                                {'sites': [f'{origin}/page'], 'range_bytes': 4096})
+    assert engine.fetch_once() == HEADER_OVERHEAD + 4096
+    engine.stop()
+
+def test_head_mode_costs_only_headers(origin):
+    anonymizer = _anonymizer()
+    engine = CoverTrafficEngine(anonymizer, {'sites': [f'{origin}/page'], 'mode': 'head'})
+    assert engine.fetch_once() == HEADER_OVERHEAD
+    assert anonymizer.requested[0][0] == 'HEAD'
+    engine.stop()
+
+def test_byte_budget_allows_one_fetch_then_refuses():
+    engine = CoverTrafficEngine(_anonymizer(), {'bytes_per_sec': 100, 'range_bytes': 4096})
+    assert engine._take_budget()
+    assert not engine._take_budget()
+
+def test_zero_budget_stops_cover_traffic():
+    engine = CoverTrafficEngine(_anonymizer(), {'bytes_per_sec': 10 ** 9})
+    assert engine._take_budget()
+    engine.set_budget(0, 10 ** 9)
+    assert not engine._take_budget()
+    engine.set_budget(60, 0)
+    assert not engine._take_budget()
+
+def test_yields_to_recent_or_queued_real_traffic():
+    anonymizer = _anonymizer()
+    engine = CoverTrafficEngine(anonymizer, {'yield_window': 2.0, 'yield_queue_depth': 1})
+    assert not engine._should_yield()
+    anonymizer.last_real_request = time.monotonic()
+    assert engine._should_yield()
+    anonymizer.last_real_request = time.monotonic() - 5
+    anonymizer.request_executor = types.SimpleNamespace(queue=queue.Queue())
+    assert not engine._should_yield()
+    anonymizer.request_executor.queue.put('job')
+    assert engine._should_yield()
+
+class _CountingEngine(CoverTrafficEngine):
+    def fetch_once(self):
+        return self._request_cost()
+
+def test_running_engine_stays_within_budget():
+    # Slots come far faster than the byte budget can pay for them
+    engine = _CountingEngine(_anonymizer(), {'requests_per_min': 60000, 'bytes_per_sec': 1000,
+                                             'range_bytes': 1000})
+    engine.start()
+    time.sleep(0.5)
+    engine.stop()
+    stats = engine.get_stats()
+    assert stats['requests'] == 1 and stats['bytes'] == HEADER_OVERHEAD + 1000
+    assert stats['over_budget'] > 0
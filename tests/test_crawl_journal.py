@@ -0,0 +1,69 @@
+"""CrawlJournal batching, state transitions and what survives a restart"""
+
+import sqlite3
+
+import pytest
+
+from crawl_journal import CrawlJournal
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CrawlJournal(str(tmp_path / 'journal.db'), batch_size=3, flush_interval=3600)
+    yield journal
+    journal.close()
+
+def _row(journal, url):
+    with sqlite3.connect(journal.path) as db:
+        return db.execute("SELECT state, attempts, status, error FROM urls WHERE url = ?", (url,)).fetchone()
+
+def test_database_uses_wal(journal):
+    with sqlite3.connect(journal.path) as db:
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+def test_updates_are_committed_in_batches(journal):
+    journal.mark_started('http://a/')
+    journal.mark_started('http://b/')
+    assert journal.stats['commits'] == 0 and _row(journal, 'http://a/') is None
+    journal.mark_done('http://a/', status=200)
+    assert journal.stats['commits'] == 1 and journal.stats['writes'] == 3
+    assert journal.is_done('http://a/') and not journal.is_done('http://b/')
+
+def test_state_transitions_keep_attempts_and_status(journal):
+    journal.mark_started('http://a/')
+    journal.mark_failed('http://a/', error='timeout', status=503)
+    journal.mark_started('http://a/')
+    journal.mark_done('http://a/')
+    journal.flush()
+    # A retry counts as another attempt; a done entry keeps the last known status and clears the error
+    assert _row(journal, 'http://a/') == ('done', 2, 503, None)
+
+def test_summary_counts_states(journal):
+    journal.mark_done('http://a/', status=200)
+    journal.mark_failed('http://b/', status=429)
+    journal.mark_started('http://c/')
+    journal.mark_started('http://d/')
+    summary = journal.get_summary()
+    assert summary['states'] == {'done': 1, 'failed': 1, 'started': 2}
+    assert summary['writes'] == 4
+
+def test_restart_keeps_flushed_state_only(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    crashed = CrawlJournal(path, batch_size=100, flush_interval=3600)
+    crashed.mark_done('http://a/', status=200)
+    crashed.flush()
+    crashed.mark_done('http://b/', status=200)  # Never flushed: lost with the process
+
+    restarted = CrawlJournal(path)
+    try:
+        assert restarted.is_done('http://a/') and not restarted.is_done('http://b/')
+    finally:
+        restarted.close()
+        crashed.db.close()
+
+def test_closed_journal_ignores_late_updates(journal):
+    journal.mark_done('http://a/')
+    journal.close()
+    journal.mark_done('http://b/')
+    journal.flush()
+    assert not journal.is_done('http://a/')
+    assert _row(journal, 'http://a/')[0] == 'done' and _row(journal, 'http://b/') is None
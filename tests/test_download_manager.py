@@ -0,0 +1,183 @@
+"""EnterpriseDownloadManager against the local origin, with a stub anonymizer issuing plain requests"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from conftest import BODY, _OriginHandler
+from download_manager import EnterpriseDownloadManager
+from request_deadline import RequestDeadline
+
+class _Anonymizer:
+    def __init__(self, **config):
+        self.config = {'stream_chunk_size': 4096, **config}
+        self.metrics = []
+        self.requests = []
+
+    def record_request_metric(self, name, amount=1):
+        self.metrics.append(name)
+
+    def create_isolated_session(self):
+        return requests.Session()
+
+    def make_enterprise_stealth_request(self, url, method='GET', deadline=None, session=None,
+                                        headers=None, max_retries=None, stream=False, **kwargs):
+        self.requests.append(dict(headers or {}))
+        try:
+            return (session or requests).request(method, url, headers=headers, stream=stream, timeout=10)
+        except requests.RequestException:
+            return None
+
+@pytest.fixture
+def downloader():
+    return EnterpriseDownloadManager(_Anonymizer())
+
+def test_stream_to_sink_hashes_the_body(downloader, origin, tmp_path):
+    result = downloader.stream_to_sink(f'{origin}/file', tmp_path / 'body.bin', hash_algorithm='sha256')
+    assert result['complete'] and result['error'] is None and result['status_code'] == 200
+    assert (tmp_path / 'body.bin').read_bytes() == BODY
+    assert result['hash'] == hashlib.sha256(BODY).hexdigest()
+
+def test_error_status_is_not_written(downloader, origin, tmp_path):
+    result = downloader.stream_to_sink(f'{origin}/missing', tmp_path / 'body.bin', hash_algorithm='sha256')
+    assert not result['complete'] and result['status_code'] == 404
+    assert result['error'] == 'HTTP 404' and result['hash'] is None
+    assert not (tmp_path / 'body.bin').exists()
+
+def test_unopenable_path_is_reported(downloader, origin, tmp_path):
+    result = downloader.stream_to_sink(f'{origin}/file', tmp_path / 'no-such-dir' / 'body.bin')
+    assert not result['complete'] and 'No such file' in result['error']
+
+def test_stream_stops_at_the_deadline(downloader, origin, tmp_path):
+    # The first chunk's progress report outlasts the whole budget
+    result = downloader.stream_to_sink(f'{origin}/file', tmp_path / 'body.bin', deadline=RequestDeadline(0.5),
+                                       progress_callback=lambda done, total: time.sleep(0.6))
+    assert not result['complete'] and result['error'] == 'deadline exceeded'
+    assert 0 < result['bytes'] < len(BODY)
+    assert downloader.anonymizer.metrics == ['deadline_misses']
+
+class _StuckSink:
+    def write(self, data):
+        return 0
+
+def test_sink_accepting_nothing_fails_instead_of_spinning(downloader, origin):
+    result = downloader.stream_to_sink(f'{origin}/file', _StuckSink())
+    assert not result['complete'] and 'no bytes' in result['error']
+
+def test_raw_fd_sink(downloader, origin, tmp_path):
+    fd = os.open(tmp_path / 'body.bin', os.O_WRONLY | os.O_CREAT)
+    try:
+        assert downloader.stream_to_sink(f'{origin}/file', fd)['complete']
+    finally:
+        os.close(fd)
+    assert (tmp_path / 'body.bin').read_bytes() == BODY
+
+class _ProbeOnlyHandler(_OriginHandler):
+    """Answers the one-byte probe with 206 but every other range with the full body"""
+
+    def do_GET(self):
+        if self.headers.get('Range') not in (None, 'bytes=0-0'):
+            del self.headers['Range']
+        super().do_GET()
+
+@pytest.fixture
+def probe_only_origin():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ProbeOnlyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+def test_segmented_download_reports_partial_responses(downloader, origin, tmp_path):
+    result = downloader.segmented_download(f'{origin}/file', tmp_path / 'body.bin', circuits=3)
+    assert result['status_code'] == 206 and result['bytes'] == len(BODY)
+    assert (tmp_path / 'body.bin').read_bytes() == BODY
+
+def test_segmented_download_falls_back_when_ranges_are_ignored(downloader, probe_only_origin, tmp_path):
+    result = downloader.segmented_download(f'{probe_only_origin}/file', tmp_path / 'body.bin',
+                                           circuits=3, hash_algorithm='sha256')
+    assert result['status_code'] == 200 and result['bytes'] == len(BODY)
+    assert result['hash'] == hashlib.sha256(BODY).hexdigest()
+    assert (tmp_path / 'body.bin').read_bytes() == BODY
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['body.bin']
+
+class _VersionedHandler(BaseHTTPRequestHandler):
+    """Serves BODY with a strong ETag, honouring Range only while If-Range still matches"""
+    protocol_version = 'HTTP/1.1'
+    etag = '"v1"'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.seen.append(dict(self.headers))
+        start = 0
+        byte_range = self.headers.get('Range')
+        if byte_range and self.headers.get('If-Range', self.etag) == self.etag:
+            start = int(byte_range.split('=', 1)[1].partition('-')[0])
+        body = BODY[start:]
+        self.send_response(206 if start else 200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(body)))
+        if start:
+            self.send_header('Content-Range', f'bytes {start}-{len(BODY) - 1}/{len(BODY)}')
+        self.end_headers()
+        if self.server.cut_after is not None:
+            # Drop the connection mid-body, as a dying circuit would
+            self.wfile.write(body[:self.server.cut_after])
+            self.server.cut_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+@pytest.fixture
+def versioned_origin():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _VersionedHandler)
+    server.seen, server.cut_after = [], None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', server
+    server.shutdown()
+    server.server_close()
+
+def _seed_partial(dest, url, done, etag):
+    dest.with_name(dest.name + '.part').write_bytes(BODY[:done])
+    dest.with_name(dest.name + '.part.json').write_text(json.dumps(
+        {'url': url, 'etag': etag, 'last_modified': None, 'total': len(BODY), 'bytes_done': done}))
+
+def test_resume_continues_from_the_sidecar(downloader, versioned_origin, tmp_path):
+    url, server = versioned_origin
+    dest = tmp_path / 'body.bin'
+    _seed_partial(dest, f'{url}/file', 50000, '"v1"')
+    result = downloader.resumable_download(f'{url}/file', dest, hash_algorithm='sha256')
+    assert result['status_code'] == 206 and result['resumed_from'] == 50000
+    assert server.seen[0]['Range'] == 'bytes=50000-' and server.seen[0]['If-Range'] == '"v1"'
+    assert dest.read_bytes() == BODY and result['hash'] == hashlib.sha256(BODY).hexdigest()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['body.bin']
+
+def test_changed_resource_restarts_from_zero(downloader, versioned_origin, tmp_path):
+    url, server = versioned_origin
+    dest = tmp_path / 'body.bin'
+    _seed_partial(dest, f'{url}/file', 50000, '"v0"')
+    result = downloader.resumable_download(f'{url}/file', dest)
+    assert result['status_code'] == 200 and result['bytes'] == len(BODY)
+    assert server.seen[0]['If-Range'] == '"v0"'
+    assert dest.read_bytes() == BODY
+
+def test_interrupted_transfer_resumes_with_a_range(downloader, versioned_origin, tmp_path):
+    url, server = versioned_origin
+    server.cut_after = 40000
+    dest = tmp_path / 'body.bin'
+    result = downloader.resumable_download(f'{url}/file', dest)
+    assert result['resumes'] == 1 and result['status_code'] == 206
+    assert 'Range' not in server.seen[0]
+    offset = int(server.seen[1]['Range'][len('bytes='):-1])
+    assert 0 < offset <= 40000
+    assert server.seen[1]['If-Range'] == '"v1"'
+    assert dest.read_bytes() == BODY
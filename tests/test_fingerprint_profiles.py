@@ -0,0 +1,30 @@
+"""Generated and fallback headers only advertise what the HTTP client can decode"""
+
+import random
+import types
+
+import pytest
+
+import fingerprint_profiles
+import leak_protection
+from fingerprint_profiles import BROWSERS, build_headers, generate_profile
+
+def test_accept_encoding_matches_decoder_support():
+    rng = random.Random(0)
+    for browser in BROWSERS:
+        encodings = build_headers(generate_profile(rng, browser))['Accept-Encoding'].split(', ')
+        assert {'gzip', 'deflate'} <= set(encodings)
+        assert ('br' in encodings) == fingerprint_profiles.BROTLI_AVAILABLE
+
+def test_fallback_headers_use_the_same_encodings(tmp_path, monkeypatch):
+    pytest.importorskip('requests')
+    from tor_anonymizer import UltimateTorAnonymizer
+
+    anonymizer = types.SimpleNamespace(config={'anti_fingerprinting': False, 'random_user_agent': False,
+                                               'user_agent': 'test-agent'})
+    headers = UltimateTorAnonymizer.get_session_headers(anonymizer)
+    assert headers['Accept-Encoding'] == fingerprint_profiles.ACCEPT_ENCODING
+
+    monkeypatch.chdir(tmp_path)
+    protection = leak_protection.AdvancedFingerprintingProtection()
+    assert protection.get_stealth_headers()['Accept-Encoding'] == fingerprint_profiles.ACCEPT_ENCODING
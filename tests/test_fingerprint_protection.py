@@ -0,0 +1,21 @@
+"""Public header getters hand out mutable copies; the pinned template stays intact"""
+
+from fingerprint_protection import AdvancedFingerprintingProtection
+
+def test_stealth_headers_are_a_mutable_copy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    protection = AdvancedFingerprintingProtection()
+
+    headers = protection.get_stealth_headers('session')
+    headers['Referer'] = 'https://example.com/'
+    headers.update({'DNT': '1'})
+
+    assert isinstance(headers, dict)
+    template = protection.get_header_template('session')
+    assert 'Referer' not in template and list(template) == list(headers)[:len(template)]
+    assert protection.get_stealth_headers('session')['User-Agent'] == headers['User-Agent']
+
+def test_comprehensive_protection_headers_are_a_dict(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    protections = AdvancedFingerprintingProtection().get_comprehensive_protection('session')
+    protections['headers']['Referer'] = 'https://example.com/'
@@ -0,0 +1,86 @@
+"""RequestDeadline arithmetic and its propagation into request timeouts and attempts"""
+
+import logging
+import time
+import types
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from request_deadline import RequestDeadline
+from tor_anonymizer import UltimateTorAnonymizer
+
+def test_unbounded_deadline_never_limits():
+    deadline = RequestDeadline.coerce(None)
+    assert deadline.remaining() is None and not deadline.expired()
+    assert deadline.allows(1e9)
+    assert deadline.clamp_timeout((5, 30)) == (5, 30) and deadline.clamp_timeout(None) is None
+
+def test_coerce_shares_an_existing_deadline():
+    deadline = RequestDeadline(10)
+    assert RequestDeadline.coerce(deadline) is deadline
+    assert RequestDeadline.coerce(10).budget == 10
+
+def test_clamp_timeout_caps_every_phase():
+    deadline = RequestDeadline(2)
+    connect, read = deadline.clamp_timeout((5, 30))
+    assert 1.5 < connect <= 2 and 1.5 < read <= 2
+    assert deadline.clamp_timeout((0.5, None))[0] == 0.5
+    assert deadline.clamp_timeout((0.5, None))[1] <= 2
+    assert deadline.clamp_timeout(1) == 1
+    assert deadline.clamp_timeout(None) <= 2
+    assert deadline.allows(1) and not deadline.allows(3)
+
+def test_expiry():
+    deadline = RequestDeadline(0.05)
+    assert not deadline.expired()
+    time.sleep(0.06)
+    assert deadline.expired() and deadline.remaining() == 0.0
+    assert deadline.clamp_timeout((5, 30)) == (0.0, 0.0)
+
+class _Timeouts:
+    def __init__(self):
+        self.observed = []
+
+    def get_request_timeout(self, dest_class):
+        return (5, 30)
+
+    def observe_timeout(self, dest_class, timeout):
+        self.observed.append(timeout)
+
+class _TimingOutSession:
+    def __init__(self):
+        self.timeouts = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        raise requests.exceptions.ReadTimeout()
+
+def test_adaptive_request_clamps_and_does_not_learn_from_clamped_timeouts():
+    anonymizer = types.SimpleNamespace(session=None, timeouts=_Timeouts())
+    session = _TimingOutSession()
+    with pytest.raises(requests.exceptions.Timeout):
+        UltimateTorAnonymizer.adaptive_request(anonymizer, 'user', 'http://example.com/',
+                                               session=session, deadline=RequestDeadline(1))
+    assert all(t <= 1 for t in session.timeouts[0])
+    assert anonymizer.timeouts.observed == []
+
+    with pytest.raises(requests.exceptions.Timeout):
+        UltimateTorAnonymizer.adaptive_request(anonymizer, 'user', 'http://example.com/',
+                                               session=session, deadline=RequestDeadline(None))
+    assert session.timeouts[1] == (5, 30) and anonymizer.timeouts.observed == [(5, 30)]
+
+def test_exhausted_deadline_makes_no_attempt():
+    metrics = []
+    anonymizer = types.SimpleNamespace(
+        is_running=True, session=object(), logger=logging.getLogger('test'),
+        config={'max_retries': 3, 'deadline_min_attempt': 1.0},
+        record_request_metric=lambda name, amount=1: metrics.append(name),
+        get_circuit_key=lambda session: 'circuit',
+        adaptive_request=lambda *args, **kwargs: pytest.fail('attempt made past the deadline')
+    )
+    response = UltimateTorAnonymizer.make_enterprise_stealth_request(
+        anonymizer, 'http://example.com/', deadline=0.5, apply_delay=False, use_cache=False)
+    assert response is None
+    assert 'deadline_misses' in metrics and 'requests_failed' in metrics
@@ -0,0 +1,155 @@
+"""PriorityRequestExecutor ordering, expiry, deferral and backpressure with a stub anonymizer"""
+
+import io
+import queue
+import threading
+import time
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from rate_limiter import RateLimiter
+from request_executor import (PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_NORMAL,
+                              PriorityRequestExecutor)
+
+class _Pool:
+    def __init__(self):
+        self.count = 0
+
+    def acquire(self):
+        self.count += 1
+        return f'circuit-{self.count}', f'socks5h://u{self.count}:p@127.0.0.1:9050'
+
+def _response(status):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO()
+    return response
+
+class _Anonymizer:
+    config = {'max_retries': 2}
+    traffic_shaper = None
+
+    def __init__(self, statuses=None, delays=()):
+        self.rate_limiter = RateLimiter({'enabled': False})
+        self.pool = _Pool()
+        self.statuses = statuses or {}
+        self.delays = list(delays)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls = []
+        self.metrics = []
+
+    def get_circuit_pool(self):
+        return self.pool
+
+    def get_circuit_key(self, session):
+        return session
+
+    def reserve_artificial_delay(self, circuit, deadline=None, min_attempt=0.0):
+        return self.delays.pop(0) if self.delays else 0.0
+
+    def record_request_metric(self, name, amount=1):
+        self.metrics.append(name)
+
+    def make_enterprise_stealth_request(self, url, method='GET', deadline=None, session=None, **kwargs):
+        self.gate.wait()
+        self.calls.append((url, session, kwargs))
+        queued = self.statuses.get(url)
+        status = queued.pop(0) if queued else 200
+        return _response(status) if status is not None else None
+
+@pytest.fixture
+def anonymizer():
+    return _Anonymizer()
+
+@pytest.fixture
+def executor(anonymizer):
+    executor = PriorityRequestExecutor(anonymizer, workers=1, max_queue=4)
+    yield executor
+    anonymizer.gate.set()
+    executor.shutdown()
+
+def _occupy(executor, anonymizer):
+    """Hold the only worker inside a request until the gate opens"""
+    anonymizer.gate.clear()
+    busy = executor.submit('http://example.com/busy')
+    while not busy.running():
+        time.sleep(0.01)
+    return busy
+
+def test_lower_priority_numbers_run_first(executor, anonymizer):
+    _occupy(executor, anonymizer)
+    futures = [executor.submit(f'http://example.com/{name}', priority=priority)
+               for name, priority in (('background', PRIORITY_BACKGROUND), ('normal', PRIORITY_NORMAL),
+                                      ('interactive', PRIORITY_INTERACTIVE), ('normal2', PRIORITY_NORMAL))]
+    anonymizer.gate.set()
+    for future in futures:
+        assert future.result(timeout=5).status_code == 200
+    assert [url.rsplit('/', 1)[1] for url, _, _ in anonymizer.calls] == \
+        ['busy', 'interactive', 'normal', 'normal2', 'background']
+    # Paced by the executor: the anonymizer must neither wait nor retry
+    assert all(kwargs == {'rate_limit': False, 'apply_delay': False} for _, _, kwargs in anonymizer.calls)
+
+def test_job_expiring_in_the_queue_never_reaches_the_network(executor, anonymizer):
+    _occupy(executor, anonymizer)
+    late = executor.submit('http://example.com/late', deadline=0.05)
+    time.sleep(0.1)
+    anonymizer.gate.set()
+    with pytest.raises(TimeoutError):
+        late.result(timeout=5)
+    assert 'http://example.com/late' not in [url for url, _, _ in anonymizer.calls]
+    assert executor.get_stats()['expired'] == 1 and anonymizer.metrics == ['deadline_misses']
+
+def test_full_queue_pushes_back(executor, anonymizer):
+    _occupy(executor, anonymizer)
+    for i in range(4):
+        executor.submit(f'http://example.com/{i}')
+    with pytest.raises(queue.Full):
+        executor.submit('http://example.com/overflow', block=False)
+    with pytest.raises(queue.Full):
+        executor.submit('http://example.com/overflow', timeout=0.05)
+
+def test_delayed_job_does_not_park_the_worker(anonymizer):
+    anonymizer.delays = [0.3]
+    executor = PriorityRequestExecutor(anonymizer, workers=1)
+    try:
+        delayed = executor.submit('http://example.com/delayed')
+        prompt = executor.submit('http://example.com/prompt')
+        assert prompt.result(timeout=5).status_code == 200
+        assert not delayed.done()
+        assert delayed.result(timeout=5).status_code == 200
+        assert [url for url, _, _ in anonymizer.calls] == ['http://example.com/prompt', 'http://example.com/delayed']
+        assert executor.get_stats()['deferred'] == 1
+    finally:
+        executor.shutdown()
+
+def test_failed_request_is_retried_on_another_circuit(executor, anonymizer):
+    anonymizer.statuses = {'http://example.com/flaky': [None, 200]}
+    assert executor.submit('http://example.com/flaky').result(timeout=5).status_code == 200
+    sessions = [session for _, session, _ in anonymizer.calls]
+    assert len(sessions) == 2 and sessions[0] != sessions[1]
+
+def test_retries_are_bounded_by_max_retries(executor, anonymizer):
+    anonymizer.statuses = {'http://example.com/down': [None, None, None]}
+    assert executor.submit('http://example.com/down').result(timeout=5) is None
+    assert len(anonymizer.calls) == 2 and executor.get_stats()['failed'] == 1
+
+def test_throttled_request_is_redispatched_on_the_same_circuit(executor, anonymizer):
+    anonymizer.statuses = {'http://example.com/busy-host': [429, 200]}
+    assert executor.submit('http://example.com/busy-host').result(timeout=5).status_code == 200
+    sessions = [session for _, session, _ in anonymizer.calls]
+    assert len(sessions) == 2 and sessions[0] == sessions[1]
+
+def test_shutdown_fails_deferred_jobs(anonymizer):
+    anonymizer.delays = [60]
+    executor = PriorityRequestExecutor(anonymizer, workers=1)
+    parked = executor.submit('http://example.com/parked')
+    while executor.get_stats()['deferred'] == 0:
+        time.sleep(0.01)
+    executor.shutdown()
+    with pytest.raises(RuntimeError):
+        parked.result(timeout=5)
+    with pytest.raises(RuntimeError):
+        executor.submit('http://example.com/after')
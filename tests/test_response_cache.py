@@ -0,0 +1,84 @@
+"""Cached responses keep Content-Encoding exactly when the stored body is still encoded,
+and are only served to requests that would have selected the same representation"""
+
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from response_cache import EnterpriseResponseCache, cacheable_request
+
+BODY = b'cached page ' * 100
+
+class _EncodingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        coding, _, vary = self.path.strip('/').partition('/vary/')
+        # gzip is decoded by urllib3; x-custom never is
+        body = gzip.compress(BODY) if coding == 'gzip' else BODY
+        self.send_response(200)
+        self.send_header('Content-Encoding', coding)
+        if vary:
+            self.send_header('Vary', vary)
+        self.send_header('Cache-Control', 'max-age=60')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def encoded_origin():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _EncodingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+def _round_trip(tmp_path, url):
+    cache = EnterpriseResponseCache(str(tmp_path / 'cache'))
+    cache.store('identity', 'GET', url, requests.get(url))
+    entry = cache.lookup('identity', 'GET', url)
+    assert entry and cache.is_fresh(entry)
+    return cache.build_response(entry)
+
+def test_decoded_body_drops_content_encoding(tmp_path, encoded_origin):
+    response = _round_trip(tmp_path, f'{encoded_origin}/gzip')
+    assert response.content == BODY
+    assert 'Content-Encoding' not in response.headers
+
+def test_undecoded_body_keeps_content_encoding(tmp_path, encoded_origin):
+    response = _round_trip(tmp_path, f'{encoded_origin}/x-custom')
+    assert response.content == BODY
+    assert response.headers['Content-Encoding'] == 'x-custom'
+
+def test_identities_do_not_share_entries(tmp_path, encoded_origin):
+    url = f'{encoded_origin}/gzip'
+    cache = EnterpriseResponseCache(str(tmp_path / 'cache'))
+    cache.store('before-rotation', 'GET', url, requests.get(url))
+    assert cache.lookup('before-rotation', 'GET', url)
+    assert cache.lookup('after-rotation', 'GET', url) is None
+
+def test_vary_mismatch_is_a_miss(tmp_path, encoded_origin):
+    url = f'{encoded_origin}/gzip/vary/Accept-Encoding,Accept-Language'
+    cache = EnterpriseResponseCache(str(tmp_path / 'cache'))
+    cache.store('identity', 'GET', url, requests.get(url, headers={'Accept-Language': 'en-US'}))
+    sent = requests.Session().headers
+    assert cache.lookup('identity', 'GET', url, {**sent, 'Accept-Language': 'en-US'})
+    assert cache.lookup('identity', 'GET', url, {**sent, 'Accept-Language': 'de-DE'}) is None
+    assert cache.lookup('identity', 'GET', url, sent) is None
+    assert cache.get_stats()['misses'] == 2
+
+def test_range_and_credentialed_requests_bypass_the_cache():
+    assert cacheable_request({'Accept': '*/*'})
+    assert cacheable_request(None)
+    assert not cacheable_request({'range': 'bytes=0-99'})
+    assert not cacheable_request({'Authorization': 'Basic Zm9vOmJhcg=='})
+    assert not cacheable_request({'If-None-Match': '"v1"'})
+    # A None override removes the header rather than sending it
+    assert cacheable_request({'Range': None})
@@ -0,0 +1,127 @@
+"""BackgroundResultWriter batching and backpressure, the sinks, and the content-addressed store"""
+
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from result_sinks import (PARQUET_AVAILABLE, BackgroundResultWriter, ContentStore, JsonlResultSink,
+                          ParquetResultSink, ResultSink, SqliteResultSink, open_result_sink)
+
+class _RecordingSink(ResultSink):
+    def __init__(self, gate=None, fail=False):
+        self.batches = []
+        self.gate = gate
+        self.fail = fail
+        self.closed = False
+
+    def write_batch(self, records):
+        if self.gate:
+            self.gate.wait()
+        if self.fail:
+            raise OSError('disk full')
+        self.batches.append([r['url'] for r in records])
+
+    def close(self):
+        self.closed = True
+
+def _records(count):
+    return [{'url': f'http://example.com/{i}', 'status': 200} for i in range(count)]
+
+def test_records_are_written_in_batches():
+    sink = _RecordingSink()
+    written = []
+    writer = BackgroundResultWriter(sink, batch_size=3, flush_interval=3600, on_written=written.append)
+    for record in _records(7):
+        writer.submit(record)
+    writer.close()
+    assert [len(batch) for batch in sink.batches] == [3, 3, 1]
+    assert [len(batch) for batch in written] == [3, 3, 1]
+    assert writer.stats['written'] == 7 and writer.stats['batches'] == 3 and sink.closed
+
+def test_partial_batch_is_flushed_by_age():
+    sink = _RecordingSink()
+    writer = BackgroundResultWriter(sink, batch_size=100, flush_interval=0.05)
+    try:
+        writer.submit(_records(1)[0])
+        time.sleep(0.3)
+        assert sink.batches == [['http://example.com/0']]
+    finally:
+        writer.close()
+
+def test_full_queue_blocks_the_submitter():
+    gate = threading.Event()
+    writer = BackgroundResultWriter(_RecordingSink(gate=gate), max_queue=1, batch_size=1, flush_interval=3600)
+    threading.Timer(0.3, gate.set).start()
+    for record in _records(3):
+        writer.submit(record)
+    writer.close()
+    assert writer.stats['blocked_seconds'] > 0.1 and writer.stats['written'] == 3
+
+def test_failed_batch_is_not_reported_written():
+    written = []
+    writer = BackgroundResultWriter(_RecordingSink(fail=True), batch_size=2, on_written=written.append)
+    for record in _records(2):
+        writer.submit(record)
+    writer.close()
+    assert written == [] and writer.stats['written'] == 0
+
+def test_submit_after_close_is_dropped():
+    sink = _RecordingSink()
+    writer = BackgroundResultWriter(sink)
+    writer.close()
+    writer.submit(_records(1)[0])
+    assert writer.stats['submitted'] == 0 and sink.batches == []
+
+def test_jsonl_sink_writes_one_object_per_line():
+    stream = io.StringIO()
+    sink = JsonlResultSink(stream)
+    sink.write_batch(_records(2))
+    sink.close()
+    assert [json.loads(line)['url'] for line in stream.getvalue().splitlines()] == \
+        ['http://example.com/0', 'http://example.com/1']
+
+def test_sqlite_sink_keeps_unknown_fields_as_extra(tmp_path):
+    sink = open_result_sink(str(tmp_path / 'results.db'))
+    assert isinstance(sink, SqliteResultSink)
+    sink.write_batch([{'url': 'http://example.com/', 'status': 200, 'attempt': 2}])
+    sink.close()
+    with sqlite3.connect(tmp_path / 'results.db') as db:
+        url, status, extra = db.execute("SELECT url, status, extra FROM results").fetchone()
+    assert (url, status, json.loads(extra)) == ('http://example.com/', 200, {'attempt': 2})
+
+def test_sink_is_picked_by_suffix(tmp_path):
+    sink = open_result_sink(str(tmp_path / 'results.jsonl'))
+    assert isinstance(sink, JsonlResultSink)
+    sink.close()
+    if not PARQUET_AVAILABLE:
+        with pytest.raises(ImportError):
+            open_result_sink(str(tmp_path / 'results.parquet'))
+    else:
+        sink = open_result_sink(str(tmp_path / 'results.parquet'))
+        assert isinstance(sink, ParquetResultSink)
+        sink.close()
+
+def test_content_store_deduplicates_bodies(tmp_path):
+    store = ContentStore(str(tmp_path / 'bodies'))
+    digests = []
+    for _ in range(2):
+        blob = store.open_writer()
+        blob.write(b'same body')
+        digests.append(blob.commit())
+    digest = hashlib.sha256(b'same body').hexdigest()
+    assert digests == [digest, digest]
+    assert store.path_for(digest).read_bytes() == b'same body'
+    assert store.path_for(digest).parent.relative_to(store.root).parts == (digest[:2], digest[2:4])
+    assert store.stats == {'stored': 1, 'deduplicated': 1}
+
+def test_discarded_blob_leaves_nothing_behind(tmp_path):
+    store = ContentStore(str(tmp_path / 'bodies'))
+    blob = store.open_writer()
+    blob.write(b'partial')
+    blob.discard()
+    assert list(store.root.iterdir()) == []
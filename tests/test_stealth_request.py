@@ -0,0 +1,51 @@
+"""make_enterprise_stealth_request pacing: paced callers (rate_limit=False) never wait inside the call"""
+
+import logging
+import types
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from rate_limiter import RateLimiter
+from tor_anonymizer import UltimateTorAnonymizer
+
+def _anonymizer(outcomes):
+    waits = []
+    calls = []
+
+    def adaptive_request(dest_class, url, session=None, method='GET', **kwargs):
+        calls.append(url)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return types.SimpleNamespace(
+        is_running=True, session=object(), controller=None, logger=logging.getLogger('test'),
+        config={'max_retries': 3, 'request_deadline': None, 'deadline_min_attempt': 0.0},
+        rate_limiter=RateLimiter({'host_rate': 0.001, 'host_burst': 1}),
+        record_request_metric=lambda name, amount=1: None,
+        get_circuit_key=lambda session: 'circuit',
+        timeouts=types.SimpleNamespace(get_request_timeout=lambda dest_class: (1, 1)),
+        adaptive_request=adaptive_request,
+        wait_for_rate_limit=lambda *args: waits.append(args) or True,
+        calls=calls, waits=waits
+    )
+
+def test_paced_call_makes_one_attempt_without_waiting():
+    anonymizer = _anonymizer([requests.exceptions.ConnectionError(), None])
+    response = UltimateTorAnonymizer.make_enterprise_stealth_request(
+        anonymizer, 'http://example.com/', rate_limit=False, apply_delay=False, use_cache=False)
+    assert response is None
+    assert anonymizer.calls == ['http://example.com/'] and anonymizer.waits == []
+
+def test_unpaced_call_retries_through_the_limiter():
+    ok = requests.Response()
+    ok.status_code = 200
+    anonymizer = _anonymizer([requests.exceptions.ConnectionError(), ok])
+    anonymizer.config['max_retries'] = 2
+    response = UltimateTorAnonymizer.make_enterprise_stealth_request(
+        anonymizer, 'http://example.com/', apply_delay=False, use_cache=False)
+    assert response is ok
+    assert len(anonymizer.calls) == 2 and len(anonymizer.waits) == 2
@@ -0,0 +1,158 @@
+"""
+TorLauncher against a stub `tor_binary`: a script that reads its torrc,
+listens on the SocksPort and can be told (by files in its DataDirectory)
+to crash on start or to ignore SIGTERM.
+"""
+
+import signal
+import socket
+import sys
+import time
+
+import pytest
+
+from tor_launcher import TorLauncher
+
+STUB_TOR = '''\
+import signal, socket, sys, time
+from pathlib import Path
+
+torrc = dict(line.split(' ', 1) for line in Path(sys.argv[2]).read_text().splitlines())
+data_dir = Path(torrc['DataDirectory'])
+with open(data_dir / 'spawns', 'a') as spawns:
+    spawns.write(f'{time.time()}\\n')
+if (data_dir / 'crash').exists():
+    sys.exit(3)
+if (data_dir / 'stubborn').exists():
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+server = socket.socket()
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(('127.0.0.1', int(torrc['SocksPort'].split()[0].rsplit(':', 1)[1])))
+server.listen()
+while True:
+    time.sleep(1)
+'''
+
+def _free_port_base(count):
+    """First of `count` consecutive free local ports"""
+    for _ in range(50):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            base = sock.getsockname()[1]
+        if base + count > 65535:
+            continue
+        try:
+            probes = []
+            for port in range(base, base + count):
+                probe = socket.socket()
+                probes.append(probe)
+                probe.bind(('127.0.0.1', port))
+            return base
+        except OSError:
+            continue
+        finally:
+            for probe in probes:
+                probe.close()
+    pytest.skip('no run of free ports')
+
+@pytest.fixture
+def make_launcher(tmp_path):
+    stub = tmp_path / 'stub_tor'
+    stub.write_text(f'#!{sys.executable}\n' + STUB_TOR, encoding='utf-8')
+    stub.chmod(0o755)
+    launchers = []
+
+    def make(**config):
+        instances = config.get('instances', 1)
+        launcher = TorLauncher({
+            'tor_binary': str(stub),
+            'data_root': str(tmp_path / 'instances'),
+            'socks_port_base': _free_port_base(instances),
+            'control_port_base': _free_port_base(instances),
+            'supervise_interval': 0.05,
+            'stop_timeout': 2.0,
+            **config
+        })
+        launchers.append(launcher)
+        return launcher
+
+    yield make
+    for launcher in launchers:
+        launcher.stop()
+
+def _spawn_times(instance):
+    path = instance.data_dir / 'spawns'
+    return [float(line) for line in path.read_text().split()] if path.exists() else []
+
+def _wait_for(condition, timeout=10.0):
+    expires_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < expires_at, 'condition not met in time'
+        time.sleep(0.05)
+
+def test_generate_torrc(make_launcher):
+    launcher = make_launcher(instances=2, torrc_options={'SafeLogging': '1'})
+    second = launcher.instances[1]
+    torrc = launcher.generate_torrc(second).splitlines()
+
+    assert f'SocksPort 127.0.0.1:{second.socks_port} IsolateSOCKSAuth' in torrc
+    assert f'ControlPort 127.0.0.1:{second.control_port}' in torrc
+    assert f'DataDirectory {second.data_dir.resolve()}' in torrc
+    assert 'RunAsDaemon 0' in torrc and 'SafeLogging 1' in torrc
+    assert any(line.startswith('__OwningControllerProcess ') for line in torrc)
+    assert second.socks_port == launcher.instances[0].socks_port + 1
+    assert len({instance.data_dir for instance in launcher.instances}) == 2
+
+def test_torrc_keeps_reconciled_options(make_launcher):
+    launcher = make_launcher()
+    launcher.extra_options = {'StrictNodes': ['1'], 'HSLayer2Nodes': ['a', 'b']}
+    torrc = launcher.generate_torrc(launcher.instances[0]).splitlines()
+    assert {'StrictNodes 1', 'HSLayer2Nodes a', 'HSLayer2Nodes b'} <= set(torrc)
+
+def test_instance_for_spreads_keys(make_launcher):
+    launcher = make_launcher(instances=4)
+    counts = [0] * 4
+    for index in range(4000):
+        counts[launcher.instance_for(f'isolation-{index}').index] += 1
+
+    assert all(800 <= count <= 1200 for count in counts), counts
+    assert launcher.instance_for('isolation-7') is launcher.instance_for('isolation-7')
+    assert launcher.instance_for(None) is launcher.instance_for('') is launcher.instances[0]
+
+def test_supervisor_restarts_with_backoff(make_launcher):
+    launcher = make_launcher(restart_backoff=0.2, max_restart_backoff=5.0)
+    launcher.start()
+    assert launcher.wait_ready(10)
+    instance = launcher.instances[0]
+
+    (instance.data_dir / 'crash').touch()
+    instance.process.terminate()
+    _wait_for(lambda: len(_spawn_times(instance)) >= 4)
+    (instance.data_dir / 'crash').unlink()
+
+    # Each restart of a crashing instance waits twice as long as the one before
+    spawns = _spawn_times(instance)
+    gaps = [later - earlier for earlier, later in zip(spawns[1:], spawns[2:])]
+    assert gaps[0] >= 0.2 and gaps[1] >= 0.4
+    assert gaps[1] > gaps[0] * 1.5
+    assert launcher.get_stats()['restarts'] >= 3
+
+    _wait_for(lambda: instance.running and instance.port_open())
+    assert launcher.get_stats()['running'] == 1
+
+def test_stop_kills_an_instance_ignoring_sigterm(make_launcher):
+    launcher = make_launcher(instances=2, stop_timeout=0.5)
+    for instance in launcher.instances:
+        instance.data_dir.mkdir(parents=True)
+    (launcher.instances[1].data_dir / 'stubborn').touch()
+    launcher.start()
+    assert launcher.wait_ready(10)
+    first, second = (instance.process for instance in launcher.instances)
+
+    start = time.monotonic()
+    launcher.stop()
+
+    assert time.monotonic() - start < 5
+    assert first.returncode == -signal.SIGTERM
+    assert second.returncode == -signal.SIGKILL
+    assert launcher.get_stats()['running'] == 0
@@ -0,0 +1,93 @@
+"""DataDirSnapshot save/validate/restore with fake cached-consensus files"""
+
+import json
+import time
+
+import pytest
+
+from tor_snapshot import MANIFEST_NAME, DataDirSnapshot, read_consensus_times
+
+HOUR = 3600
+
+def _stamp(epoch):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(epoch))
+
+def _consensus(valid_for, now=None):
+    now = int(now or time.time())
+    return (f"network-status-version 3 microdesc\n"
+            f"vote-status consensus\n"
+            f"valid-after {_stamp(now - HOUR)}\n"
+            f"fresh-until {_stamp(now)}\n"
+            f"valid-until {_stamp(now + valid_for)}\n"
+            f"r relay1 AAAA 2038-01-01 00:00:00 10.0.0.1 9001 0\n")
+
+def _data_dir(path, valid_for, state='guard-state-old\n'):
+    path.mkdir()
+    (path / 'cached-microdesc-consensus').write_text(_consensus(valid_for))
+    (path / 'cached-microdescs').write_text('onion-key\n' * 100)
+    if state is not None:
+        (path / 'state').write_text(state)
+    return path
+
+@pytest.fixture
+def snapshot(tmp_path):
+    return DataDirSnapshot(tmp_path / 'snapshot', min_remaining=600)
+
+def test_read_consensus_times(tmp_path):
+    now = int(time.time())
+    (tmp_path / 'consensus').write_text(_consensus(2 * HOUR, now))
+    times = read_consensus_times(tmp_path / 'consensus')
+    assert times == {'valid-after': now - HOUR, 'fresh-until': now, 'valid-until': now + 2 * HOUR}
+    (tmp_path / 'garbage').write_text('valid-until yesterday\n')
+    assert read_consensus_times(tmp_path / 'garbage') is None
+    assert read_consensus_times(tmp_path / 'missing') is None
+
+def test_save_writes_manifest_with_hashes(tmp_path, snapshot):
+    source = _data_dir(tmp_path / 'tor', 2 * HOUR)
+    assert snapshot.save(source)
+    manifest = json.loads((snapshot.path / MANIFEST_NAME).read_text())
+    assert set(manifest['files']) == {'cached-microdesc-consensus', 'cached-microdescs', 'state'}
+    assert snapshot.is_fresh() and snapshot.age() < 5
+    # The same consensus is not snapshotted twice
+    assert not snapshot.save(source)
+    assert not list(tmp_path.glob('snapshot.*'))
+
+def test_stale_consensus_is_not_saved(tmp_path, snapshot):
+    assert not snapshot.save(_data_dir(tmp_path / 'tor', 60))
+    assert not snapshot.save(tmp_path / 'empty')
+    assert snapshot.manifest() is None
+
+def test_restore_seeds_an_empty_data_dir(tmp_path, snapshot):
+    snapshot.save(_data_dir(tmp_path / 'tor', 2 * HOUR))
+    target = tmp_path / 'instance'
+    assert snapshot.restore(target)
+    assert (target / 'cached-microdesc-consensus').read_text() == \
+        (tmp_path / 'tor' / 'cached-microdesc-consensus').read_text()
+    assert (target / 'state').read_text() == 'guard-state-old\n'
+    assert (target.stat().st_mode & 0o777) == 0o700
+
+def test_restore_keeps_a_fresher_cache(tmp_path, snapshot):
+    snapshot.save(_data_dir(tmp_path / 'tor', 2 * HOUR))
+    fresher = _data_dir(tmp_path / 'instance', 3 * HOUR)
+    before = (fresher / 'cached-microdesc-consensus').read_text()
+    assert not snapshot.restore(fresher)
+    assert (fresher / 'cached-microdesc-consensus').read_text() == before
+
+def test_restore_keeps_the_instance_guard_state(tmp_path, snapshot):
+    snapshot.save(_data_dir(tmp_path / 'tor', 2 * HOUR))
+    instance = _data_dir(tmp_path / 'instance', 60, state='guard-state-own\n')
+    assert snapshot.restore(instance)
+    assert (instance / 'state').read_text() == 'guard-state-own\n'
+    assert read_consensus_times(instance / 'cached-microdesc-consensus')['valid-until'] > time.time() + HOUR
+
+def test_damaged_snapshot_is_not_restored(tmp_path, snapshot):
+    snapshot.save(_data_dir(tmp_path / 'tor', 2 * HOUR))
+    (snapshot.path / 'cached-microdescs').write_text('truncated')
+    assert not snapshot.restore(tmp_path / 'instance')
+    assert not (tmp_path / 'instance').exists()
+
+def test_expired_snapshot_is_not_restored(tmp_path):
+    snapshot = DataDirSnapshot(tmp_path / 'snapshot', min_remaining=600)
+    snapshot.save(_data_dir(tmp_path / 'tor', 2 * HOUR))
+    # A reader demanding more validity than the consensus has left
+    assert not DataDirSnapshot(tmp_path / 'snapshot', min_remaining=3 * HOUR).restore(tmp_path / 'instance')
@@ -0,0 +1,47 @@
+"""TrafficShaper admission: callers turned away are woken by release, never by polling"""
+
+import threading
+import time
+
+from traffic_shaper import TrafficShaper
+
+def _full_shaper():
+    # continuous_scrolling allows 2 requests in flight per session
+    shaper = TrafficShaper(lambda: 'continuous_scrolling')
+    assert shaper.admit('s') and shaper.admit('s')
+    return shaper
+
+def test_on_free_runs_on_release():
+    shaper, woken = _full_shaper(), []
+    assert not shaper.admit('s', on_free=lambda: woken.append(True))
+    shaper.release('s')
+    assert woken == [True]
+    assert shaper.admit('s')
+
+def test_cancel_wait():
+    shaper, woken = _full_shaper(), []
+    callback = lambda: woken.append(True)
+    assert not shaper.admit('s', on_free=callback)
+    assert shaper.cancel_wait('s', callback)
+    shaper.release('s')
+    assert woken == [] and not shaper.cancel_wait('s', callback)
+
+def test_wait_admit_blocks_until_release():
+    shaper = _full_shaper()
+    threading.Timer(0.2, shaper.release, args=('s',)).start()
+    start = time.monotonic()
+    assert shaper.wait_admit('s', timeout=5)
+    assert 0.15 <= time.monotonic() - start < 2
+
+def test_wait_admit_times_out_without_leaving_a_waiter():
+    shaper = _full_shaper()
+    assert not shaper.wait_admit('s', timeout=0.1)
+    assert shaper.get_stats()['waiting'] == 0
+
+def test_evicted_session_wakes_its_waiters():
+    shaper, woken = TrafficShaper(lambda: 'continuous_scrolling', max_sessions=1), []
+    shaper.admit('a')
+    shaper.admit('a')
+    assert not shaper.admit('a', on_free=lambda: woken.append(True))
+    shaper.admit('b')
+    assert woken == [True]
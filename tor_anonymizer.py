@@ -4,12 +4,14 @@ TOR ANONYMIZER v3.0 - ULTIMATE ADVANCED STEALTH MODE
 MULTI-LAYER PROTECTION WITH ENTERPRISE-GRADE SECURITY
 """
 
+from __future__ import annotations
+
 import time
-import requests
-import stem
-from stem import Signal
-from stem.control import Controller
-from typing import Optional, Dict, Any, List
+_IMPORT_START = time.perf_counter()
+import importlib
+import importlib.util
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Mapping
 import json
 import logging
 import sys
@@ -20,27 +22,51 @@ from pathlib import Path
 import hashlib
 import random
 import subprocess
-import psutil
 import atexit
 import ipaddress
 import socket
 import re
 import threading
 from datetime import datetime, timedelta
-import urllib3
 import tempfile
 import shutil
+from adaptive_timeouts import AdaptiveTimeoutManager
+from rate_limiter import RateLimiter
+from user_agents import random_user_agent
+from request_deadline import RequestDeadline
+
+# Seconds spent importing each lazily loaded dependency
+LAZY_IMPORT_TIMES: Dict[str, float] = {}
+
+class LazyModule:
+    """
+    Stand-in for a heavy dependency, imported on first attribute access, so
+    commands that never touch it (or touch it late) don't pay for it at
+    startup. `on_load` runs once with the real module.
+    """
+
+    def __init__(self, name: str, on_load=None):
+        self.__dict__.update(_name=name, _on_load=on_load, _module=None)
 
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            LAZY_IMPORT_TIMES[self._name] = time.perf_counter() - start
+            self.__dict__['_module'] = module
+            if self._on_load:
+                self._on_load(module)
+        return getattr(module, attr)
 
-# Gestione fallback per fake-useragent
-try:
-    from fake_useragent import UserAgent
-    UA_AVAILABLE = True
-except ImportError:
-    UA_AVAILABLE = False
-    print("⚠️ fake-useragent not available, using fallback user agents")
+urllib3 = LazyModule('urllib3')
+# Disable SSL warnings as soon as the HTTP stack is loaded
+requests = LazyModule('requests', on_load=lambda _: urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning))
+stem = LazyModule('stem')
+stem_control = LazyModule('stem.control')
+psutil = LazyModule('psutil')
+
+MODULE_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -60,80 +86,103 @@ class UltimateTorAnonymizer:
     VERSIONE COMPLETAMENTE FUNZIONANTE - Tutti i problemi risolti
     """
     
-    def __init__(self, config_path: str = "settings.json"):
+    def __init__(self, config_path: str = "settings.json", fast: bool = False):
+        init_start = time.perf_counter()
         self.version = "3.0.2"
         self.author = "root-shost"
         self.config_path = config_path
+        self.fast = fast
+        self.startup_timings = OrderedDict([('imports', MODULE_IMPORT_SECONDS)])
         self.session = None
         self.controller = None
         self.tor_process = None
+        self.tor_launcher = None
         self.is_running = False
         self.logger = None
-        self.ua_generator = None
         self.current_circuit_id = None
         self.rotation_count = 0
         self.start_time = time.time()
         self.dummy_traffic_thread = None
-        self.last_dummy_traffic = 0
+        self.cover_traffic = None
+        self.last_real_request = 0.0
         self.guard_nodes = []
         self.kill_switch_active = False
         self.traffic_monitor_thread = None
         self.circuit_rotation_thread = None
         self.tor_ready = False
+        self.bootstrap_status = None
         self.initialized = False
         self.thread_exceptions = []
-        
+        self.download_manager = None
+        self.circuit_pool = None
+        self.response_cache = None
+        self.request_executor = None
+        self.delay_scheduler = None
+        self.advanced_routing = None
+        self.traffic_shaper = None
+        self.fingerprint_protection = None
+        self.cookie_jars = None
+        self.shutdown_hooks = []
+        self.metrics_lock = threading.Lock()
+        self.request_metrics = {
+            'requests_total': 0,
+            'requests_failed': 0,
+            'deadline_misses': 0
+        }
+
         # Setup in secure order with comprehensive error handling
         try:
             self.setup_enterprise_logging()
             self.config = self.load_ultimate_config()
             self.validate_enterprise_environment()
-            self.ua_generator = self.setup_user_agent_generator()
+            self.timeouts = self.setup_adaptive_timeouts()
+            self.rate_limiter = RateLimiter(self.config.get('rate_limits', {}))
             self.setup_enterprise_protections()
             self.initialized = True
+            self.mark_startup('config', init_start)
             self.logger.info("✅ Enterprise system fully initialized")
         except Exception as e:
             print(f"❌ CRITICAL: Initialization failed: {e}")
             raise
 
-    def setup_user_agent_generator(self):
-        """Setup user agent generator with fallback - STABLE"""
-        global UA_AVAILABLE
-        
-        if UA_AVAILABLE:
-            try:
-                ua = UserAgent(fallback="Mozilla/5.0 (Windows NT 10.0; rv:120.0) Gecko/20100101 Firefox/120.0")
-                # Test the user agent generator
-                _ = ua.random
-                self.logger.info("✅ fake-useragent initialized successfully")
-                return ua
-            except Exception as e:
-                self.logger.warning(f"⚠️ fake-useragent failed: {e}, using fallback user agents")
-                UA_AVAILABLE = False
-                return None
-        else:
-            self.logger.info("ℹ️ Using built-in user agents")
-            return None
+    def setup_adaptive_timeouts(self) -> AdaptiveTimeoutManager:
+        """Setup learned timeouts; defaults are the fixed values used before learning"""
+        defaults = {
+            'readiness': 5,
+            'ip_lookup': 6,
+            'dummy': 8,
+            'kill_switch': 8,
+            'diagnostic': 10,
+            'user': self.config['timeout']
+        }
+        return AdaptiveTimeoutManager(self.config.get('adaptive_timeouts', {}), defaults)
 
-    def get_random_user_agent(self):
-        """Get random user agent with fallback - ROBUST"""
-        # Try fake-useragent first
-        if self.ua_generator:
-            try:
-                return self.ua_generator.random
-            except Exception as e:
-                self.logger.debug(f"UserAgent random failed: {e}")
-        
-        # Enhanced fallback user agents
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; rv:120.0) Gecko/20100101 Firefox/120.0",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0"
-        ]
-        return random.choice(user_agents)
+    def adaptive_request(self, dest_class: str, url: str, session: Optional[requests.Session] = None,
+                         method: str = "GET", deadline: Optional[RequestDeadline] = None,
+                         **kwargs) -> requests.Response:
+        """
+        Request with a learned timeout for `dest_class`, feeding the latency
+        back. With `deadline` the timeout is clamped to the time left; a
+        timeout cut short that way says nothing about the destination and
+        is not recorded.
+        """
+        session = session or self.session
+        timeout = kwargs.pop('timeout', None) or self.timeouts.get_request_timeout(dest_class)
+        effective_timeout = deadline.clamp_timeout(timeout) if deadline else timeout
+        kwargs.setdefault('verify', False)
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=effective_timeout, **kwargs)
+        except requests.exceptions.Timeout:
+            if effective_timeout == timeout:
+                self.timeouts.observe_timeout(dest_class, timeout)
+            raise
+        self.timeouts.observe_response(dest_class, response, time.monotonic() - start)
+        return response
+
+    def get_random_user_agent(self) -> str:
+        """Weighted random user agent from the shared table (loaded on first use)"""
+        return random_user_agent()
 
     def print_ultimate_banner(self) -> None:
         """Display ultimate stealth banner"""
@@ -191,10 +240,71 @@ class UltimateTorAnonymizer:
             "max_rotation_delay": 20,
             "max_retries": 3,
             "timeout": 10,
+            "request_deadline": None,  # Default end-to-end budget per request (seconds)
+            "deadline_min_attempt": 1.0,  # Minimum budget worth starting an attempt with
+            "stream_chunk_size": 65536,
+            "download_max_resumes": 10,
+            "download_checkpoint_bytes": 1048576,
+            "segmented_circuits": 4,
+            "segmented_min_steal_bytes": 1048576,
+            "circuit_pool_size": 4,
+            "bulk_concurrency": 8,
+            "executor_workers": 4,
+            "executor_queue_size": 1000,
+            "dedup_capacity": 10000000,
+            "dedup_error_rate": 0.001,
+            "result_queue_size": 10000,
+            "result_batch_size": 500,
+            "result_flush_interval": 1.0,
+            "rate_limits": {
+                "enabled": True,
+                "host_rate": 2.0,  # Requests per second per destination host
+                "host_burst": 5,
+                "circuit_rate": 10.0,  # Requests per second per circuit
+                "circuit_burst": 20,
+                "max_retry_after": 300
+            },
+            "traffic_shaping": {
+                "enabled": False,  # Space requests per session by a traffic mimicry pattern
+                "pattern": None  # Fixed request_pattern, or None for a random one per session
+            },
+            "cookie_jars": {
+                "max_jars": 1024,  # Identities whose cookies are kept, least recently used dropped first
+                "max_cookies": 300,  # Per identity; expired, then least recently set, evicted beyond
+                "max_cookie_bytes": 4096,
+                "persist_path": None  # JSON file keeping the shared identity's persistent cookies across runs
+            },
+            "response_cache": {
+                "enabled": False,  # Opt-in: repeated fetches are served or revalidated locally, per identity (cold after each rotation)
+                "directory": "cache/responses",
+                "max_bytes": 268435456,
+                "max_entry_bytes": 16777216,
+                "default_ttl": 0
+            },
+            "adaptive_timeouts": {
+                "enabled": True,
+                "percentile": 0.8,
+                "multiplier": 1.5,
+                "min_samples": 20,
+                "floors": {"connect": 2.0, "ttfb": 3.0, "read": 5.0},
+                "ceilings": {"connect": 30.0, "ttfb": 60.0, "read": 120.0}
+            },
             "user_agent": "Mozilla/5.0 (Windows NT 10.0; rv:120.0) Gecko/20100101 Firefox/120.0",
             "socks5_host": "127.0.0.1",
             "log_level": "INFO",
-            "auto_start_tor": False,
+            "auto_start_tor": False,  # Launch and supervise our own Tor instances (tor_launcher)
+            "tor_launcher": {
+                "tor_binary": "tor",
+                "instances": 1,  # Or "auto": one per CPU core, isolation keys spread across them
+                "socks_port_base": 9250,
+                "control_port_base": 9350,
+                "data_root": "tor_data/instances",
+                "max_restart_backoff": 60.0,
+                "snapshot_path": "tor_data/snapshot",  # Warm start from a saved consensus/descriptor cache
+                "snapshot_interval": 3600.0
+            },
+            "apply_routing_policy": False,  # SETCONF the advanced_routing options on every Tor instance at startup
+            "readiness_probe": False,  # One end-to-end request after bootstrap reaches 100%
             "dns_leak_protection": True,
             "safe_browsing": True,
             "max_circuit_dirtiness": 5,
@@ -215,6 +325,15 @@ class UltimateTorAnonymizer:
             # ALL FEATURES ENABLED - ENTERPRISE MODE
             "dummy_traffic_enabled": True,
             "dummy_traffic_interval": 45,  # Increased for stability
+            "cover_traffic": {
+                # requests_per_min defaults to one request per dummy_traffic_interval
+                "bytes_per_sec": 1024,  # 0 disables cover traffic entirely
+                "mode": "range",  # "range" (first range_bytes) or "head"
+                "range_bytes": 16384,
+                "circuits": 2,
+                "yield_window": 2.0,
+                "yield_queue_depth": 1
+            },
             "multi_hop_enabled": True,
             "guard_lifetime_days": 30,
             "random_delay_enabled": True,
@@ -256,22 +375,22 @@ class UltimateTorAnonymizer:
             self.logger.error(f"Config creation failed: {e}")
 
     def validate_enterprise_environment(self) -> None:
-        """Validate enterprise environment"""
-        try:
-            import requests
-            import stem
-            import psutil
-            self.logger.info("✅ All enterprise dependencies verified")
-        except ImportError as e:
-            self.logger.error(f"Missing enterprise dependency: {e}")
-            print(f"❌ Missing dependency: {e}")
+        """Validate enterprise environment (locates dependencies without importing them)"""
+        missing = [name for name in ('requests', 'stem', 'psutil', 'socks')
+                   if importlib.util.find_spec(name) is None]
+        if missing:
+            self.logger.error(f"Missing enterprise dependency: {', '.join(missing)}")
+            print(f"❌ Missing dependency: {', '.join(missing)}")
             print("💡 Run: pip install -r requirements.txt")
             sys.exit(1)
+        self.logger.info("✅ All enterprise dependencies verified")
 
     def setup_enterprise_protections(self) -> None:
         """Setup enterprise protection mechanisms"""
         # Initialize guard nodes list
         self.guard_nodes = self.generate_enterprise_guard_nodes()
+        if self.fast:
+            return
         
         print("🛡️  Enterprise protections initialized:")
         print(f"   • Random Delay: {self.config['random_delay_enabled']}")
@@ -291,77 +410,229 @@ class UltimateTorAnonymizer:
             guards.append(f"guard{i}_{country}")
         return guards
 
-    def wait_for_tor_ready(self, timeout: int = 25) -> bool:
-        """Wait for Tor to be ready with timeout - ROBUST"""
+    def wait_for_tor_ready(self, timeout: int = 25, probe: Optional[bool] = None) -> bool:
+        """
+        Ready as soon as the controller reports bootstrap at 100%, then at
+        most one end-to-end request when `probe` (default: readiness_probe
+        config). Without a usable controller, falls back to the SOCKS port
+        (plus the end-to-end request when `probe`).
+        """
         self.logger.info("⏳ Waiting for Tor to be ready...")
-        start_time = time.time()
+        probe = self.config.get('readiness_probe', False) if probe is None else probe
+        deadline = time.monotonic() + timeout
+        backoff = 0.25
         
-        while time.time() - start_time < timeout:
-            try:
-                # Simple socket test first (faster)
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(2)
-                result = sock.connect_ex(('127.0.0.1', self.config['tor_port']))
-                sock.close()
-                
-                if result == 0:
-                    # Port is open, now test with requests
-                    test_session = requests.Session()
-                    test_session.proxies = {
-                        'http': f'socks5://{self.config["socks5_host"]}:{self.config["tor_port"]}',
-                        'https': f'socks5://{self.config["socks5_host"]}:{self.config["tor_port"]}'
-                    }
-                    test_session.verify = False
-                    
-                    response = test_session.get('http://httpbin.org/ip', timeout=5)
-                    if response.status_code == 200:
-                        self.tor_ready = True
-                        self.logger.info("✅ Tor connection verified")
-                        return True
-            except Exception as e:
-                self.logger.debug(f"Tor not ready yet: {e}")
-                time.sleep(1)
+        while time.monotonic() < deadline:
+            if self.controller_authenticated():
+                break
+            if self.control_port_open():
+                # One connection attempt: a listening controller that refuses us won't change its mind
+                if self.connect_enterprise_controller():
+                    break
+                return self.wait_for_tor_http(deadline, probe)
+            if self.tor_port_open():
+                # Tor is up without a controller
+                return self.wait_for_tor_http(deadline, probe)
+            time.sleep(min(backoff, max(0.0, deadline - time.monotonic())))
+            backoff = min(backoff * 2, 2.0)
+        else:
+            self.logger.error("❌ Tor connection timeout")
+            return False
+        
+        from bootstrap_monitor import BootstrapMonitor
+        monitor = BootstrapMonitor(self.controller, self.logger)
+        try:
+            ready = monitor.wait(max(0.0, deadline - time.monotonic()))
+        except Exception as e:
+            self.logger.warning(f"⚠️ Bootstrap status unavailable: {e}, falling back to the SOCKS port")
+            return self.wait_for_tor_http(deadline, probe)
+        self.bootstrap_status = monitor.get_stats()
+        if not ready:
+            self.logger.error(f"❌ Tor bootstrap stuck at {self.bootstrap_status['progress']}%")
+            return False
+        
+        self.logger.info(f"✅ Tor bootstrapped ({self.bootstrap_status['elapsed']}s)")
+        if probe and not self.probe_tor_end_to_end():
+            return False
+        self.tor_ready = True
+        return True
+
+    def controller_authenticated(self) -> bool:
+        return bool(self.controller and self.controller.is_authenticated())
+
+    def tor_port_open(self) -> bool:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            return sock.connect_ex(('127.0.0.1', self.config['tor_port'])) == 0
+
+    def control_port_open(self) -> bool:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            return sock.connect_ex(('127.0.0.1', self.config['control_port'])) == 0
+
+    def probe_tor_end_to_end(self) -> bool:
+        """One request through Tor to the public internet"""
+        try:
+            test_session = requests.Session()
+            test_session.proxies = {
+                'http': f'socks5://{self.config["socks5_host"]}:{self.config["tor_port"]}',
+                'https': f'socks5://{self.config["socks5_host"]}:{self.config["tor_port"]}'
+            }
+            test_session.verify = False
+            response = self.adaptive_request('readiness', 'http://httpbin.org/ip', session=test_session)
+            if response.status_code == 200:
+                self.logger.info("✅ Tor connection verified end to end")
+                return True
+            self.logger.warning(f"⚠️ Readiness probe failed - Status: {response.status_code}")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Readiness probe failed: {e}")
+        return False
+
+    def wait_for_tor_http(self, deadline: float, probe: bool = True) -> bool:
+        """Fallback readiness without a controller: SOCKS port open, then a request through it when `probe`"""
+        while time.monotonic() < deadline:
+            if not self.tor_port_open():
+                time.sleep(0.2)
+                continue
+            if not probe or self.probe_tor_end_to_end():
+                self.tor_ready = True
+                return True
+            time.sleep(1)
         
         self.logger.error("❌ Tor connection timeout")
         return False
 
-    def create_enterprise_session(self) -> requests.Session:
+    def get_proxy_url(self, isolation_key: Optional[str] = None) -> str:
+        """
+        SOCKS proxy URL; distinct credentials get distinct circuits
+        (IsolateSOCKSAuth). With launched instances, each key stays on the
+        instance it hashes to.
+        """
+        credentials = f"{isolation_key}:{isolation_key}@" if isolation_key else ""
+        port = self.tor_launcher.instance_for(isolation_key).socks_port if self.tor_launcher else self.config["tor_port"]
+        return f'socks5://{credentials}{self.config["socks5_host"]}:{port}'
+
+    def start_tor_process(self) -> bool:
+        """Launch the configured Tor instances; instance 0 becomes tor_port/control_port"""
+        from tor_launcher import TorLauncher
+        if self.tor_launcher is None:
+            self.tor_launcher = TorLauncher(self.config.get('tor_launcher', {}))
+            self.register_shutdown_hook(self.stop_tor_process)
+        try:
+            self.tor_launcher.start()
+        except OSError as e:
+            self.logger.error(f"❌ Tor launch failed: {e}")
+            return False
+        primary = self.tor_launcher.instances[0]
+        self.config['tor_port'] = primary.socks_port
+        self.config['control_port'] = primary.control_port
+        self.logger.info(f"🚀 {len(self.tor_launcher.instances)} Tor instance(s) launched, "
+                         f"SOCKS {primary.socks_port}+")
+        return True
+
+    def stop_tor_process(self) -> None:
+        """Stop launched Tor instances; a system Tor is left alone"""
+        if self.tor_launcher:
+            launcher, self.tor_launcher = self.tor_launcher, None
+            launcher.stop()
+
+    def create_enterprise_session(self, isolation_key: Optional[str] = None) -> requests.Session:
         """Create session with enterprise stealth features - ENTERPRISE"""
         session = requests.Session()
         
         # Enterprise proxy configuration
+        proxy_url = self.get_proxy_url(isolation_key)
         proxy_config = {
-            'http': f'socks5://{self.config["socks5_host"]}:{self.config["tor_port"]}',
-            'https': f'socks5://{self.config["socks5_host"]}:{self.config["tor_port"]}'
+            'http': proxy_url,
+            'https': proxy_url
         }
         session.proxies.update(proxy_config)
         
-        # Enterprise user agent rotation
+        # Cookies never cross identities: one bounded jar per isolation key
+        session.cookies = self.get_cookie_jars().jar(isolation_key or 'shared')
+        
+        # Enterprise stealth headers: the pinned profile's template replaces
+        # the requests defaults, so the browser's header order is kept
+        session.headers = requests.structures.CaseInsensitiveDict(self.get_session_headers(isolation_key))
+        
+        # Enterprise security settings
+        session.trust_env = False
+        session.max_redirects = 3
+        session.verify = False
+        
+        return session
+
+    def get_fingerprint_protection(self):
+        """Lazily create the fingerprint profile pool"""
+        if self.fingerprint_protection is None:
+            from fingerprint_protection import AdvancedFingerprintingProtection
+            self.fingerprint_protection = AdvancedFingerprintingProtection()
+        return self.fingerprint_protection
+
+    def get_session_headers(self, isolation_key: Optional[str] = None) -> Mapping[str, str]:
+        """Headers for a session identity; with anti-fingerprinting, the frozen template of its pinned profile"""
+        if self.config.get('anti_fingerprinting', True) and self.config.get('random_user_agent', True):
+            try:
+                return self.get_fingerprint_protection().get_header_template(isolation_key or 'shared')
+            except Exception as e:
+                self.logger.warning(f"⚠️ Fingerprint profiles unavailable: {e}, using basic headers")
+        
         if self.config.get('random_user_agent', True):
             user_agent = self.get_random_user_agent()
         else:
             user_agent = self.config['user_agent']
-        
-        # Enterprise stealth headers
-        session.headers.update({
+        from fingerprint_profiles import ACCEPT_ENCODING
+        return {
             'User-Agent': user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'DNT': '1',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
             'Sec-Fetch-Site': 'none',
-        })
-        
-        # Enterprise security settings
-        session.trust_env = False
-        session.max_redirects = 3
-        session.verify = False
-        
-        return session
+        }
+
+    def get_cookie_jars(self):
+        """Lazily create the per-identity cookie jar registry"""
+        if self.cookie_jars is None:
+            from cookie_jars import CookieJarRegistry
+            jar_config = self.config.get('cookie_jars', {})
+            self.cookie_jars = CookieJarRegistry(
+                max_jars=jar_config.get('max_jars', 1024),
+                max_cookies=jar_config.get('max_cookies', 300),
+                max_cookie_bytes=jar_config.get('max_cookie_bytes', 4096),
+                path=jar_config.get('persist_path')
+            )
+            if jar_config.get('persist_path'):
+                self.register_shutdown_hook(self.cookie_jars.save)
+        return self.cookie_jars
+
+    def rotate_session_identity(self) -> None:
+        """
+        NEWNYM moved every circuit: drop all cookies (cookie_cleanup) and
+        re-pin the shared session to a fresh profile
+        """
+        if self.cookie_jars and self.config.get('cookie_cleanup', True):
+            self.cookie_jars.clear()
+        if not self.session or not self.fingerprint_protection:
+            return
+        self.fingerprint_protection.release_session('shared')
+        self.session.headers = requests.structures.CaseInsensitiveDict(self.get_session_headers())
+
+    def release_identity(self, isolation_key: str) -> None:
+        """Forget per-identity state (cookies, pinned profile) of a retired circuit"""
+        if self.cookie_jars:
+            self.cookie_jars.forget(isolation_key)
+        if self.fingerprint_protection:
+            self.fingerprint_protection.release_session(isolation_key)
+
+    def create_isolated_session(self, isolation_key: Optional[str] = None) -> requests.Session:
+        """Session bound to its own Tor circuit, without a global NEWNYM"""
+        isolation_key = isolation_key or f"iso{random.getrandbits(64):016x}"
+        return self.create_enterprise_session(isolation_key=isolation_key)
 
     def connect_enterprise_controller(self) -> bool:
         """Enterprise controller connection with advanced error handling - CORRETTO"""
@@ -369,7 +640,7 @@ class UltimateTorAnonymizer:
             self.logger.info("🔗 Attempting enterprise controller connection...")
             
             # CORREZIONE: Usa il cookie file esplicitamente
-            self.controller = Controller.from_port(
+            self.controller = stem_control.Controller.from_port(
                 address="127.0.0.1",
                 port=self.config['control_port']
             )
@@ -392,36 +663,51 @@ class UltimateTorAnonymizer:
                     self.logger.warning(f"Cookie authentication failed: {e}")
             
             self.logger.warning("❌ All controller authentication methods failed")
+            self.discard_controller()
             return False
                     
         except Exception as e:
             self.logger.warning(f"❌ Enterprise controller connection failed: {e}")
+            self.discard_controller()
             return False
 
-    def enterprise_identity_rotation(self) -> bool:
+    def discard_controller(self) -> None:
+        """Close an unusable controller connection instead of leaving it open"""
+        controller, self.controller = self.controller, None
+        if controller:
+            try:
+                controller.close()
+            except Exception:
+                pass
+
+    def enterprise_identity_rotation(self, verify: bool = True) -> bool:
         """Enterprise identity rotation with multiple techniques - CORRETTO"""
         try:
             # CORREZIONE: Verifica più robusta del controller
             if self.controller and hasattr(self.controller, 'is_authenticated') and self.controller.is_authenticated():
                 # CORREZIONE: Rotazione semplificata ma efficace
-                self.controller.signal(Signal.NEWNYM)
+                self.controller.signal(stem.Signal.NEWNYM)
+                if self.tor_launcher and len(self.tor_launcher.instances) > 1:
+                    self.tor_launcher.signal_all('NEWNYM', skip_primary=True)
                 time.sleep(1)  # Attendi la creazione del nuovo circuito
                 
                 self.rotation_count += 1
+                self.rotate_session_identity()
                 self.logger.info(f"🔄 Enterprise identity rotation #{self.rotation_count} completed")
                 
                 # Verifica che l'IP sia cambiato
-                time.sleep(2)
-                new_ip = self.get_enterprise_stealth_ip()
-                if new_ip:
-                    self.logger.info(f"📡 New IP after rotation: {new_ip}")
+                if verify:
+                    time.sleep(2)
+                    new_ip = self.get_enterprise_stealth_ip()
+                    if new_ip:
+                        self.logger.info(f"📡 New IP after rotation: {new_ip}")
                 
                 return True
             else:
                 self.logger.warning("⚠️ Enterprise controller not available for rotation")
                 # CORREZIONE: Tentativo di riconnessione
                 if self.connect_enterprise_controller():
-                    return self.enterprise_identity_rotation()
+                    return self.enterprise_identity_rotation(verify=verify)
                 return False
         except Exception as e:
             self.logger.error(f"❌ Enterprise rotation error: {e}")
@@ -435,60 +721,21 @@ class UltimateTorAnonymizer:
             return False
 
     def start_enterprise_dummy_traffic(self) -> None:
-        """Start enterprise dummy traffic generation - STABLE"""
+        """Start the budgeted cover traffic engine on its own isolated circuits"""
         if not self.config.get('dummy_traffic_enabled', True):
             self.logger.info("❌ Dummy traffic disabled")
             return
-            
-        def enterprise_dummy_traffic_worker():
-            enterprise_dummy_sites = [
-                "https://www.wikipedia.org",
-                "https://github.com",
-                "https://stackoverflow.com",
-                "https://news.ycombinator.com",
-                "https://www.reddit.com",
-                "https://www.nytimes.com",
-                "https://www.bbc.com",
-                "https://www.cnn.com"
-            ]
-            
-            self.logger.info("🚀 Dummy traffic generator started")
-            
-            while self.is_running:
-                try:
-                    current_time = time.time()
-                    interval = self.config.get('dummy_traffic_interval', 45)
-                    
-                    if current_time - self.last_dummy_traffic >= interval:
-                        site = random.choice(enterprise_dummy_sites)
-                        try:
-                            response = self.session.get(site, timeout=8, verify=False)
-                            if response.status_code == 200:
-                                self.last_dummy_traffic = current_time
-                                domain = site.split('//')[1].split('/')[0]
-                                self.logger.debug(f"🌫️ Dummy traffic to: {domain} (Status: {response.status_code})")
-                            else:
-                                self.logger.warning(f"⚠️ Dummy traffic failed: {site} - Status {response.status_code}")
-                        except requests.exceptions.Timeout:
-                            self.logger.debug(f"⏰ Dummy traffic timeout: {site}")
-                        except Exception as e:
-                            self.logger.debug(f"⚠️ Dummy traffic error: {site} - {e}")
-                    
-                    # Random sleep between checks
-                    time.sleep(random.randint(10, 20))
-                    
-                except Exception as e:
-                    self.logger.error(f"❌ Dummy traffic worker error: {e}")
-                    time.sleep(30)  # Wait before retry
-                    continue
         
-        self.dummy_traffic_thread = threading.Thread(
-            target=enterprise_dummy_traffic_worker, 
-            daemon=True,
-            name="DummyTraffic"
-        )
-        self.dummy_traffic_thread.start()
-        self.logger.info("✅ Enterprise dummy traffic generator started")
+        from cover_traffic import CoverTrafficEngine
+        cover_config = {
+            'requests_per_min': 60.0 / max(1, self.config.get('dummy_traffic_interval', 45)),
+            **self.config.get('cover_traffic', {})
+        }
+        self.cover_traffic = CoverTrafficEngine(self, cover_config)
+        self.cover_traffic.start()
+        self.dummy_traffic_thread = self.cover_traffic.thread
+        self.register_shutdown_hook(self.cover_traffic.stop)
+        self.logger.info("✅ Enterprise cover traffic engine started")
 
     def start_enterprise_traffic_monitoring(self) -> None:
         """Start enterprise traffic monitoring - STABLE"""
@@ -612,7 +859,7 @@ class UltimateTorAnonymizer:
                     
                     # Check Tor connection
                     try:
-                        response = self.session.get('http://httpbin.org/ip', timeout=8, verify=False)
+                        response = self.adaptive_request('kill_switch', 'http://httpbin.org/ip')
                         if response.status_code == 200:
                             consecutive_failures = 0
                             if check_count % 10 == 0:  # Log every 10 checks
@@ -660,7 +907,7 @@ class UltimateTorAnonymizer:
         
         for service in enterprise_stealth_services:
             try:
-                response = self.session.get(service, timeout=6, verify=False)
+                response = self.adaptive_request('ip_lookup', service)
                 if response.status_code == 200:
                     ip = response.text.strip()
                     if self.validate_enterprise_ip(ip):
@@ -708,7 +955,7 @@ class UltimateTorAnonymizer:
         
         # Test 2: Basic functionality
         try:
-            response = self.session.get('http://httpbin.org/ip', timeout=10, verify=False)
+            response = self.adaptive_request('diagnostic', 'http://httpbin.org/ip')
             if response.status_code == 200:
                 print("✅ Test 2 - Basic Functionality: SUCCESS")
                 tests_passed += 1
@@ -726,7 +973,7 @@ class UltimateTorAnonymizer:
         
         # Test 4: Tor verification
         try:
-            response = self.session.get('https://check.torproject.org', timeout=10, verify=False)
+            response = self.adaptive_request('diagnostic', 'https://check.torproject.org')
             if "Congratulations" in response.text:
                 print("✅ Test 4 - Tor Verification: SUCCESS")
                 tests_passed += 1
@@ -737,7 +984,7 @@ class UltimateTorAnonymizer:
         
         # Test 5: DNS leak test
         try:
-            response = self.session.get('https://dnsleaktest.com', timeout=8, verify=False)
+            response = self.adaptive_request('diagnostic', 'https://dnsleaktest.com')
             if response.status_code == 200:
                 print("✅ Test 5 - DNS Leak Test: INITIATED")
                 tests_passed += 1
@@ -757,6 +1004,7 @@ class UltimateTorAnonymizer:
         self.logger.error("🚨 ENTERPRISE EMERGENCY SHUTDOWN INITIATED!")
         
         self.is_running = False
+        self.run_shutdown_hooks()
         
         print("\n" + "="*60)
         print("🚨 ENTERPRISE EMERGENCY SHUTDOWN PROCEDURE ACTIVATED!")
@@ -785,62 +1033,94 @@ class UltimateTorAnonymizer:
         print("💡 Please check Tor service and network connectivity")
         sys.exit(1)
 
-    def start_ultimate_enterprise_mode(self) -> bool:
-        """Start ultimate enterprise stealth mode - COMPLETAMENTE FUNZIONANTE"""
+    def start_ultimate_enterprise_mode(self, lightweight: bool = False) -> bool:
+        """
+        Start ultimate enterprise stealth mode - COMPLETAMENTE FUNZIONANTE
+
+        `lightweight` (bulk jobs) skips the banner, the session round trip,
+        dummy traffic, monitoring, periodic rotation and the test suite;
+        only the kill switch is started.
+
+        `fast` (set at construction, for one-shot commands) also skips the
+        end-to-end readiness probe (the command's own request is that check)
+        and every background service.
+        """
         if not self.initialized:
             print("❌ Enterprise system not properly initialized")
             return False
             
-        self.print_ultimate_banner()
+        if not lightweight and not self.fast:
+            self.print_ultimate_banner()
         
         # Setup enterprise signal handling
         signal.signal(signal.SIGINT, self.enterprise_signal_handler)
         signal.signal(signal.SIGTERM, self.enterprise_signal_handler)
         
-        print("🔒 Initializing ultimate enterprise protections...")
+        if not self.fast:
+            print("🔒 Initializing ultimate enterprise protections...")
+            print("🔍 Testing Tor connection before starting...")
+        
+        if self.config.get('auto_start_tor') and not self.start_tor_process():
+            return False
         
         # Verify Tor connectivity first
-        print("🔍 Testing Tor connection before starting...")
+        phase_start = time.perf_counter()
         try:
-            if not self.wait_for_tor_ready(timeout=20):
+            if not self.wait_for_tor_ready(timeout=20, probe=False if self.fast else None):
                 print("❌ Tor connection failed - is Tor running?")
                 print("💡 Start Tor with: sudo systemctl start tor")
                 return False
             else:
                 print("✅ Tor connection verified")
+                if self.bootstrap_status and not self.fast:
+                    phases = ', '.join(f"{p['tag']} {p['seconds']:.1f}s" for p in self.bootstrap_status['phases'])
+                    print(f"   • Bootstrap: {self.bootstrap_status['progress']}% in "
+                          f"{self.bootstrap_status['elapsed']:.1f}s{f' ({phases})' if phases else ''}")
                 
         except Exception as e:
             print(f"❌ Tor connection failed: {e}")
             print("💡 Please ensure Tor is running: sudo systemctl start tor")
             return False
         
+        self.mark_startup('readiness', phase_start)
+        
         # Create enterprise session
+        phase_start = time.perf_counter()
         try:
             self.session = self.create_enterprise_session()
+            self.mark_startup('session', phase_start)
             
             # Test the session
-            test_response = self.session.get('http://httpbin.org/ip', timeout=10)
-            if test_response.status_code == 200:
-                ip_info = test_response.json().get('origin', 'Unknown')
-                print(f"✅ Enterprise session created: {ip_info}")
-            else:
-                print(f"⚠️ Enterprise session created but test request failed: {test_response.status_code}")
+            if not lightweight and not self.fast:
+                test_response = self.adaptive_request('diagnostic', 'http://httpbin.org/ip')
+                if test_response.status_code == 200:
+                    ip_info = test_response.json().get('origin', 'Unknown')
+                    print(f"✅ Enterprise session created: {ip_info}")
+                else:
+                    print(f"⚠️ Enterprise session created but test request failed: {test_response.status_code}")
                 
         except Exception as e:
             print(f"❌ Enterprise session creation failed: {e}")
             return False
             
+        if self.fast:
+            self.is_running = True
+            return True
+            
         # CORREZIONE: Enterprise controller connection migliorata
         print("🔗 Connecting to Tor controller...")
+        phase_start = time.perf_counter()
         try:
-            if self.connect_enterprise_controller():
+            if self.controller_authenticated() or self.connect_enterprise_controller():
                 print("✅ Enterprise controller connected")
             else:
                 print("⚠️  Enterprise controller connection failed, using basic mode")
         except Exception as e:
             print(f"⚠️  Enterprise controller error: {e}, continuing in basic mode")
+        self.mark_startup('controller', phase_start)
 
         self.is_running = True
+        phase_start = time.perf_counter()
         
         # Start ALL enterprise services
         print("\n🚀 Starting Enterprise Services:")
@@ -851,10 +1131,13 @@ class UltimateTorAnonymizer:
             ("Traffic Monitoring", self.start_enterprise_traffic_monitoring, self.config['traffic_monitoring']),
             ("Circuit Rotation", self.start_enterprise_circuit_rotation, self.config['auto_circuit_rotation']),
             ("Kill Switch", self.enable_enterprise_kill_switch, self.config['kill_switch_enabled']),
+            ("Routing Policy", self.enable_routing_policy, self.config.get('apply_routing_policy', False)),
         ]
         
         for service_name, service_func, enabled in enterprise_services:
-            if enabled:
+            if lightweight and service_name != "Kill Switch":
+                print(f"   ⏭️  {service_name}: SKIPPED (lightweight mode)")
+            elif enabled:
                 try:
                     service_func()
                     print(f"   ✅ {service_name}: STARTED")
@@ -864,8 +1147,14 @@ class UltimateTorAnonymizer:
                 print(f"   ❌ {service_name}: DISABLED")
         
         print("-" * 40)
+        self.mark_startup('services', phase_start)
+        
+        if lightweight:
+            print(f"\n{Colors.GREEN}🎯 ENTERPRISE STEALTH MODE ACTIVATED (lightweight){Colors.END}")
+            return True
         
         # Run comprehensive tests
+        phase_start = time.perf_counter()
         try:
             if self.run_enterprise_stealth_tests():
                 print(f"\n{Colors.GREEN}🎯 ULTIMATE ENTERPRISE STEALTH MODE ACTIVATED{Colors.END}")
@@ -873,6 +1162,7 @@ class UltimateTorAnonymizer:
                 print(f"\n{Colors.YELLOW}🎯 ENTERPRISE STEALTH MODE ACTIVATED (some tests failed){Colors.END}")
         except Exception as e:
             print(f"\n{Colors.YELLOW}🎯 Enterprise stealth mode ACTIVATED (with limitations: {e}){Colors.END}")
+        self.mark_startup('tests', phase_start)
 
         print(f"\n{Colors.CYAN}💡 Enterprise Features Active:{Colors.END}")
         print(f"   • {Colors.GREEN}Dummy Traffic Generation{Colors.END}")
@@ -893,6 +1183,7 @@ class UltimateTorAnonymizer:
         """Enterprise clean shutdown"""
         self.is_running = False
         print(f"\n{Colors.CYAN}🛑 Stopping Enterprise Services...{Colors.END}")
+        self.run_shutdown_hooks()
         
         try:
             if self.controller:
@@ -901,42 +1192,374 @@ class UltimateTorAnonymizer:
             if self.session:
                 self.session.close()
                 print("✅ Session closed")
+            if self.circuit_pool:
+                self.circuit_pool.close()
+                print("✅ Circuit pool closed")
             
             uptime = int(time.time() - self.start_time)
             print(f"✅ Enterprise stealth mode terminated")
             print(f"📊 Session Summary: {self.rotation_count} rotations | Uptime: {uptime}s")
+            print(f"📊 Requests: {self.request_metrics['requests_total']} | "
+                  f"Failed: {self.request_metrics['requests_failed']} | "
+                  f"Deadline misses: {self.request_metrics['deadline_misses']}")
+            if self.request_executor:
+                executor_stats = self.request_executor.get_stats()
+                print(f"📊 Executor: {executor_stats['completed']} completed | "
+                      f"Expired in queue: {executor_stats['expired']} | "
+                      f"Queue wait p95: {executor_stats['queue_wait_p95']}s | "
+                      f"Network p95: {executor_stats['network_p95']}s")
+            if self.cover_traffic:
+                cover_stats = self.cover_traffic.get_stats()
+                print(f"📊 Cover traffic: {cover_stats['requests']} requests | "
+                      f"{cover_stats['bytes_per_sec']} B/s | {cover_stats['requests_per_min']}/min | "
+                      f"Yielded: {cover_stats['yielded']}")
+            if self.delay_scheduler:
+                delay_stats = self.delay_scheduler.get_stats()
+                print(f"📊 Artificial delays: {delay_stats['delayed']}/{delay_stats['reserved']} delayed | "
+                      f"Avg: {delay_stats['avg_delay']}s | Max: {delay_stats['max_delay']:.2f}s | "
+                      f"Truncated by deadline: {delay_stats['truncated']}")
+            if self.traffic_shaper:
+                shaper_stats = self.traffic_shaper.get_stats()
+                print(f"📊 Traffic shaping: {shaper_stats['sessions']} sessions {shaper_stats['patterns']} | "
+                      f"Held for concurrency: {shaper_stats['held']} | "
+                      f"CPU: {shaper_stats['cpu_us_per_call']}µs/call")
+            limiter_stats = self.rate_limiter.get_stats()
+            if limiter_stats['deferred'] or limiter_stats['throttled']:
+                print(f"📊 Rate limiter: {limiter_stats['deferred']} deferred | "
+                      f"Throttled: {limiter_stats['throttled']} | "
+                      f"Waited: {limiter_stats['wait_seconds']:.1f}s")
+            if self.response_cache:
+                cache_stats = self.response_cache.get_stats()
+                print(f"📊 Response cache: hit ratio {cache_stats['hit_ratio']:.1%} | "
+                      f"Hits: {cache_stats['hits']} | Revalidated: {cache_stats['revalidated']} | "
+                      f"Misses: {cache_stats['misses']}")
+            if self.cookie_jars:
+                jar_stats = self.cookie_jars.get_stats()
+                print(f"📊 Cookie jars: {jar_stats['jars']} identities | Cookies: {jar_stats['cookies']} | "
+                      f"Evicted: {jar_stats['evicted']} | Cleared: {jar_stats['cleared']}")
             
         except Exception as e:
             print(f"❌ Enterprise shutdown error: {e}")
 
-    def make_enterprise_stealth_request(self, url: str, method: str = "GET", **kwargs) -> Optional[requests.Response]:
-        """Make request with all enterprise protections"""
-        if not self.is_running or not self.session:
+    def mark_startup(self, phase: str, start: float) -> None:
+        """Record how long a startup phase took since `start` (perf_counter)"""
+        self.startup_timings[phase] = time.perf_counter() - start
+
+    def print_startup_timings(self) -> None:
+        """Startup breakdown: eager imports, config, readiness, ..., first request; lazy imports apart"""
+        total = sum(self.startup_timings.values())
+        print(f"\n{Colors.CYAN}⏱️  Startup timings ({'fast' if self.fast else 'full'} mode):{Colors.END}")
+        for phase, seconds in self.startup_timings.items():
+            print(f"   • {phase:14} {seconds * 1000:9.1f} ms")
+        print(f"   • {'total':14} {total * 1000:9.1f} ms")
+        for phase in (self.bootstrap_status or {}).get('phases', []):
+            print(f"     (bootstrap {phase['progress']:3}% {phase['tag']}: {phase['seconds'] * 1000:.1f} ms)")
+        for name, seconds in LAZY_IMPORT_TIMES.items():
+            print(f"     (lazy import {name}: {seconds * 1000:.1f} ms, inside the phase that first used it)")
+
+    def record_request_metric(self, name: str, amount: float = 1) -> None:
+        """Thread-safe increment of a request metric counter"""
+        with self.metrics_lock:
+            self.request_metrics[name] = self.request_metrics.get(name, 0) + amount
+
+    def get_rotation_wait(self) -> float:
+        """Seconds a retry rotation would block (NEWNYM rate limit + circuit settle time)"""
+        wait = 1.0
+        try:
+            if self.controller:
+                wait += max(0.0, self.controller.get_newnym_wait())
+        except Exception as e:
+            self.logger.debug(f"NEWNYM wait lookup failed: {e}")
+        return wait
+
+    def make_enterprise_stealth_request(self, url: str, method: str = "GET",
+                                        deadline=None, **kwargs) -> Optional[requests.Response]:
+        """
+        Make request with all enterprise protections
+
+        `deadline` caps the whole call (attempts, rotations and backoff) in
+        seconds, or is a RequestDeadline shared with the caller. A phase that
+        would overrun it is skipped and the call fails fast. `session`
+        selects an isolated session instead of the shared one. `use_cache`
+        overrides the response_cache setting for plain (non-stream) GETs;
+        range, credentialed and caller-conditional GETs always bypass it.
+        Requests are paced by the per-host/per-circuit rate limiter (sleeping
+        within the deadline); a 429 with time left is retried after the
+        origin's Retry-After. `rate_limit=False` is for callers that took
+        the token themselves and handle throttled responses and retries
+        (the executor, the bulk runner): the call then makes one attempt and
+        never waits, so failures go back through the caller's deferral.
+        The session's artificial delay / traffic shaping slot is likewise
+        applied here unless `apply_delay=False`.
+        """
+        session = kwargs.pop('session', None) or self.session
+        if not self.is_running or not session:
             self.logger.error("Enterprise stealth request failed: service not running")
             return None
         
         max_retries = kwargs.pop('max_retries', self.config['max_retries'])
+        rate_limit = kwargs.pop('rate_limit', True)
+        if not rate_limit:
+            max_retries = 1
+        fixed_timeout = kwargs.pop('timeout', None)
+        if deadline is None:
+            deadline = self.config.get('request_deadline')
+        deadline = RequestDeadline.coerce(deadline)
+        min_attempt = self.config.get('deadline_min_attempt', 1.0)
+        apply_delay = kwargs.pop('apply_delay', True)
+        circuit = self.get_circuit_key(session)
         
-        for attempt in range(max_retries):
-            try:
-                response = self.session.request(
-                    method=method,
-                    url=url,
-                    timeout=self.config['timeout'],
-                    verify=False,
-                    **kwargs
-                )
-                return response
+        self.record_request_metric('requests_total')
+        self.last_real_request = time.monotonic()
+        
+        cache, cache_entry, identity = None, None, None
+        use_cache = kwargs.pop('use_cache', self.config.get('response_cache', {}).get('enabled', False))
+        if use_cache and method.upper() == 'GET' and not kwargs.get('stream'):
+            from response_cache import cacheable_request
+            # What the request will send: session defaults overridden per call
+            request_headers = requests.structures.CaseInsensitiveDict(session.headers)
+            request_headers.update(kwargs.get('headers') or {})
+            if cacheable_request(request_headers):
+                cache = self.get_response_cache()
+                identity = self.get_identity_key(session)
+                cache_entry = cache.lookup(identity, method, url, request_headers)
+                if cache_entry and cache.is_fresh(cache_entry):
+                    return cache.build_response(cache_entry)
+                if cache_entry:
+                    kwargs['headers'] = {**(kwargs.get('headers') or {}), **cache.conditional_headers(cache_entry)}
+        
+        if apply_delay:
+            delay = self.reserve_artificial_delay(circuit, deadline, min_attempt)
+            if delay > 0:
+                time.sleep(delay)
+        
+        shaping_slot = apply_delay and self.acquire_shaping_slot(circuit, deadline, min_attempt)
+        try:
+            for attempt in range(max_retries):
+                if not deadline.allows(min_attempt):
+                    self.logger.warning(f"⏱️ Deadline exhausted before attempt {attempt + 1}: {url}")
+                    break
+                if rate_limit and not self.wait_for_rate_limit(url, circuit, deadline, min_attempt):
+                    self.logger.warning(f"⏱️ Rate limit wait would exceed deadline: {url}")
+                    break
+            
+                timeout = fixed_timeout or self.timeouts.get_request_timeout('user')
+                try:
+                    response = self.adaptive_request(
+                        'user',
+                        url,
+                        session=session,
+                        method=method,
+                        timeout=timeout,
+                        deadline=deadline,
+                        **kwargs
+                    )
+                    retry_after = self.rate_limiter.feedback(url, response)
+                    if (rate_limit and retry_after is not None and attempt < max_retries - 1
+                            and deadline.allows(retry_after + min_attempt)):
+                        # Throttled: the limiter now holds the next attempt until Retry-After
+                        response.close()
+                        continue
+                    if cache:
+                        if response.status_code == 304 and cache_entry:
+                            cache.refresh(cache_entry, response)
+                            return cache.build_response(cache_entry, hit=False)
+                        cache.store(identity, method, url, response)
+                    return response
                 
-            except requests.exceptions.RequestException as e:
-                self.logger.debug(f"Request attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    if self.controller and self.controller.is_authenticated():
-                        self.enterprise_identity_rotation()
-                    time.sleep(1)
+                except requests.exceptions.RequestException as e:
+                    self.logger.debug(f"Request attempt {attempt + 1} failed: {e}")
+                    if attempt < max_retries - 1:
+                        if self.controller and self.controller.is_authenticated():
+                            # Rotate only if the new circuit still leaves room for an attempt
+                            if deadline.allows(self.get_rotation_wait() + min_attempt):
+                                self.enterprise_identity_rotation(verify=False)
+                            else:
+                                self.logger.debug("Skipping rotation: would exceed request deadline")
+                        if deadline.allows(1 + min_attempt):
+                            time.sleep(1)
+            else:
+                self.logger.error(f"All {max_retries} request attempts failed")
         
-        self.logger.error(f"All {max_retries} request attempts failed")
-        return None
+            if not deadline.allows(min_attempt):
+                self.record_request_metric('deadline_misses')
+            self.record_request_metric('requests_failed')
+            return None
+        finally:
+            if shaping_slot:
+                self.traffic_shaper.release(circuit)
+
+    def get_circuit_key(self, session: requests.Session) -> str:
+        """Circuit a session is pinned to, identified by its SOCKS isolation credentials"""
+        return session.proxies.get('https', '')
+
+    def wait_for_rate_limit(self, url: str, circuit: str, deadline: RequestDeadline,
+                            min_attempt: float = 0.0) -> bool:
+        """Sleep until the rate limiter grants a token; False if that would overrun `deadline`"""
+        waited = 0.0
+        try:
+            while True:
+                wait = self.rate_limiter.acquire(url, circuit)
+                if wait <= 0:
+                    return True
+                if not deadline.allows(wait + min_attempt):
+                    return False
+                time.sleep(wait)
+                waited += wait
+        finally:
+            if waited:
+                self.rate_limiter.record_wait(waited)
+
+    def get_advanced_routing(self):
+        """Lazily create the advanced routing helper (delays, traffic patterns, torrc policy)"""
+        if self.advanced_routing is None:
+            from advanced_routing import AdvancedCircuitRouting
+            self.advanced_routing = AdvancedCircuitRouting(self.config_path)
+        return self.advanced_routing
+
+    def apply_routing_policy(self, desired: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Reconcile the advanced routing torrc options (or `desired`) on every
+        Tor we use: each launched instance's control port, otherwise the
+        configured control_port. Call again whenever the options change.
+        Launched instances also get them in their torrc, so a supervisor
+        restart comes back with the same policy.
+        """
+        from advanced_routing import parse_torrc_options
+        router = self.get_advanced_routing()
+        if desired is None:
+            desired = parse_torrc_options(router.get_torrc_advanced_config())
+        if self.tor_launcher:
+            self.tor_launcher.extra_options = desired
+            ports = [instance.control_port for instance in self.tor_launcher.instances]
+        else:
+            ports = [self.config['control_port']]
+        results = router.reconcile_instances(ports, desired)
+        applied = sum(1 for result in results if not result['error'])
+        self.logger.info(f"🧭 Routing policy applied on {applied}/{len(results)} Tor instance(s)")
+        return results
+
+    def enable_routing_policy(self) -> None:
+        """Startup service: apply the routing policy, failing if any instance refused it"""
+        failed = [result['control_port'] for result in self.apply_routing_policy() if result['error']]
+        if failed:
+            raise RuntimeError(f"not applied on control port(s) {', '.join(map(str, failed))}")
+
+    def get_delay_scheduler(self):
+        """Lazily create the per-session artificial delay scheduler"""
+        if self.delay_scheduler is None:
+            from delay_scheduler import DelayScheduler
+            router = self.get_advanced_routing()
+            shaping = self.config.get('traffic_shaping', {})
+            if shaping.get('enabled', False):
+                from traffic_shaper import TrafficShaper
+                fixed_pattern = shaping.get('pattern')
+                self.traffic_shaper = TrafficShaper(
+                    lambda: fixed_pattern or router.get_traffic_mimicry_pattern()['request_pattern']
+                )
+            self.delay_scheduler = DelayScheduler(
+                router.generate_artificial_delays,
+                enabled=self.config.get('random_delay_enabled', False),
+                shaper=self.traffic_shaper
+            )
+        return self.delay_scheduler
+
+    def pacing_enabled(self) -> bool:
+        """Whether requests go through the per-session delay scheduler at all"""
+        return bool(self.config.get('random_delay_enabled', False) or
+                    self.config.get('traffic_shaping', {}).get('enabled', False))
+
+    def acquire_shaping_slot(self, circuit: str, deadline: Optional[RequestDeadline] = None,
+                             min_attempt: float = 0.0) -> bool:
+        """
+        Wait for a concurrency slot in the session's traffic pattern. Returns
+        True if one was taken (release it afterwards). When the deadline
+        leaves no room to wait, the request goes ahead unshaped instead of failing.
+        """
+        if not self.pacing_enabled() or self.get_delay_scheduler().shaper is None:
+            return False
+        remaining = deadline.remaining() if deadline is not None else None
+        timeout = None if remaining is None else max(0.0, remaining - min_attempt)
+        # Woken by the release of a slot, not by polling
+        return self.traffic_shaper.wait_admit(circuit, timeout)
+
+    def reserve_artificial_delay(self, circuit: str, deadline: Optional[RequestDeadline] = None,
+                                 min_attempt: float = 0.0) -> float:
+        """Book the session's next send slot; returns the wait, never more than the deadline leaves"""
+        if not self.pacing_enabled():
+            return 0.0
+        remaining = deadline.remaining() if deadline is not None else None
+        max_wait = None if remaining is None else max(0.0, remaining - min_attempt)
+        return self.get_delay_scheduler().reserve(circuit, max_wait)
+
+    def get_download_manager(self):
+        """Lazily create the streaming download manager"""
+        if self.download_manager is None:
+            from download_manager import EnterpriseDownloadManager
+            self.download_manager = EnterpriseDownloadManager(self)
+        return self.download_manager
+
+    def get_request_executor(self):
+        """Lazily create the priority request executor over the circuit pool"""
+        if self.request_executor is None:
+            from request_executor import PriorityRequestExecutor
+            self.request_executor = PriorityRequestExecutor(
+                self,
+                workers=self.config.get('executor_workers', 4),
+                max_queue=self.config.get('executor_queue_size', 1000)
+            )
+            self.register_shutdown_hook(lambda: self.request_executor.shutdown(wait=False))
+        return self.request_executor
+
+    def submit(self, url: str, priority: int = 10, deadline=None, **kwargs):
+        """
+        Queue a request and return a Future. Lower `priority` runs first
+        (0 interactive, 10 normal, 20 background); `deadline` includes the
+        time spent waiting in the queue.
+        """
+        return self.get_request_executor().submit(url, priority=priority, deadline=deadline, **kwargs)
+
+    def get_response_cache(self):
+        """Lazily create the disk-backed response cache"""
+        if self.response_cache is None:
+            from response_cache import EnterpriseResponseCache
+            cache_config = self.config.get('response_cache', {})
+            self.response_cache = EnterpriseResponseCache(
+                directory=cache_config.get('directory', 'cache/responses'),
+                max_bytes=cache_config.get('max_bytes', 256 * 1024 * 1024),
+                max_entry_bytes=cache_config.get('max_entry_bytes', 16 * 1024 * 1024),
+                default_ttl=cache_config.get('default_ttl', 0)
+            )
+        return self.response_cache
+
+    def get_identity_key(self, session: requests.Session) -> str:
+        """
+        Identity a session presents: fingerprint (User-Agent) plus circuit
+        isolation credentials. Response cache entries are keyed by it, so
+        an identity rotation deliberately starts from a cold cache.
+        """
+        return f"{session.headers.get('User-Agent', '')}|{session.proxies.get('https', '')}"
+
+    def register_shutdown_hook(self, hook) -> None:
+        """Callable run on graceful stop, emergency shutdown and interpreter exit"""
+        self.shutdown_hooks.append(hook)
+        atexit.register(hook)
+
+    def run_shutdown_hooks(self) -> None:
+        """Run registered hooks (journals, sinks) so buffered state reaches disk"""
+        while self.shutdown_hooks:
+            hook = self.shutdown_hooks.pop()
+            try:
+                hook()
+            except Exception as e:
+                self.logger.error(f"❌ Shutdown hook failed: {e}")
+
+    def get_circuit_pool(self):
+        """Lazily create the pool of isolated circuit sessions"""
+        if self.circuit_pool is None:
+            from circuit_pool import CircuitSessionPool
+            self.circuit_pool = CircuitSessionPool(self, self.config.get('circuit_pool_size', 4))
+        return self.circuit_pool
 
     def run_continuous_enterprise_stealth(self) -> None:
         """Run continuous enterprise stealth mode - CORRETTO"""
@@ -979,37 +1602,129 @@ def main():
     parser.add_argument('--test', action='store_true', help='Test enterprise stealth connection')
     parser.add_argument('--url', help='Make enterprise stealth request to URL')
     parser.add_argument('--config', default='settings.json', help='Config file path')
+    parser.add_argument('--deadline', type=float, help='End-to-end deadline in seconds for --url requests')
+    parser.add_argument('--output', help='Stream the --url response body to this file')
+    parser.add_argument('--chunk-size', type=int, help='Streaming chunk size in bytes')
+    parser.add_argument('--resume', action='store_true', help='Resume --output downloads across failures and restarts')
+    parser.add_argument('--segments', type=int, help='Download --output in parallel over N isolated circuits')
+    parser.add_argument('--url-file', help="Bulk mode: fetch every URL in this file ('-' for stdin)")
+    parser.add_argument('--results', default='bulk_results.jsonl',
+                        help="Bulk mode output: .jsonl ('-' for stdout), .db/.sqlite or .parquet")
+    parser.add_argument('--store-bodies', help='Bulk mode: keep response bodies in this content-addressed directory')
+    parser.add_argument('--concurrency', type=int, help='Bulk mode worker count')
+    parser.add_argument('--journal', help='Bulk mode SQLite job journal; completed URLs are skipped on restart')
+    parser.add_argument('--dedup', action='store_true', help='Bulk mode: skip duplicate URLs (Bloom filter)')
+    parser.add_argument('--seen-filter', help='Bulk mode: persistent Bloom filter file (implies --dedup)')
     parser.add_argument('--rotate-now', action='store_true', help='Force immediate IP rotation')
     parser.add_argument('--mode', choices=['stealth', 'advanced', 'ultimate', 'enterprise'], 
                        default='enterprise', help='Operation mode')
+    parser.add_argument('--fast', action='store_true',
+                        help='Minimal-latency startup for one-shot commands (no banner, probes, services or tests)')
+    parser.add_argument('--startup-timings', action='store_true', help='Print the startup time breakdown')
     
     args = parser.parse_args()
     
+    # Bulk results on stdout: keep it pure JSONL, console output goes to stderr
+    results_stream = sys.stdout
+    if args.url_file and args.results == '-':
+        sys.stdout = sys.stderr
+    
     try:
-        print(f"{Colors.BLUE}🚀 Initializing Ultimate Enterprise Tor Anonymizer...{Colors.END}")
-        stealth = UltimateTorAnonymizer(args.config)
+        if not args.fast:
+            print(f"{Colors.BLUE}🚀 Initializing Ultimate Enterprise Tor Anonymizer...{Colors.END}")
+        stealth = UltimateTorAnonymizer(args.config, fast=args.fast)
         
         if not stealth.initialized:
             print(f"{Colors.RED}❌ Failed to initialize enterprise system{Colors.END}")
             sys.exit(1)
         
-        if not stealth.start_ultimate_enterprise_mode():
+        if not stealth.start_ultimate_enterprise_mode(lightweight=bool(args.url_file)):
             print(f"{Colors.RED}❌ Failed to start enterprise stealth mode{Colors.END}")
             sys.exit(1)
         
-        if args.test:
+        if args.url_file:
+            from bulk_runner import BulkFetcher, iter_urls
+            from result_sinks import BackgroundResultWriter, ContentStore, JsonlResultSink, open_result_sink
+            concurrency = args.concurrency or stealth.config.get('bulk_concurrency', 8)
+            journal = None
+            if args.journal:
+                from crawl_journal import CrawlJournal
+                journal = CrawlJournal(args.journal)
+                stealth.register_shutdown_hook(journal.close)
+            seen_filter = None
+            if args.dedup or args.seen_filter:
+                from url_filter import BloomFilter
+                if args.seen_filter and os.path.exists(args.seen_filter):
+                    seen_filter = BloomFilter.open(args.seen_filter)
+                else:
+                    seen_filter = BloomFilter(stealth.config.get('dedup_capacity', 10000000),
+                                              stealth.config.get('dedup_error_rate', 0.001),
+                                              path=args.seen_filter)
+                stealth.register_shutdown_hook(seen_filter.close)
+            content_store = ContentStore(args.store_bodies) if args.store_bodies else None
+            fetcher = BulkFetcher(stealth, concurrency=concurrency, deadline=args.deadline,
+                                  journal=journal, seen_filter=seen_filter, content_store=content_store)
+            writer = BackgroundResultWriter(
+                JsonlResultSink(results_stream) if args.results == '-' else open_result_sink(args.results),
+                max_queue=stealth.config.get('result_queue_size', 10000),
+                batch_size=stealth.config.get('result_batch_size', 500),
+                flush_interval=stealth.config.get('result_flush_interval', 1.0)
+            )
+            stealth.register_shutdown_hook(writer.close)
+            summary = fetcher.run(iter_urls(args.url_file), writer)
+            print(f"{Colors.GREEN}✅ Bulk run: {summary['ok']}/{summary['total']} ok | "
+                  f"{summary['skipped']} skipped | {summary['duplicates']} duplicates | {summary['bytes']} bytes | "
+                  f"{summary['rate_per_min']} URLs/min{Colors.END}", file=sys.stderr)
+            stealth.stop_enterprise_stealth_mode()
+        elif args.test:
             print(f"{Colors.GREEN}✅ Enterprise stealth test completed{Colors.END}")
             stealth.stop_enterprise_stealth_mode()
         elif args.url:
-            response = stealth.make_enterprise_stealth_request(args.url)
-            if response:
-                print(f"{Colors.GREEN}✅ Enterprise stealth request: {response.status_code}{Colors.END}")
-                print(f"Preview: {response.text[:200]}...")
+            phase_start = time.perf_counter()
+            downloader = stealth.get_download_manager()
+            if args.output:
+                def show_progress(done, total):
+                    suffix = f"/{total}" if total else ""
+                    print(f"\r📥 {done}{suffix} bytes", end="", flush=True)
+                
+                if args.segments:
+                    result = downloader.segmented_download(
+                        args.url, args.output, circuits=args.segments, hash_algorithm='sha256',
+                        progress_callback=show_progress, deadline=args.deadline
+                    )
+                elif args.resume:
+                    result = downloader.resumable_download(
+                        args.url, args.output, hash_algorithm='sha256',
+                        progress_callback=show_progress, deadline=args.deadline
+                    )
+                else:
+                    result = downloader.stream_to_sink(
+                        args.url, args.output, chunk_size=args.chunk_size,
+                        hash_algorithm='sha256', progress_callback=show_progress,
+                        deadline=args.deadline
+                    )
+                print()
+                if result and result.get('complete', True):
+                    print(f"{Colors.GREEN}✅ Enterprise stealth download: {result['status_code']} - "
+                          f"{result['bytes']} bytes in {result['elapsed']:.1f}s{Colors.END}")
+                    print(f"SHA256: {result['hash']}")
+                else:
+                    reason = f": {result['error']}" if result and result.get('error') else ""
+                    print(f"{Colors.RED}❌ Enterprise stealth download failed{reason}{Colors.END}")
             else:
-                print(f"{Colors.RED}❌ Enterprise stealth request failed{Colors.END}")
+                result = downloader.fetch_preview(args.url, 200, deadline=args.deadline)
+                if result:
+                    print(f"{Colors.GREEN}✅ Enterprise stealth request: {result['status_code']}{Colors.END}")
+                    print(f"Preview: {result['preview'].decode('utf-8', errors='replace')}...")
+                else:
+                    print(f"{Colors.RED}❌ Enterprise stealth request failed{Colors.END}")
+            stealth.mark_startup('first_request', phase_start)
             stealth.stop_enterprise_stealth_mode()
         elif args.rotate_now:
-            if stealth.enterprise_identity_rotation():
+            phase_start = time.perf_counter()
+            # The IP is looked up once below; fast mode skips the in-rotation check
+            if stealth.enterprise_identity_rotation(verify=not args.fast):
+                stealth.mark_startup('rotation', phase_start)
                 ip = stealth.get_enterprise_stealth_ip()
                 print(f"{Colors.GREEN}✅ Enterprise IP rotated: {ip}{Colors.END}")
             else:
@@ -1017,6 +1732,9 @@ def main():
             stealth.stop_enterprise_stealth_mode()
         else:
             stealth.run_continuous_enterprise_stealth()
+        
+        if args.startup_timings:
+            stealth.print_startup_timings()
             
     except KeyboardInterrupt:
         print(f"\n{Colors.GREEN}🎯 Enterprise stealth session completed{Colors.END}")
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+TOR LAUNCHER
+Launches and supervises several Tor daemons so client load spreads across CPU cores
+"""
+
+import os
+import sys
+import time
+import zlib
+import socket
+import signal
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+class TorInstance:
+    """One managed Tor daemon with its own ports, DataDirectory and torrc"""
+
+    def __init__(self, index: int, socks_port: int, control_port: int, data_dir: Path):
+        self.index = index
+        self.socks_port = socks_port
+        self.control_port = control_port
+        self.data_dir = data_dir
+        self.torrc_path = data_dir / 'torrc'
+        self.log_path = data_dir / 'tor.log'
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.next_restart = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def port_open(self) -> bool:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            return sock.connect_ex(('127.0.0.1', self.socks_port)) == 0
+
+class TorLauncher:
+    """
+    N Tor daemons, each from a generated torrc with distinct SocksPort,
+    ControlPort and DataDirectory. A supervisor thread restarts any that
+    exit, with exponential backoff. Tor's client crypto and cell handling
+    mostly run on one core, so isolation keys are hashed across instances
+    (instance_for) to use several.
+
+    With `snapshot_path`, instances start from a saved directory cache
+    (tor_snapshot) when it is still valid, and the snapshot is refreshed
+    from a running instance every `snapshot_interval` seconds.
+
+    `tor_binary` can be any executable taking `-f <torrc>`, which makes the
+    launcher testable with a stub.
+    """
+
+    DEFAULT_CONFIG = {
+        "tor_binary": "tor",
+        "instances": 1,  # Or "auto": one per CPU core
+        "socks_port_base": 9250,
+        "control_port_base": 9350,
+        "data_root": "tor_data/instances",
+        "torrc_options": {
+            "CookieAuthentication": "1",
+            "SafeLogging": "1",
+            "AvoidDiskWrites": "1"
+        },
+        "supervise_interval": 1.0,
+        "restart_backoff": 1.0,
+        "max_restart_backoff": 60.0,
+        "stop_timeout": 10.0,
+        "snapshot_path": None,
+        "snapshot_interval": 3600.0
+    }
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**self.DEFAULT_CONFIG, **(config or {})}
+        self.logger = logging.getLogger('tor_launcher')
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.supervisor = None
+        self.snapshot = None
+        self.last_snapshot = time.monotonic()
+        self.seeded = 0
+        # Options reconciled at runtime (advanced_routing), kept for restarts
+        self.extra_options: Dict[str, List[str]] = {}
+        if self.config['snapshot_path']:
+            from tor_snapshot import DataDirSnapshot
+            self.snapshot = DataDirSnapshot(self.config['snapshot_path'])
+        count = self.config['instances']
+        if count == 'auto':
+            count = os.cpu_count() or 1
+        data_root = Path(self.config['data_root'])
+        self.instances: List[TorInstance] = [
+            TorInstance(index, self.config['socks_port_base'] + index, self.config['control_port_base'] + index,
+                        data_root / f"instance{index}")
+            for index in range(max(1, int(count)))
+        ]
+
+    def generate_torrc(self, instance: TorInstance) -> str:
+        lines = [
+            f"SocksPort 127.0.0.1:{instance.socks_port} IsolateSOCKSAuth",
+            f"ControlPort 127.0.0.1:{instance.control_port}",
+            f"DataDirectory {instance.data_dir.resolve()}",
+            f"Log notice file {instance.log_path.resolve()}",
+            "RunAsDaemon 0",
+            # Tor exits on its own if this process dies without stopping it
+            f"__OwningControllerProcess {os.getpid()}"
+        ]
+        lines += [f"{key} {value}" for key, value in self.config['torrc_options'].items()]
+        lines += [f"{key} {value}" for key, values in self.extra_options.items() for value in values]
+        return '\n'.join(lines) + '\n'
+
+    def _spawn(self, instance: TorInstance) -> None:
+        instance.data_dir.mkdir(parents=True, exist_ok=True)
+        # Tor refuses a DataDirectory readable by others
+        os.chmod(instance.data_dir, 0o700)
+        if self.snapshot and self.snapshot.restore(instance.data_dir):
+            self.seeded += 1
+        instance.torrc_path.write_text(self.generate_torrc(instance), encoding='utf-8')
+        instance.process = subprocess.Popen(
+            [self.config['tor_binary'], '-f', str(instance.torrc_path)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        instance.started_at = time.monotonic()
+        self.logger.info(f"🚀 Tor instance {instance.index} started (pid {instance.process.pid}, "
+                         f"SOCKS {instance.socks_port}, control {instance.control_port})")
+
+    def start(self) -> None:
+        """Spawn every instance and start supervising them"""
+        with self.lock:
+            for instance in self.instances:
+                if not instance.running:
+                    self._spawn(instance)
+        self.stop_event.clear()
+        if not self.supervisor or not self.supervisor.is_alive():
+            self.supervisor = threading.Thread(target=self._supervise, daemon=True, name="TorSupervisor")
+            self.supervisor.start()
+
+    def _supervise(self) -> None:
+        while not self.stop_event.wait(self.config['supervise_interval']):
+            with self.lock:
+                for instance in self.instances:
+                    if instance.running or self.stop_event.is_set():
+                        continue
+                    now = time.monotonic()
+                    if instance.next_restart == 0.0:
+                        code = instance.process.returncode if instance.process else None
+                        # Backoff grows with restarts and resets after a long healthy run
+                        if now - instance.started_at > self.config['max_restart_backoff']:
+                            instance.restarts = 0
+                        delay = min(self.config['restart_backoff'] * 2 ** instance.restarts,
+                                    self.config['max_restart_backoff'])
+                        instance.next_restart = now + delay
+                        self.logger.warning(f"⚠️ Tor instance {instance.index} exited ({code}), "
+                                            f"restarting in {delay:.1f}s")
+                    if now >= instance.next_restart:
+                        instance.restarts += 1
+                        instance.next_restart = 0.0
+                        try:
+                            self._spawn(instance)
+                        except OSError as e:
+                            instance.started_at = now
+                            self.logger.error(f"❌ Tor instance {instance.index} restart failed: {e}")
+            if self.snapshot and time.monotonic() - self.last_snapshot >= self.config['snapshot_interval']:
+                self.refresh_snapshot()
+
+    def refresh_snapshot(self) -> bool:
+        """Save the directory cache of the first running instance"""
+        self.last_snapshot = time.monotonic()
+        for instance in self.instances:
+            if instance.running:
+                try:
+                    return self.snapshot.save(instance.data_dir)
+                except OSError as e:
+                    self.logger.warning(f"⚠️ Tor cache snapshot failed: {e}")
+                    return False
+        return False
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        """True once every instance accepts SOCKS connections"""
+        deadline = time.monotonic() + timeout
+        pending = list(self.instances)
+        while pending and time.monotonic() < deadline:
+            pending = [instance for instance in pending if not instance.port_open()]
+            if pending:
+                time.sleep(0.2)
+        return not pending
+
+    def instance_for(self, key: Optional[str]) -> TorInstance:
+        """Instance serving an isolation key: stable, spread evenly; the shared session uses instance 0"""
+        if not key:
+            return self.instances[0]
+        return self.instances[zlib.crc32(key.encode('utf-8')) % len(self.instances)]
+
+    def signal_all(self, signal_name: str = 'NEWNYM', skip_primary: bool = False) -> int:
+        """
+        Send a controller signal to every instance (but instance 0 with
+        `skip_primary`, when the caller's own controller already did);
+        returns how many accepted it
+        """
+        from stem import Signal
+        from stem.control import Controller
+        sent = 0
+        for instance in self.instances[1 if skip_primary else 0:]:
+            try:
+                with Controller.from_port(address='127.0.0.1', port=instance.control_port) as controller:
+                    controller.authenticate()
+                    controller.signal(getattr(Signal, signal_name))
+                    sent += 1
+            except Exception as e:
+                self.logger.warning(f"⚠️ Signal {signal_name} to Tor instance {instance.index} failed: {e}")
+        return sent
+
+    def stop(self) -> None:
+        """Stop supervising, then terminate every instance (killed after stop_timeout)"""
+        self.stop_event.set()
+        if self.supervisor and self.supervisor is not threading.current_thread():
+            self.supervisor.join(timeout=5)
+        if self.snapshot:
+            # The cache is newest now: the next start is as warm as it can be
+            self.refresh_snapshot()
+        with self.lock:
+            for instance in self.instances:
+                if instance.running:
+                    instance.process.terminate()
+            deadline = time.monotonic() + self.config['stop_timeout']
+            for instance in self.instances:
+                if instance.process is None:
+                    continue
+                try:
+                    instance.process.wait(timeout=max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    instance.process.kill()
+                    instance.process.wait()
+        self.logger.info("🛑 Tor instances stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'instances': len(self.instances),
+                'running': sum(1 for instance in self.instances if instance.running),
+                'restarts': sum(instance.restarts for instance in self.instances),
+                'seeded': self.seeded,
+                'pids': [instance.process.pid if instance.running else None for instance in self.instances]
+            }
+
+def main():
+    """Run N supervised Tor instances in the foreground"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Managed multi-instance Tor launcher')
+    parser.add_argument('--instances', default='auto', help="Instance count or 'auto' (one per core)")
+    parser.add_argument('--tor-binary', default='tor')
+    parser.add_argument('--data-root', default='tor_data/instances')
+    parser.add_argument('--snapshot', default=None, help='Warm-start snapshot directory (e.g. tor_data/snapshot)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    launcher = TorLauncher({
+        'instances': args.instances if args.instances == 'auto' else int(args.instances),
+        'tor_binary': args.tor_binary,
+        'data_root': args.data_root,
+        'snapshot_path': args.snapshot
+    })
+    signal.signal(signal.SIGTERM, lambda *_: launcher.stop_event.set())
+    launcher.start()
+    ports = ', '.join(str(instance.socks_port) for instance in launcher.instances)
+    print(f"🧅 {len(launcher.instances)} Tor instances, SOCKS ports {ports}"
+          f"{f' ({launcher.seeded} warm-started)' if launcher.seeded else ''}")
+    print(f"{'✅ All instances accepting connections' if launcher.wait_ready() else '⚠️ Some instances not ready'}")
+    try:
+        while not launcher.stop_event.wait(30):
+            stats = launcher.get_stats()
+            print(f"📊 {stats['running']}/{stats['instances']} running | {stats['restarts']} restarts")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        launcher.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+TOR DATADIRECTORY SNAPSHOT
+Warm start for new Tor instances from a validated cache of consensus, descriptors and guard state
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import calendar
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+CONSENSUS_FILES = ('cached-microdesc-consensus', 'cached-consensus')
+SNAPSHOT_FILES = CONSENSUS_FILES + ('cached-certs', 'cached-microdescs', 'cached-microdescs.new', 'state')
+
+def read_consensus_times(path) -> Optional[Dict[str, float]]:
+    """valid-after / fresh-until / valid-until of a cached consensus (epoch seconds), None if unreadable"""
+    times = {}
+    try:
+        with open(path, 'r', encoding='ascii', errors='replace') as f:
+            # The header lines come first; the router list can be megabytes
+            for _, line in zip(range(64), f):
+                key, _, value = line.strip().partition(' ')
+                if key in ('valid-after', 'fresh-until', 'valid-until'):
+                    times[key] = float(calendar.timegm(time.strptime(value, '%Y-%m-%d %H:%M:%S')))
+    except (IOError, ValueError):
+        return None
+    return times if 'valid-until' in times else None
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DataDirSnapshot:
+    """
+    Copy of the directory cache of a bootstrapped Tor DataDirectory. A
+    fresh instance seeded from it only needs to build circuits instead of
+    downloading the consensus and descriptors first.
+
+    save() only keeps a cache whose consensus is still valid for at least
+    `min_remaining` seconds and writes a manifest with file hashes; the
+    snapshot directory is swapped in whole, so readers never see half of
+    one. restore() checks validity and hashes again and never replaces a
+    fresher cache, nor the guard state of an instance that has its own.
+    """
+
+    def __init__(self, path, min_remaining: float = 600.0):
+        self.path = Path(path)
+        self.min_remaining = min_remaining
+        self.logger = logging.getLogger('tor_snapshot')
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            return None
+        return manifest if manifest.get('version') == SNAPSHOT_FORMAT_VERSION else None
+
+    def _fresh(self, valid_until: Optional[float]) -> bool:
+        return valid_until is not None and valid_until - time.time() >= self.min_remaining
+
+    def is_fresh(self) -> bool:
+        manifest = self.manifest()
+        return bool(manifest) and self._fresh(manifest['valid_until'])
+
+    def age(self) -> Optional[float]:
+        manifest = self.manifest()
+        return time.time() - manifest['created'] if manifest else None
+
+    def save(self, data_dir) -> bool:
+        """Snapshot `data_dir` if it holds a usable consensus; returns whether one was written"""
+        data_dir = Path(data_dir)
+        consensus = next((name for name in CONSENSUS_FILES if (data_dir / name).exists()), None)
+        times = read_consensus_times(data_dir / consensus) if consensus else None
+        if not times or not self._fresh(times['valid-until']):
+            self.logger.debug(f"No fresh consensus in {data_dir}, snapshot not taken")
+            return False
+        manifest = self.manifest()
+        if manifest and manifest['valid_until'] >= times['valid-until']:
+            # Same consensus as the current snapshot
+            return False
+
+        staging = self.path.with_name(f"{self.path.name}.tmp{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        os.chmod(staging, 0o700)
+        files = {}
+        for name in SNAPSHOT_FILES:
+            source = data_dir / name
+            if not source.exists():
+                continue
+            # Tor replaces these files by rename, so each copy is a consistent version
+            shutil.copyfile(source, staging / name)
+            files[name] = {'size': (staging / name).stat().st_size, 'sha256': _sha256(staging / name)}
+        # The consensus may have been replaced after it was dated: date the copy
+        times = read_consensus_times(staging / consensus)
+        if not times or not self._fresh(times['valid-until']):
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+        with open(staging / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': SNAPSHOT_FORMAT_VERSION,
+                'created': time.time(),
+                'valid_after': times.get('valid-after'),
+                'valid_until': times['valid-until'],
+                'files': files
+            }, f, indent=1)
+
+        previous = self.path.with_name(f"{self.path.name}.old{os.getpid()}")
+        if self.path.exists():
+            self.path.rename(previous)
+        staging.rename(self.path)
+        shutil.rmtree(previous, ignore_errors=True)
+        total = sum(entry['size'] for entry in files.values())
+        self.logger.info(f"💾 Tor cache snapshot saved ({len(files)} files, {total // 1024} KiB, "
+                         f"valid {int((times['valid-until'] - time.time()) / 60)} more min)")
+        return True
+
+    def restore(self, data_dir) -> bool:
+        """Seed `data_dir` from the snapshot if it is valid and fresher; returns whether it was seeded"""
+        manifest = self.manifest()
+        if not manifest or not self._fresh(manifest['valid_until']):
+            return False
+        data_dir = Path(data_dir)
+        own = [read_consensus_times(data_dir / name) for name in CONSENSUS_FILES if (data_dir / name).exists()]
+        if any(times and times['valid-until'] >= manifest['valid_until'] for times in own):
+            return False
+        for name, entry in manifest['files'].items():
+            source = self.path / name
+            if not source.exists() or source.stat().st_size != entry['size'] or _sha256(source) != entry['sha256']:
+                self.logger.warning(f"⚠️ Tor cache snapshot damaged ({name}), not restored")
+                return False
+
+        data_dir.mkdir(parents=True, exist_ok=True)
+        os.chmod(data_dir, 0o700)
+        for name in manifest['files']:
+            target = data_dir / name
+            if name == 'state' and target.exists():
+                # An instance keeps the guards it already chose
+                continue
+            shutil.copyfile(self.path / name, target)
+            os.chmod(target, 0o600)
+        self.logger.info(f"♻️ Tor cache restored into {data_dir} "
+                         f"(valid {int((manifest['valid_until'] - time.time()) / 60)} more min)")
+        return True
+
+def main():
+    """Save, restore or inspect a snapshot from the command line (e.g. in a Docker entrypoint)"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Tor DataDirectory warm-start snapshot')
+    parser.add_argument('action', choices=['save', 'restore', 'info'])
+    parser.add_argument('--data-dir', default='tor_data')
+    parser.add_argument('--snapshot', default='tor_data/snapshot')
+    parser.add_argument('--min-remaining', type=float, default=600.0,
+                        help='Seconds of consensus validity required to save or restore')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    snapshot = DataDirSnapshot(args.snapshot, args.min_remaining)
+    if args.action == 'save':
+        return 0 if snapshot.save(args.data_dir) else 1
+    if args.action == 'restore':
+        return 0 if snapshot.restore(args.data_dir) else 1
+    manifest = snapshot.manifest()
+    if not manifest:
+        print(f"❌ No snapshot at {args.snapshot}")
+        return 1
+    remaining = (manifest['valid_until'] - time.time()) / 60
+    print(f"📦 Snapshot {args.snapshot}: {len(manifest['files'])} files | age {snapshot.age() / 60:.0f} min | "
+          f"consensus valid {remaining:.0f} more min | {'✅ fresh' if snapshot.is_fresh() else '⚠️ stale'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
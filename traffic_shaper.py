@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+TRAFFIC SHAPER
+Turns traffic mimicry patterns into concrete per-session timing and concurrency schedules
+"""
+
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Any, Optional, List
+
+# Pattern name (AdvancedCircuitRouting.get_traffic_mimicry_pattern()['request_pattern'])
+# -> requests per burst, gap inside a burst, pause between bursts (seconds), max concurrency
+PATTERN_SCHEDULES = {
+    'burst_pauses': {'burst': (2, 6), 'burst_gap': (0.05, 0.3), 'pause': (5.0, 30.0), 'concurrency': 4},
+    'continuous_scrolling': {'burst': (1, 1), 'burst_gap': (0.0, 0.0), 'pause': (0.4, 2.0), 'concurrency': 2},
+    'comparison_browsing': {'burst': (2, 3), 'burst_gap': (0.1, 0.5), 'pause': (2.0, 8.0), 'concurrency': 3},
+    'periodic_refresh': {'burst': (3, 8), 'burst_gap': (0.05, 0.2), 'pause': (30.0, 60.0), 'concurrency': 6}
+}
+
+class ShapingSchedule:
+    """Gap sequence of one session: short gaps inside a burst, a pause between bursts"""
+
+    __slots__ = ('pattern', 'params', 'rng', 'left_in_burst')
+
+    def __init__(self, pattern: str, rng: Optional[random.Random] = None):
+        if pattern not in PATTERN_SCHEDULES:
+            raise ValueError(f"Unknown traffic pattern: {pattern}")
+        self.pattern = pattern
+        self.params = PATTERN_SCHEDULES[pattern]
+        self.rng = rng or random.Random()
+        self.left_in_burst = self.rng.randint(*self.params['burst']) - 1
+
+    @property
+    def concurrency(self) -> int:
+        return self.params['concurrency']
+
+    def next_gap(self) -> float:
+        """Seconds between the request just booked and the next one"""
+        if self.left_in_burst > 0:
+            self.left_in_burst -= 1
+            return self.rng.uniform(*self.params['burst_gap'])
+        self.left_in_burst = self.rng.randint(*self.params['burst']) - 1
+        return self.rng.uniform(*self.params['pause'])
+
+class _SessionShape:
+    __slots__ = ('schedule', 'in_flight', 'waiters')
+
+    def __init__(self, schedule: ShapingSchedule):
+        self.schedule = schedule
+        self.in_flight = 0
+        self.waiters = deque()
+
+class TrafficShaper:
+    """
+    Per-session shaping state, consulted by the shared DelayScheduler.
+
+    Each logical session draws a pattern from `pattern_source` on first
+    use and keeps it, so one identity behaves consistently. next_gap()
+    feeds the scheduler's slot booking (timing). admit() / release() bound
+    the requests a session has outstanding (concurrency); a request counts
+    until its response headers arrive. A caller turned away can leave an
+    `on_free` callback, run (outside the lock) when a slot frees up, so
+    nobody polls: wait_admit() blocks a thread on it, the executor and the
+    bulk runner re-dispatch the parked job from it. CPU time spent shaping
+    is measured on every call.
+    """
+
+    def __init__(self, pattern_source: Callable[[], str], max_sessions: int = 10000):
+        self.pattern_source = pattern_source
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('traffic_shaper')
+        self.sessions: 'OrderedDict[str, _SessionShape]' = OrderedDict()
+        self.orphans: List[Callable[[], None]] = []
+        self.stats = {'gaps': 0, 'admitted': 0, 'held': 0, 'cpu_seconds': 0.0, 'patterns': {}}
+
+    def _shape(self, session_key: str) -> _SessionShape:
+        shape = self.sessions.get(session_key)
+        if shape is None:
+            pattern = self.pattern_source()
+            shape = _SessionShape(ShapingSchedule(pattern))
+            self.sessions[session_key] = shape
+            self.stats['patterns'][pattern] = self.stats['patterns'].get(pattern, 0) + 1
+            if len(self.sessions) > self.max_sessions:
+                # Waiters of an evicted session retry against a fresh shape
+                self.orphans.extend(self.sessions.popitem(last=False)[1].waiters)
+        else:
+            self.sessions.move_to_end(session_key)
+        return shape
+
+    def _notify(self, callbacks: List[Callable[[], None]]) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"❌ Shaping slot callback failed: {e}")
+
+    def _take_orphans(self) -> List[Callable[[], None]]:
+        orphans, self.orphans = self.orphans, []
+        return orphans
+
+    def next_gap(self, session_key: str) -> float:
+        start = time.perf_counter()
+        with self.lock:
+            gap = self._shape(session_key).schedule.next_gap()
+            self.stats['gaps'] += 1
+            self.stats['cpu_seconds'] += time.perf_counter() - start
+            orphans = self._take_orphans()
+        self._notify(orphans)
+        return gap
+
+    def admit(self, session_key: str, on_free: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Take a concurrency slot for the session; False if it is at its
+        limit, in which case `on_free` (if given) is called once a slot
+        frees up. The callback does not hold the slot: it should admit() again.
+        """
+        start = time.perf_counter()
+        with self.lock:
+            shape = self._shape(session_key)
+            admitted = shape.in_flight < shape.schedule.concurrency
+            if admitted:
+                shape.in_flight += 1
+                self.stats['admitted'] += 1
+            else:
+                self.stats['held'] += 1
+                if on_free is not None:
+                    shape.waiters.append(on_free)
+            self.stats['cpu_seconds'] += time.perf_counter() - start
+            orphans = self._take_orphans()
+        self._notify(orphans)
+        return admitted
+
+    def release(self, session_key: str) -> None:
+        with self.lock:
+            shape = self.sessions.get(session_key)
+            waiter = None
+            if shape is not None:
+                if shape.in_flight > 0:
+                    shape.in_flight -= 1
+                if shape.waiters:
+                    waiter = shape.waiters.popleft()
+        if waiter is not None:
+            self._notify([waiter])
+
+    def cancel_wait(self, session_key: str, on_free: Callable[[], None]) -> bool:
+        """Withdraw a pending `on_free`; False if it was already called"""
+        with self.lock:
+            shape = self.sessions.get(session_key)
+            if shape is not None and on_free in shape.waiters:
+                shape.waiters.remove(on_free)
+                return True
+        return False
+
+    def wait_admit(self, session_key: str, timeout: Optional[float] = None) -> bool:
+        """Block until the session has a free slot and take it; False after `timeout` seconds"""
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        freed = threading.Event()
+        while True:
+            freed.clear()
+            if self.admit(session_key, on_free=freed.set):
+                return True
+            remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            if not freed.wait(remaining):
+                if self.cancel_wait(session_key, freed.set):
+                    return False
+                # Woken while timing out: use the slot rather than lose the wakeup
+                return self.admit(session_key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats['patterns'] = dict(self.stats['patterns'])
+            stats['sessions'] = len(self.sessions)
+            stats['waiting'] = sum(len(shape.waiters) for shape in self.sessions.values())
+        calls = stats['gaps'] + stats['admitted'] + stats['held']
+        stats['cpu_us_per_call'] = round(stats['cpu_seconds'] / calls * 1e6, 2) if calls else 0.0
+        return stats
+
+    @staticmethod
+    def simulate(pattern: str, requests: int = 1000, service_time=0.5,
+                 arrivals: Optional[List[float]] = None, seed: int = 0) -> Dict[str, Any]:
+        """
+        Discrete-event run of one session's schedule on a virtual clock, no
+        sleeping. `service_time` is seconds per request or a callable taking
+        the RNG. `arrivals` are the times requests become ready (default:
+        all at 0, a backlog). Returns start times and the latency the shaping
+        adds over sending each request on arrival.
+        """
+        rng = random.Random(seed)
+        schedule = ShapingSchedule(pattern, rng)
+        arrivals = sorted(arrivals) if arrivals is not None else [0.0] * requests
+        completions: List[float] = []
+        next_at = 0.0
+        starts, added = [], []
+        peak = 0
+        for arrival in arrivals:
+            slot = max(arrival, next_at)
+            # Concurrency: wait for the earliest outstanding request to finish
+            while completions and completions[0] <= slot:
+                heapq.heappop(completions)
+            if len(completions) >= schedule.concurrency:
+                slot = max(slot, heapq.heappop(completions))
+                while completions and completions[0] <= slot:
+                    heapq.heappop(completions)
+            next_at = slot + schedule.next_gap()
+            duration = service_time(rng) if callable(service_time) else service_time
+            heapq.heappush(completions, slot + duration)
+            peak = max(peak, len(completions))
+            starts.append(slot)
+            added.append(slot - arrival)
+        added_sorted = sorted(added)
+        count = len(added_sorted)
+        span = max(starts) - min(starts) if starts else 0.0
+        return {
+            'pattern': pattern,
+            'requests': count,
+            'duration': round(span, 3),
+            'requests_per_min': round(count / span * 60, 2) if span > 0 else 0.0,
+            'peak_concurrency': peak,
+            'added_latency_mean': round(sum(added) / count, 3) if count else 0.0,
+            'added_latency_p95': round(added_sorted[min(count - 1, int(0.95 * count))], 3) if count else 0.0,
+            'starts': starts
+        }
+
+def main():
+    """Simulate every pattern offline and print its shape"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Offline traffic shaping simulation')
+    parser.add_argument('--requests', type=int, default=10000, help='Requests per pattern')
+    parser.add_argument('--service-time', type=float, default=0.8, help='Mean seconds per request')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for pattern in PATTERN_SCHEDULES:
+        start = time.perf_counter()
+        result = TrafficShaper.simulate(
+            pattern, args.requests,
+            service_time=lambda rng: rng.expovariate(1 / args.service_time),
+            seed=args.seed
+        )
+        cpu = time.perf_counter() - start
+        print(f"🎭 {pattern:22} {result['requests_per_min']:8.2f} req/min | "
+              f"peak concurrency {result['peak_concurrency']} | "
+              f"simulated {result['duration'] / 3600:.1f}h in {cpu:.2f}s "
+              f"({cpu / result['requests'] * 1e6:.1f}µs/request)")
+
+if __name__ == "__main__":
+    main()
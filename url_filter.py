@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+URL SEEN FILTER
+Compact Bloom filter for deduplicating very large crawl frontiers
+"""
+
+import os
+import math
+import mmap
+import struct
+import hashlib
+import threading
+from typing import Optional
+
+class BloomFilter:
+    """
+    Array-backed Bloom filter with a configurable false-positive rate.
+
+    About 1.8 bytes per URL at 0.1% and 1.2 bytes at 1%, against roughly
+    100+ bytes per entry for a Python set of strings. Backed either by a
+    bytearray or by an mmap'd file (header + bit array). File-backed filters
+    persist across runs. Filters built with the same parameters, e.g. one
+    per worker process, can be merged with a bitwise OR.
+    """
+
+    MAGIC = b'TORBLOOM'
+    HEADER = struct.Struct('<8sQQdQ')  # magic, num_bits, num_hashes, error_rate, capacity
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, path: Optional[str] = None):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be > 0 and 0 < error_rate < 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.path = path
+        self.lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self.bits = None
+
+        num_bytes = (self.num_bits + 7) // 8
+        if path is None:
+            self.bits = bytearray(num_bytes)
+        elif os.path.exists(path):
+            self._open_map(path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes, error_rate, capacity))
+                f.truncate(self.HEADER.size + num_bytes)
+            self._open_map(path)
+
+    @classmethod
+    def open(cls, path: str) -> 'BloomFilter':
+        """Open an existing filter file with the parameters stored in its header"""
+        with open(path, 'rb') as f:
+            magic, _, _, error_rate, capacity = cls.HEADER.unpack(f.read(cls.HEADER.size))
+        if magic != cls.MAGIC:
+            raise ValueError(f"{path} is not a Bloom filter file")
+        return cls(capacity, error_rate, path)
+
+    def _open_map(self, path: str) -> None:
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, num_bits, num_hashes, _, _ = self.HEADER.unpack(self._map[:self.HEADER.size])
+        if magic != self.MAGIC or num_bits != self.num_bits or num_hashes != self.num_hashes:
+            self.close()
+            raise ValueError(f"{path} was created with different filter parameters")
+        self.bits = memoryview(self._map)[self.HEADER.size:]
+
+    def _positions(self, item: str):
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add `item`; returns True if it was not (probably) present before"""
+        added = False
+        with self.lock:
+            bits = self.bits
+            for pos in self._positions(item):
+                mask = 1 << (pos & 7)
+                if not bits[pos >> 3] & mask:
+                    bits[pos >> 3] |= mask
+                    added = True
+        return added
+
+    def merge(self, other: 'BloomFilter', chunk_size: int = 1 << 20) -> None:
+        """OR another filter with identical parameters into this one"""
+        if (other.num_bits, other.num_hashes) != (self.num_bits, self.num_hashes):
+            raise ValueError("Bloom filters must share capacity and error rate to be merged")
+        with self.lock:
+            for offset in range(0, len(self.bits), chunk_size):
+                mine = self.bits[offset:offset + chunk_size]
+                theirs = other.bits[offset:offset + chunk_size]
+                merged = int.from_bytes(mine, 'little') | int.from_bytes(theirs, 'little')
+                self.bits[offset:offset + len(mine)] = merged.to_bytes(len(mine), 'little')
+
+    def flush(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self) -> None:
+        if self._map is not None:
+            if isinstance(self.bits, memoryview):
+                self.bits.release()
+            self.bits = None
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
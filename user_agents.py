@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+USER AGENT TABLE
+Lazily loaded, versioned user-agent table with weighted sampling by browser share
+"""
+
+import json
+import bisect
+import random
+import threading
+from array import array
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+UA_TABLE_VERSION = 1
+UA_TABLE_PATH = Path(__file__).with_name('user_agents.json')
+FALLBACK_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:130.0) Gecko/20100101 Firefox/130.0"
+
+class UserAgentTable:
+    """
+    All user agents packed into one string with an offsets array (no
+    per-entry objects), drawn by weight with a binary search over the
+    cumulative weights.
+    """
+
+    def __init__(self, agents: List[Tuple[str, str, float]], updated: Optional[str] = None):
+        if not agents:
+            raise ValueError("User agent table is empty")
+        self.updated = updated
+        self.families = sorted({family for family, _, _ in agents})
+        self.family_codes = array('B', (self.families.index(family) for family, _, _ in agents))
+        self.blob = ''.join(user_agent for _, user_agent, _ in agents)
+        self.offsets = array('I', [0])
+        for _, user_agent, _ in agents:
+            self.offsets.append(self.offsets[-1] + len(user_agent))
+        self.cumulative = array('d')
+        total = 0.0
+        for _, _, weight in agents:
+            total += weight
+            self.cumulative.append(total)
+
+    @classmethod
+    def load(cls, path=UA_TABLE_PATH) -> 'UserAgentTable':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != UA_TABLE_VERSION:
+            raise ValueError(f"Unsupported user agent table version in {path}: {data.get('version')}")
+        return cls([tuple(agent) for agent in data['agents']], data.get('updated'))
+
+    def __len__(self) -> int:
+        return len(self.family_codes)
+
+    def __getitem__(self, index: int) -> str:
+        return self.blob[self.offsets[index]:self.offsets[index + 1]]
+
+    def family(self, index: int) -> str:
+        return self.families[self.family_codes[index]]
+
+    def random(self, rng: random.Random = random) -> str:
+        index = bisect.bisect_right(self.cumulative, rng.random() * self.cumulative[-1])
+        return self[min(index, len(self) - 1)]
+
+_table: Optional[UserAgentTable] = None
+_table_lock = threading.Lock()
+
+def get_user_agent_table() -> Optional[UserAgentTable]:
+    """Shared table, loaded on first use; None if the file is missing or invalid"""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                try:
+                    _table = UserAgentTable.load()
+                except (ValueError, KeyError, IOError, json.JSONDecodeError):
+                    return None
+    return _table
+
+def random_user_agent(rng: random.Random = random) -> str:
+    """Weighted random user agent, or the fallback when no table is available"""
+    table = get_user_agent_table()
+    return table.random(rng) if table else FALLBACK_USER_AGENT
+
+def build_table(path=UA_TABLE_PATH) -> int:
+    """Regenerate the table from the fingerprint profile share tables"""
+    import time
+    from fingerprint_profiles import BROWSERS, VERSIONS, build_user_agent
+    agents = []
+    for browser in BROWSERS:
+        for version, share in VERSIONS[browser['family']]:
+            user_agent = build_user_agent(browser['family'], browser['os'], version)
+            agents.append([browser['family'], user_agent, round(browser['weight'] * share, 4)])
+    # One agent per line keeps updates to the table reviewable as diffs
+    rows = ',\n'.join(f"  {json.dumps(agent)}" for agent in agents)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'{{"version": {UA_TABLE_VERSION}, "updated": "{time.strftime("%Y-%m-%d")}",\n "agents": [\n{rows}\n]}}\n')
+    return len(agents)
+
+if __name__ == "__main__":
+    print(f"✅ Wrote {build_table()} user agents to {UA_TABLE_PATH}")